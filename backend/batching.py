@@ -0,0 +1,188 @@
+"""
+Cross-request dynamic micro-batching and in-flight request coalescing.
+
+Concurrent small requests are queued and coalesced into one call of a batch
+function, so many batch-of-1 forwards become a single batched forward.
+Concurrent identical requests share one computation (single-flight).
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+from executors import BoundedExecutor
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesce items from concurrent callers into batches for `process_batch`.
+
+    A batch is dispatched when it reaches `max_batch_size` items or when
+    `max_wait_ms` has passed since its first submission. `process_batch` must
+    return one result per input item, in order; each caller gets its own slice.
+    Up to `max_concurrent` batches run at once; while all of them are busy, new
+    submissions keep queueing and go out together in the next batch.
+    """
+
+    def __init__(self, process_batch: Callable[[List[T]], List[R]],
+                 max_batch_size: int = 256, max_wait_ms: float = 5.0,
+                 executor: Optional[BoundedExecutor] = None,
+                 max_concurrent: Optional[int] = None):
+        """
+        Args:
+            process_batch: Blocking function mapping a list of items to a list of results
+            max_batch_size: Maximum number of items per coalesced call
+            max_wait_ms: Maximum time the first queued item waits for company
+            executor: Pool that runs process_batch (default: the event loop's executor)
+            max_concurrent: Batches in flight at once (default: the executor's workers, else 1)
+        """
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        if max_concurrent is None:
+            max_concurrent = executor.max_workers if executor is not None else 1
+        self.max_concurrent = max_concurrent
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Start the dispatch loop on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._worker = asyncio.get_running_loop().create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            for batch in self._batches:
+                batch.cancel()
+            await asyncio.gather(self._worker, *self._batches, return_exceptions=True)
+            self._worker = None
+            self._batches.clear()
+
+    async def submit(self, items: List[T]) -> List[R]:
+        """Queue items for the next batch and wait for their results."""
+        if len(items) >= self.max_batch_size:
+            # Already a full batch on its own; nothing to gain from waiting
+            return await self._execute(items)
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((items, future))
+        return await future
+
+    async def _execute(self, items: List[T]) -> List[R]:
+        """Run the blocking batch function off the event loop."""
+        if self.executor is not None:
+            return await self.executor.run(self.process_batch, items)
+        return await asyncio.get_running_loop().run_in_executor(None, self.process_batch, items)
+
+    async def _collect(self) -> List[Tuple[List[T], asyncio.Future]]:
+        """Wait for one submission, then gather more until the batch is full or time is up."""
+        pending = [await self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                submission = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            pending.append(submission)
+            size += len(submission[0])
+        return pending
+
+    async def _run_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Collect only once a slot is free, so the next batch fills up while all are busy
+            await self._slots.acquire()
+            try:
+                pending = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            batch = loop.create_task(self._dispatch(pending))
+            self._batches.add(batch)
+            batch.add_done_callback(self._batches.discard)
+
+    async def _dispatch(self, pending: List[Tuple[List[T], asyncio.Future]]) -> None:
+        """Run one collected batch and hand each caller its slice, then free its slot."""
+        try:
+            pending = [(items, future) for items, future in pending if not future.cancelled()]
+            if not pending:
+                return
+            try:
+                results = await self._execute([item for items, _ in pending for item in items])
+            except Exception as exc:
+                if len(pending) == 1:
+                    if not pending[0][1].done():
+                        pending[0][1].set_exception(exc)
+                else:
+                    # One caller's bad input must not fail the others: retry each on its own
+                    for items, future in pending:
+                        await self._resolve_alone(items, future)
+                return
+
+            offset = 0
+            for items, future in pending:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+        finally:
+            self._slots.release()
+
+    async def _resolve_alone(self, items: List[T], future: asyncio.Future) -> None:
+        try:
+            result = await self._execute(items)
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+
+class SingleFlight(Generic[R]):
+    """
+    Share one in-flight computation among concurrent callers with the same key.
+
+    The first caller for a key starts the computation; callers arriving before it
+    finishes await the same result (or exception). Nothing is cached afterwards.
+    A caller that is cancelled (e.g. client disconnect) does not cancel the
+    computation for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[R]]) -> R:
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            self.started += 1
+            future = asyncio.ensure_future(compute())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Mark the exception retrieved even if every waiter has gone away
+            future.exception()
+
+    def stats(self) -> dict:
+        return {'in_flight': len(self._in_flight), 'started': self.started, 'shared': self.shared}
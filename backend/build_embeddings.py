@@ -0,0 +1,99 @@
+"""
+Offline build of the memory-mapped embedding store (see embedding_store.py).
+
+Featurizes and encodes every solute of one or more library files with the
+serving checkpoint and writes their encoder states, so recurring screens of the
+same library skip straight to the interaction, Set2Set and head.
+
+Usage:
+    python backend/build_embeddings.py library.csv [more.parquet ...] [--dtype float16] [--append]
+
+Library files are CSV/Parquet with a solute SMILES column (SMILES, solute_smiles,
+SMILES_Solute, ...) or .smi files with one SMILES per line. Restart the API (or
+its workers) afterwards to pick up the new store.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+# Utilities are local to the backend directory
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bulk_io import detect_format, iter_upload_chunks
+from embedding_store import DTYPES, EmbeddingStore, EmbeddingStoreWriter
+from main import CHECKPOINT_PATH, EMBEDDINGS_DIR, SolubilityPredictor
+
+
+def iter_library(path: str, chunk_size: int) -> Iterator[List[str]]:
+    """Yield solute SMILES from a library file in chunks."""
+    if path.endswith((".smi", ".smiles", ".txt")):
+        with open(path) as f:
+            chunk = []
+            for line in f:
+                fields = line.split()
+                if fields:
+                    chunk.append(fields[0])
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        return
+    with open(path, "rb") as f:
+        for rows in iter_upload_chunks(f, detect_format(path, None), chunk_size):
+            yield [row["solute_smiles"] for row in rows if row["solute_smiles"]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute solute encoder states into a memory-mapped store")
+    parser.add_argument("libraries", nargs="+", help="CSV/Parquet/.smi library files")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH), help="Model checkpoint (default: serving checkpoint)")
+    parser.add_argument("--out", default=str(EMBEDDINGS_DIR), help="Store root directory (default: SOL_EMBEDDINGS_DIR)")
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default="float16", help="Storage precision of the states")
+    parser.add_argument("--append", action="store_true", help="Keep the molecules of an existing store for this checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Molecules encoded per step")
+    args = parser.parse_args()
+
+    # Stored states are read by every deployment, so they are always computed in fp32
+    predictor = SolubilityPredictor(args.checkpoint, precision="fp32")
+    writer = EmbeddingStoreWriter(args.out, predictor.model_hash, predictor.model.hidden_dim, args.dtype)
+    start = time.time()
+    failed = 0
+    try:
+        if args.append:
+            existing = EmbeddingStore.open(args.out, predictor.model_hash)
+            if existing is not None:
+                for smiles, h in existing.items():
+                    writer.add(smiles, h)
+                print(f"[INFO] Kept {len(existing)} molecules from {existing.path}")
+
+        for path in args.libraries:
+            for chunk in iter_library(path, args.chunk_size):
+                canonical = predictor._canonicalize_many(chunk)
+                todo = [smiles for smiles in dict.fromkeys(canonical.values())
+                        if smiles is not None and smiles not in writer]
+                failed += sum(1 for smiles in canonical.values() if smiles is None)
+                # Encode every molecule afresh: the predictor's own lookups would hand back states
+                # from the store being replaced (possibly float16) or from pinned panels
+                graphs = dict(zip(todo, predictor._featurize_many(todo)))
+                valid = [smiles for smiles in todo if graphs[smiles] is not None]
+                failed += len(todo) - len(valid)
+                for smiles, h in zip(valid, predictor._encode_graphs([graphs[smiles] for smiles in valid])):
+                    writer.add(smiles, h)
+                print(f"[INFO] {len(writer)} molecules encoded ({time.time() - start:.0f}s)")
+
+        out_path = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        predictor.close()
+
+    print(f"[INFO] Wrote {len(writer)} molecules ({args.dtype}) to {out_path}; {failed} invalid/failed SMILES skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Incremental readers for bulk scoring uploads (CSV and Parquet).
+
+Rows are read a chunk at a time from the uploaded file, so memory stays
+constant regardless of the library size. Column names follow the spreadsheets
+the frontend already accepts.
+"""
+
+import csv
+import io
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+# Accepted column names, in order of preference
+SOLUTE_COLUMNS = ("SMILES_Solute", "solute_smiles", "Solute_SMILES", "SMILES", "smiles")
+SOLVENT_COLUMNS = ("SMILES_Solvent", "solvent_smiles", "Solvent_SMILES")
+TEMPERATURE_COLUMNS = ("Temperature_K", "temperature_k")
+
+DEFAULT_TEMPERATURE = 298.15  # K, used when a row has no temperature
+
+PARQUET_CONTENT_TYPES = ("application/vnd.apache.parquet", "application/x-parquet")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """Return "parquet" or "csv" from the upload's file name / content type."""
+    name = (filename or "").lower()
+    if name.endswith((".parquet", ".pq")) or content_type in PARQUET_CONTENT_TYPES:
+        return "parquet"
+    return "csv"
+
+
+def _first(row: Dict[str, Any], columns) -> Any:
+    for column in columns:
+        value = row.get(column)
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def parse_row(row_number: int, row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map one uploaded row to a scoring record.
+
+    Returns:
+        {"row", "solute_smiles", "solvent_smiles", "temperature_k"}, plus "error"
+        if the row cannot be scored (missing SMILES, unparsable temperature)
+    """
+    solute = _first(row, SOLUTE_COLUMNS)
+    solvent = _first(row, SOLVENT_COLUMNS)
+    temperature = _first(row, TEMPERATURE_COLUMNS)
+    record = {
+        "row": row_number,
+        "solute_smiles": str(solute).strip() if solute is not None else None,
+        "solvent_smiles": str(solvent).strip() if solvent is not None else None,
+        "temperature_k": DEFAULT_TEMPERATURE,
+    }
+
+    if temperature is not None:
+        try:
+            record["temperature_k"] = float(temperature)
+        except (TypeError, ValueError):
+            record["error"] = f"Invalid temperature: {temperature}"
+            return record
+    if not record["solute_smiles"]:
+        record["error"] = "Missing solute SMILES"
+    elif not record["solvent_smiles"]:
+        record["error"] = "Missing solvent SMILES"
+    return record
+
+
+def _iter_csv(file: BinaryIO, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        chunk = []
+        for row_number, row in enumerate(csv.DictReader(text)):
+            chunk.append(parse_row(row_number, row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        # Don't let the wrapper close the underlying upload
+        text.detach()
+
+
+def _iter_parquet(file: BinaryIO, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(file)
+    known = set(SOLUTE_COLUMNS + SOLVENT_COLUMNS + TEMPERATURE_COLUMNS)
+    columns = [name for name in parquet.schema_arrow.names if name in known]
+    row_number = 0
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+        chunk = []
+        for row in batch.to_pylist():
+            chunk.append(parse_row(row_number, row))
+            row_number += 1
+        yield chunk
+
+
+def iter_upload_chunks(file: BinaryIO, file_format: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield scoring records from an uploaded CSV/Parquet file in chunks of at most `chunk_size` rows."""
+    if file_format == "parquet":
+        return _iter_parquet(file, chunk_size)
+    return _iter_csv(file, chunk_size)
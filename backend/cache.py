@@ -0,0 +1,140 @@
+"""
+Bounded in-memory caches used by the inference service.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import torch
+from torch_geometric.data import Data
+
+
+def tensor_nbytes(tensor: Optional[torch.Tensor]) -> int:
+    """Size of a tensor's data in bytes (0 for None)."""
+    if tensor is None:
+        return 0
+    return tensor.numel() * tensor.element_size()
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by the total size of its values.
+
+    Entries are weighed with `sizeof`; inserting past `max_bytes` evicts the least
+    recently used entries first. Hit/miss/eviction counters are kept for reporting.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int]):
+        """
+        Initialize cache.
+
+        Args:
+            max_bytes: Memory budget for all cached values
+            sizeof: Function returning the size in bytes of a cached value
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key` (marking it recently used) or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert or replace `key`, evicting old entries to stay within budget."""
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if size > self.max_bytes:
+                # Never cache a single value larger than the whole budget
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self.current_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        """Cache statistics for health/monitoring endpoints."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class EncodedMolecule:
+    """Featurized graph of one molecule together with its GGNN encoder output."""
+
+    __slots__ = ('graph', 'h')
+
+    def __init__(self, graph: Optional[Data], h: torch.Tensor):
+        """
+        Args:
+            graph: PyG Data object from MolecularGraphFeaturizer (None if only the states are kept)
+            h: Per-atom encoder hidden states (N, H)
+        """
+        self.graph = graph
+        self.h = h
+
+    @property
+    def num_atoms(self) -> int:
+        return self.h.size(0)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the cached tensors."""
+        total = tensor_nbytes(self.h)
+        if self.graph is None:
+            return total
+        for key in self.graph.keys():
+            value = self.graph[key]
+            if isinstance(value, torch.Tensor):
+                total += tensor_nbytes(value)
+        return total
+
+
+class EncoderStateCache(LRUCache):
+    """LRU of EncodedMolecule entries keyed by RDKit canonical SMILES."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes, sizeof=lambda entry: entry.nbytes)
@@ -0,0 +1,153 @@
+"""
+Memory-mapped store of precomputed encoder states for large solute libraries.
+
+build_embeddings.py encodes a library offline and writes, per checkpoint:
+
+    <root>/<checkpoint hash[:16]>/
+        states.bin     ragged per-atom encoder states, (total atoms, H) float16/float32
+        offsets.npy    int64 (N + 1) row offsets of each molecule into states.bin
+        smiles.txt     canonical SMILES, one per line, aligned with offsets
+        meta.json      checkpoint hash, hidden size, dtype, counts
+
+The server maps states.bin read-only (copy-on-write), so every worker process
+shares one page-cached copy and a lookup is a slice, not a featurize + encode.
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import torch
+
+DTYPES = {"float16": np.float16, "float32": np.float32}
+
+
+def store_dir(root: str, model_hash: str) -> str:
+    """Directory holding the store built with a given checkpoint."""
+    return os.path.join(root, model_hash[:16])
+
+
+class EmbeddingStore:
+    """Read-only view of a built store: canonical SMILES -> (atoms, H) encoder states."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.hidden_dim = self.meta["hidden_dim"]
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        total_atoms = int(self.offsets[-1])
+        # Copy-on-write mapping: shared page cache, and writable as far as torch.from_numpy is concerned
+        self.states = np.memmap(
+            os.path.join(path, "states.bin"), dtype=DTYPES[self.meta["dtype"]], mode="c",
+            shape=(total_atoms, self.hidden_dim)
+        ) if total_atoms else np.zeros((0, self.hidden_dim), dtype=DTYPES[self.meta["dtype"]])
+        with open(os.path.join(path, "smiles.txt")) as f:
+            self.index: Dict[str, int] = {line.rstrip("\n"): i for i, line in enumerate(f)}
+        self.hits = 0
+
+    @classmethod
+    def open(cls, root: str, model_hash: str) -> Optional["EmbeddingStore"]:
+        """Open the store for a checkpoint, or None if none has been built."""
+        path = store_dir(root, model_hash)
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        store = cls(path)
+        if store.meta["model_hash"] != model_hash:
+            return None
+        return store
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, smiles: str) -> bool:
+        return smiles in self.index
+
+    def get(self, smiles: str) -> Optional[torch.Tensor]:
+        """Encoder states (atoms, H) of a canonical SMILES; a zero-copy view for float32 stores."""
+        i = self.index.get(smiles)
+        if i is None:
+            return None
+        self.hits += 1
+        return torch.from_numpy(self.states[self.offsets[i]:self.offsets[i + 1]])
+
+    def items(self) -> Iterable[Tuple[str, torch.Tensor]]:
+        for smiles in self.index:
+            yield smiles, self.get(smiles)
+
+    def stats(self) -> dict:
+        return {
+            'path': self.path,
+            'molecules': len(self),
+            'atoms': int(self.offsets[-1]),
+            'dtype': self.meta["dtype"],
+            'hits': self.hits,
+        }
+
+
+class EmbeddingStoreWriter:
+    """Streams encoder states into a new store; the store becomes visible atomically on close()."""
+
+    def __init__(self, root: str, model_hash: str, hidden_dim: int, dtype: str = "float16"):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {sorted(DTYPES)}")
+        self.root = root
+        self.model_hash = model_hash
+        self.hidden_dim = hidden_dim
+        self.dtype = dtype
+        self.final_path = store_dir(root, model_hash)
+        self.tmp_path = f"{self.final_path}.tmp-{os.getpid()}"
+        os.makedirs(self.tmp_path)
+        self._states = open(os.path.join(self.tmp_path, "states.bin"), "wb")
+        self._smiles = open(os.path.join(self.tmp_path, "smiles.txt"), "w")
+        self._offsets = [0]
+        self._seen = set()
+
+    def add(self, smiles: str, h: torch.Tensor) -> bool:
+        """Append one molecule's states; duplicates are skipped. Returns whether it was added."""
+        if smiles in self._seen:
+            return False
+        if "\n" in smiles or h.dim() != 2 or h.size(1) != self.hidden_dim:
+            raise ValueError(f"Bad entry for {smiles!r}: states of shape {tuple(h.shape)}")
+        self._seen.add(smiles)
+        self._states.write(h.detach().cpu().numpy().astype(DTYPES[self.dtype]).tobytes())
+        self._smiles.write(smiles + "\n")
+        self._offsets.append(self._offsets[-1] + h.size(0))
+        return True
+
+    def __contains__(self, smiles: str) -> bool:
+        return smiles in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def close(self) -> str:
+        """Finish the files and swap the new store in place of any previous one."""
+        self._states.close()
+        self._smiles.close()
+        np.save(os.path.join(self.tmp_path, "offsets.npy"), np.asarray(self._offsets, dtype=np.int64))
+        with open(os.path.join(self.tmp_path, "meta.json"), "w") as f:
+            json.dump({
+                'model_hash': self.model_hash,
+                'hidden_dim': self.hidden_dim,
+                'dtype': self.dtype,
+                'molecules': len(self._seen),
+                'atoms': self._offsets[-1],
+                'created_at': time.time(),
+            }, f)
+
+        # Running servers keep their mapping of the old files until they reopen the store
+        old_path = f"{self.final_path}.old-{os.getpid()}"
+        if os.path.exists(self.final_path):
+            os.replace(self.final_path, old_path)
+        os.replace(self.tmp_path, self.final_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return self.final_path
+
+    def abort(self) -> None:
+        self._states.close()
+        self._smiles.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
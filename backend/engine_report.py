@@ -0,0 +1,60 @@
+"""
+Compare the inference engines (see engines.py) on this machine.
+
+Runs the encoder, interaction and head of every engine over the warm-up
+solutes x solvent registry, reports each engine's deviation from eager and its
+latency, so a node can be configured with the fastest engine (SOL_ENGINE).
+
+Usage:
+    python backend/engine_report.py [--engines eager compile onnx] [--repeats 20]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Utilities are local to the backend directory
+sys.path.insert(0, str(Path(__file__).parent))
+
+import torch
+
+from engines import ENGINES, check_parity, create_engine, run_stages
+from main import CHECKPOINT_PATH, COMPILE_BACKEND, ENGINES_DIR, SolubilityPredictor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parity and latency of the inference engines")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--repeats", type=int, default=20, help="Timed passes per engine")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's)")
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    predictor = SolubilityPredictor(str(CHECKPOINT_PATH))
+    workloads = predictor._parity_workloads()
+    pairs = sum(solutes.num_graphs for solutes, _, _ in workloads)
+    eager = create_engine("eager", predictor.model, predictor.device)
+    try:
+        print(f"{'engine':<10} {'max |dLogS|':>12} {'ms/pass':>10} {'pairs/s':>10}")
+        for name in args.engines:
+            try:
+                engine = create_engine(name, predictor.model, predictor.device,
+                                       str(ENGINES_DIR / predictor.model_hash[:16]), COMPILE_BACKEND)
+                error = check_parity(engine, eager, workloads) * predictor.target_std
+            except Exception as e:
+                print(f"{name:<10} unavailable: {e}")
+                continue
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                for workload in workloads:
+                    run_stages(engine, *workload)
+            elapsed = (time.perf_counter() - start) / args.repeats
+            print(f"{name:<10} {error:>12.2e} {elapsed * 1000:>10.1f} {pairs / elapsed:>10.0f}")
+    finally:
+        predictor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Interchangeable inference engines for the three stages of SolubilityModel.
+
+The predictor calls the encoder (atom states of a graph batch), the interaction
++ Set2Set readout (pair vectors) and the MLP head separately, so it can cache
+and reuse each stage's output. An engine runs those same three stages:
+
+    eager    the PyTorch modules as they are
+    compile  the same modules under torch.compile
+    onnx     the stages exported to ONNX and run by an ONNX Runtime CPU session
+
+Every engine can also run at reduced precision (PRECISIONS): "int8" dynamically
+quantizes the Linear, GRUCell and LSTM weights of a copy of the model, "bf16"
+runs the encoder and interaction under bfloat16 autocast. The MLP head's first
+layer (which carries the temperature) and the bond-type lookup stay fp32.
+
+Every engine other than eager fp32 is checked against the eager fp32 model
+(check_parity) before it is used, and the predictor falls back to eager fp32
+if it disagrees.
+"""
+
+import copy
+import math
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from mpnn import SolubilityModel, segment_pair_index
+
+ENGINES = ("eager", "compile", "onnx")
+PRECISIONS = ("fp32", "int8", "bf16")
+
+# Bumped when the exported graphs change, so stale exports are not reused
+ONNX_EXPORT_VERSION = 1
+ONNX_OPSET = 18
+
+
+class InferenceEngine:
+    """Eager PyTorch execution; the reference the other engines are checked against."""
+
+    name = "eager"
+    precision = "fp32"
+
+    def __init__(self, model: SolubilityModel):
+        self.model = model
+        self.parity_error: Optional[float] = None
+
+    @property
+    def hidden_dim(self) -> int:
+        return self.model.hidden_dim
+
+    def encode(self, x: torch.Tensor, edge_index: torch.Tensor, edge_attr: torch.Tensor,
+               edge_type: Optional[torch.Tensor]) -> torch.Tensor:
+        """Atom states (N, H) of a collated graph batch."""
+        return self.model.encoder(x, edge_index, edge_attr, edge_type)
+
+    def interact(self, h_s: torch.Tensor, solute_batch: torch.Tensor,
+                 h_v: torch.Tensor, solvent_batch: torch.Tensor) -> torch.Tensor:
+        """Pair vectors (B, 4H) of aligned solute/solvent atom states."""
+        return self.model.interact(h_s, solute_batch, h_v, solvent_batch)
+
+    def head(self, pair_vec: torch.Tensor, temperature: torch.Tensor) -> torch.Tensor:
+        """Normalized predictions (B, T) for (B, T) or (1, T) temperatures."""
+        return self.model.head(pair_vec, temperature)
+
+    def head_samples(self, pair_vec: torch.Tensor, temperature: torch.Tensor, samples: int) -> torch.Tensor:
+        """(K, B, T) Monte Carlo dropout samples of the head, see SolubilityModel.head_samples."""
+        return self.model.head_samples(pair_vec.float(), temperature.float(), samples)
+
+    def after_fork(self) -> None:
+        """Re-create per-process state in a forked worker."""
+
+    def weight_copy_bytes(self, model_bytes: int) -> int:
+        """
+        Estimated memory of the weights this engine holds besides the model it was built
+        from (`model_bytes` in fp32): an int8 engine runs a quantized copy, bounded above
+        by the fp32 size.
+        """
+        return model_bytes if self.precision == "int8" else 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {'name': self.name, 'precision': self.precision, 'parity_max_abs_error': self.parity_error}
+
+
+class CompiledEngine(InferenceEngine):
+    """The eager stages under torch.compile (dynamic shapes; compiled on first use)."""
+
+    name = "compile"
+
+    def __init__(self, model: SolubilityModel, backend: str = "inductor"):
+        super().__init__(model)
+        self.backend = backend
+        self._encode = torch.compile(model.encoder, dynamic=True, backend=backend)
+        self._interact = torch.compile(model.interact, dynamic=True, backend=backend)
+        self._head = torch.compile(model.head, dynamic=True, backend=backend)
+
+    def encode(self, x, edge_index, edge_attr, edge_type):
+        return self._encode(x, edge_index, edge_attr, edge_type)
+
+    def interact(self, h_s, solute_batch, h_v, solvent_batch):
+        return self._interact(h_s, solute_batch, h_v, solvent_batch)
+
+    def head(self, pair_vec, temperature):
+        return self._head(pair_vec, temperature)
+
+    def describe(self) -> Dict[str, Any]:
+        return {**super().describe(), 'backend': self.backend}
+
+
+# ============================================================================
+# ONNX export: the same math as the eager model, written with static graph ops
+# (scatter instead of per-bond-type loops, explicit GRU/LSTM cells)
+# ============================================================================
+
+class _OnnxEncoder(nn.Module):
+    """GGNN encoder over bond-type weights gathered for the batch's bond types."""
+
+    def __init__(self, model: SolubilityModel):
+        super().__init__()
+        self.node_proj = model.encoder.node_proj
+        self.gru = model.encoder.cell.gru
+        self.mp_steps = model.encoder.mp_steps
+
+    def forward(self, x, src, dst, type_local, type_weights):
+        # type_weights: (K, H, H) per-type message matrices, type_local: (E,) indices into them
+        h = self.node_proj(x)
+        hidden = h.size(1)
+        flat_index = type_local * h.size(0) + src
+        dst_index = dst.unsqueeze(1).expand(-1, hidden)
+        for _ in range(self.mp_steps):
+            projected = torch.matmul(h.unsqueeze(0), type_weights.transpose(1, 2))  # (K, N, H)
+            msg = projected.reshape(-1, hidden)[flat_index]                         # (E, H)
+            aggr = torch.zeros_like(h).scatter_add(0, dst_index, msg)
+            h = self._gru(aggr, h)
+        return h
+
+    def _gru(self, x, h):
+        gi = F.linear(x, self.gru.weight_ih, self.gru.bias_ih)
+        gh = F.linear(h, self.gru.weight_hh, self.gru.bias_hh)
+        i_r, i_z, i_n = gi.chunk(3, 1)
+        h_r, h_z, h_n = gh.chunk(3, 1)
+        r = torch.sigmoid(i_r + h_r)
+        z = torch.sigmoid(i_z + h_z)
+        n = torch.tanh(i_n + r * h_n)
+        return (1 - z) * n + z * h
+
+
+class _OnnxInteraction(nn.Module):
+    """Segment interaction map (indices computed outside) and both Set2Set readouts."""
+
+    def __init__(self, model: SolubilityModel):
+        super().__init__()
+        self.hidden_dim = model.hidden_dim
+        self.scale_interaction = model.scale_interaction
+        self.lstm_solute = model.set2set_solute.lstm
+        self.lstm_solvent = model.set2set_solvent.lstm
+        self.steps = model.set2set_solute.processing_steps
+
+    def forward(self, h_s, h_v, ii, jj, solute_batch, solvent_batch, pair_ids):
+        hidden = self.hidden_dim
+        hs_k, hv_k = h_s[ii], h_v[jj]
+        I = (hs_k * hv_k).sum(-1, keepdim=True)
+        if self.scale_interaction:
+            I = I / math.sqrt(hidden)
+        mapped_s = torch.zeros_like(h_s).scatter_add(0, ii.unsqueeze(1).expand(-1, hidden), I * hv_k)
+        mapped_v = torch.zeros_like(h_v).scatter_add(0, jj.unsqueeze(1).expand(-1, hidden), I * hs_k)
+        solute_vec = self._set2set(self.lstm_solute, mapped_s, solute_batch, pair_ids)
+        solvent_vec = self._set2set(self.lstm_solvent, mapped_v, solvent_batch, pair_ids)
+        return torch.cat([solute_vec, solvent_vec], dim=-1)
+
+    def _set2set(self, lstm, x, index, pair_ids):
+        # torch_geometric.nn.Set2Set with its one-layer LSTM and segment softmax spelled out
+        hidden = self.hidden_dim
+        num_pairs = pair_ids.size(0)
+        h = x.new_zeros(num_pairs, hidden)
+        c = x.new_zeros(num_pairs, hidden)
+        q_star = x.new_zeros(num_pairs, 2 * hidden)
+        column = index.unsqueeze(1)
+        for _ in range(self.steps):
+            gates = F.linear(q_star, lstm.weight_ih_l0, lstm.bias_ih_l0) + F.linear(h, lstm.weight_hh_l0, lstm.bias_hh_l0)
+            i, f, g, o = gates.chunk(4, 1)
+            c = torch.sigmoid(f) * c + torch.sigmoid(i) * torch.tanh(g)
+            h = torch.sigmoid(o) * torch.tanh(c)
+            e = (x * h[index]).sum(-1, keepdim=True)
+            e_max = x.new_full((num_pairs, 1), float("-inf")).scatter_reduce(0, column, e, "amax")
+            a = (e - e_max[index]).exp()
+            a_sum = x.new_zeros(num_pairs, 1).scatter_add(0, column, a) + 1e-16
+            a = a / a_sum[index]
+            r = x.new_zeros(num_pairs, hidden).scatter_add(0, column.expand(-1, hidden), a * x)
+            q_star = torch.cat([h, r], dim=-1)
+        return q_star
+
+
+class _OnnxHead(nn.Module):
+    def __init__(self, model: SolubilityModel):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pair_vec, temperature):
+        return self.model.head(pair_vec, temperature)
+
+
+class OnnxEngine(InferenceEngine):
+    """The three stages exported to ONNX (once per checkpoint) and run with ONNX Runtime on CPU."""
+
+    name = "onnx"
+
+    def __init__(self, model: SolubilityModel, export_dir: str):
+        """
+        Args:
+            model: Eval-mode model on CPU with its bond-type lookup built
+            export_dir: Directory for the exported graphs of this checkpoint (reused if present)
+        """
+        import onnxruntime  # noqa: F401 (optional dependency, fail before exporting)
+
+        super().__init__(model)
+        if model.encoder.cell.edge_network.weight_table is None:
+            raise ValueError("ONNX engine needs the bond-type lookup (build_edge_lookup)")
+        self.weight_table = model.encoder.cell.edge_network.weight_table.detach().cpu()
+        self.export_dir = os.path.join(export_dir, f"v{ONNX_EXPORT_VERSION}")
+        self._export()
+        self._sessions: Dict[str, Any] = {}
+        self.after_fork()
+
+    def _paths(self) -> Dict[str, str]:
+        return {stage: os.path.join(self.export_dir, f"{stage}.onnx") for stage in ("encoder", "interaction", "head")}
+
+    def _export(self) -> None:
+        paths = self._paths()
+        if all(os.path.exists(path) for path in paths.values()):
+            return
+        os.makedirs(self.export_dir, exist_ok=True)
+        hidden = self.hidden_dim
+        node_dim = self.model.encoder.node_proj.in_features
+
+        # Small example inputs; every size is exported as a dynamic axis
+        src = torch.tensor([0, 1, 1, 2, 2, 3, 3, 4])
+        dst = torch.tensor([1, 0, 2, 1, 3, 2, 4, 3])
+        encoder_inputs = (torch.randn(5, node_dim), src, dst,
+                          torch.tensor([0, 0, 1, 1, 0, 0, 1, 1]), torch.randn(2, hidden, hidden))
+        solute_batch, solvent_batch = torch.tensor([0, 0, 1, 1]), torch.tensor([0, 1, 1])
+        ii, jj = segment_pair_index(solute_batch, solvent_batch, 2)
+        interaction_inputs = (torch.randn(4, hidden), torch.randn(3, hidden), ii, jj,
+                              solute_batch, solvent_batch, torch.arange(2))
+        head_inputs = (torch.randn(3, 4 * hidden), torch.rand(3, 2) * 100 + 250)
+
+        exports = [
+            ("encoder", _OnnxEncoder(self.model), encoder_inputs,
+             ["x", "src", "dst", "type_local", "type_weights"], ["h"],
+             {"x": {0: "atoms"}, "src": {0: "edges"}, "dst": {0: "edges"}, "type_local": {0: "edges"},
+              "type_weights": {0: "types"}, "h": {0: "atoms"}}),
+            ("interaction", _OnnxInteraction(self.model), interaction_inputs,
+             ["h_s", "h_v", "ii", "jj", "solute_batch", "solvent_batch", "pair_ids"], ["pair_vec"],
+             {"h_s": {0: "solute_atoms"}, "h_v": {0: "solvent_atoms"}, "ii": {0: "entries"}, "jj": {0: "entries"},
+              "solute_batch": {0: "solute_atoms"}, "solvent_batch": {0: "solvent_atoms"},
+              "pair_ids": {0: "pairs"}, "pair_vec": {0: "pairs"}}),
+            ("head", _OnnxHead(self.model), head_inputs, ["pair_vec", "temperature"], ["pred"],
+             {"pair_vec": {0: "pairs"}, "temperature": {0: "temperature_rows", 1: "temperatures"},
+              "pred": {0: "pairs", 1: "temperatures"}}),
+        ]
+        for stage, module, inputs, input_names, output_names, dynamic_axes in exports:
+            tmp_path = f"{paths[stage]}.{os.getpid()}.tmp"
+            with torch.no_grad():
+                torch.onnx.export(module.eval(), inputs, tmp_path, input_names=input_names,
+                                  output_names=output_names, dynamic_axes=dynamic_axes, opset_version=ONNX_OPSET)
+            os.replace(tmp_path, paths[stage])
+
+    def after_fork(self) -> None:
+        # ONNX Runtime thread pools don't survive fork; sessions are cheap to re-open
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        options.inter_op_num_threads = 1
+        self._sessions = {
+            stage: onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+            for stage, path in self._paths().items()
+        }
+
+    def weight_copy_bytes(self, model_bytes: int) -> int:
+        # Each session loads the initializers of its exported graph
+        return sum(os.path.getsize(path) for path in self._paths().values())
+
+    def _run(self, stage: str, **inputs: torch.Tensor) -> torch.Tensor:
+        feeds = {name: tensor.detach().cpu().numpy() for name, tensor in inputs.items()}
+        return torch.from_numpy(self._sessions[stage].run(None, feeds)[0])
+
+    def encode(self, x, edge_index, edge_attr, edge_type):
+        if edge_type is None:
+            raise ValueError("ONNX engine needs bond type ids from the featurizer")
+        if edge_type.numel():
+            types, type_local = torch.unique(edge_type, return_inverse=True)
+        else:
+            # No bonds (single-atom molecules): one unused type keeps the shapes non-empty
+            types, type_local = torch.zeros(1, dtype=torch.long), edge_type
+        return self._run("encoder", x=x.float(), src=edge_index[0], dst=edge_index[1],
+                         type_local=type_local, type_weights=self.weight_table[types])
+
+    def interact(self, h_s, solute_batch, h_v, solvent_batch):
+        num_pairs = int(solute_batch.max().item()) + 1 if solute_batch.numel() else 0
+        ii, jj = segment_pair_index(solute_batch, solvent_batch, num_pairs)
+        return self._run("interaction", h_s=h_s.float(), h_v=h_v.float(), ii=ii, jj=jj,
+                         solute_batch=solute_batch, solvent_batch=solvent_batch,
+                         pair_ids=torch.arange(num_pairs))
+
+    def head(self, pair_vec, temperature):
+        return self._run("head", pair_vec=pair_vec.float(), temperature=temperature.float())
+
+
+class AutocastEngine(InferenceEngine):
+    """Runs another engine's encoder and interaction under autocast; outputs stay fp32."""
+
+    def __init__(self, engine: InferenceEngine, precision: str, dtype: torch.dtype, device: torch.device):
+        super().__init__(engine.model)
+        self.engine = engine
+        self.name = engine.name
+        self.precision = precision
+        self.dtype = dtype
+        self.device_type = device.type
+
+    def _autocast(self):
+        return torch.autocast(self.device_type, dtype=self.dtype)
+
+    def encode(self, x, edge_index, edge_attr, edge_type):
+        with self._autocast():
+            return self.engine.encode(x, edge_index, edge_attr, edge_type).float()
+
+    def interact(self, h_s, solute_batch, h_v, solvent_batch):
+        with self._autocast():
+            return self.engine.interact(h_s, solute_batch, h_v, solvent_batch).float()
+
+    def head(self, pair_vec, temperature):
+        # Temperatures need more mantissa than bf16 has (298.15 K would round to 298 K)
+        return self.engine.head(pair_vec, temperature)
+
+    def head_samples(self, pair_vec, temperature, samples):
+        return self.engine.head_samples(pair_vec, temperature, samples)
+
+    def after_fork(self) -> None:
+        self.engine.after_fork()
+
+    def weight_copy_bytes(self, model_bytes: int) -> int:
+        return self.engine.weight_copy_bytes(model_bytes)
+
+    def describe(self) -> Dict[str, Any]:
+        return {**self.engine.describe(), 'precision': self.precision, 'parity_max_abs_error': self.parity_error}
+
+
+def quantize_int8(model: SolubilityModel) -> SolubilityModel:
+    """
+    Copy of an eval-mode CPU model with dynamically quantized (int8 weight) Linear,
+    GRUCell and LSTM layers. The edge network (only used to build the bond-type
+    lookup) and the head's first layer (read as raw weights by SolubilityModel.head)
+    stay fp32.
+    """
+    keep_fp32 = ("encoder.cell.edge_network.", "mlp.0")
+    qconfig_spec = {
+        name: torch.ao.quantization.default_dynamic_qconfig
+        for name, module in model.named_modules()
+        if isinstance(module, (nn.Linear, nn.GRUCell, nn.LSTM)) and not name.startswith(keep_fp32)
+    }
+    quantized = torch.ao.quantization.quantize_dynamic(copy.deepcopy(model), qconfig_spec, dtype=torch.qint8)
+    return quantized.eval()
+
+
+def create_engine(name: str, model: SolubilityModel, device: torch.device,
+                  export_dir: Optional[str] = None, compile_backend: str = "inductor",
+                  precision: str = "fp32") -> InferenceEngine:
+    """
+    Build an engine by name (see ENGINES) at a precision (see PRECISIONS).
+
+    Raises:
+        ValueError: If the name or precision is unknown, or the combination cannot run on this device
+        ImportError: If the engine's optional dependency is missing
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r} (one of {', '.join(PRECISIONS)})")
+    if precision == "int8":
+        if device.type != "cpu":
+            raise ValueError("int8 dynamic quantization runs on CPU only")
+        model = quantize_int8(model)
+
+    if name == "eager":
+        engine = InferenceEngine(model)
+    elif name == "compile":
+        engine = CompiledEngine(model, compile_backend)
+    elif name == "onnx":
+        if device.type != "cpu":
+            raise ValueError("ONNX engine runs on CPU only")
+        if precision != "fp32":
+            raise ValueError("ONNX engine runs in fp32 only")
+        if export_dir is None:
+            raise ValueError("ONNX engine needs an export directory")
+        engine = OnnxEngine(model, export_dir)
+    else:
+        raise ValueError(f"Unknown engine {name!r} (one of {', '.join(ENGINES)})")
+
+    if precision == "bf16":
+        return AutocastEngine(engine, precision, torch.bfloat16, device)
+    engine.precision = precision
+    return engine
+
+
+def run_stages(engine: InferenceEngine, solutes, solvents, temperature: torch.Tensor) -> torch.Tensor:
+    """Encoder, interaction and head over aligned solute/solvent graph batches: (B, T) predictions."""
+    with torch.no_grad():
+        h_s = engine.encode(solutes.x, solutes.edge_index, solutes.edge_attr, solutes.edge_type)
+        h_v = engine.encode(solvents.x, solvents.edge_index, solvents.edge_attr, solvents.edge_type)
+        pair_vec = engine.interact(h_s, solutes.batch, h_v, solvents.batch)
+        return engine.head(pair_vec, temperature)
+
+
+def check_parity(engine: InferenceEngine, reference: InferenceEngine,
+                 workloads: Sequence[tuple]) -> float:
+    """
+    Largest absolute difference between two engines' normalized predictions.
+
+    Args:
+        engine: Engine under test
+        reference: Engine it must agree with (eager)
+        workloads: (solute batch, solvent batch, (1, T) temperatures) triples, batches
+                   aligned pair by pair
+    """
+    error = 0.0
+    for solutes, solvents, temperature in workloads:
+        expected = run_stages(reference, solutes, solvents, temperature)
+        actual = run_stages(engine, solutes, solvents, temperature).to(expected.device)
+        error = max(error, float((actual - expected).abs().max()))
+    return error
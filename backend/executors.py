@@ -0,0 +1,89 @@
+"""
+Bounded thread pools for blocking work (model inference, image rendering).
+
+Blocking calls are dispatched off the asyncio event loop so /health and other
+connections stay responsive. Each pool caps the number of running + queued tasks
+and rejects new work with 503 once full, instead of letting requests pile up.
+Background work (job chunks) waits for an idle worker instead, so it never
+takes a queue slot from a request nor queues ahead of one.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor with a limit on in-flight (running + queued) tasks."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        """
+        Args:
+            name: Pool name, used for thread names and error messages
+            max_workers: Number of worker threads
+            max_queue: Tasks allowed to wait for a free worker before rejecting
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_in_flight = max_workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Condition()
+        self._in_flight = 0
+        self.rejected = 0
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._lock.notify_all()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` in the pool, or raise 503 if the pool is saturated."""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Server busy ({self.name} queue full), retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def run_background(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` in the pool at low priority and return its result; blocks the
+        calling thread (never call it from the event loop). Waits until no task is
+        queued and a worker is idle rather than raising 503.
+        """
+        with self._lock:
+            while self._in_flight >= self.max_workers:
+                self._lock.wait()
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future.result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'in_flight': self._in_flight,
+                'max_in_flight': self.max_in_flight,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
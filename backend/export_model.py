@@ -0,0 +1,49 @@
+"""
+Export the serving checkpoint as an inference-only artifact (see model_artifact.py).
+
+The server loads the artifact instead of the training checkpoint when it was
+exported from that checkpoint, which shortens cold starts; the Docker image
+runs this at build time.
+
+Usage:
+    python backend/export_model.py [--checkpoint PATH] [--out DIR]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+# Utilities are local to the backend directory
+sys.path.insert(0, str(Path(__file__).parent))
+
+from main import CHECKPOINT_PATH, MODEL_ARTIFACT_DIR
+from model_artifact import export_artifact
+from mpnn import SolubilityModel, infer_model_params
+from result_store import checkpoint_fingerprint
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export an inference-only, memory-mappable model artifact")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH), help="Training checkpoint (default: serving checkpoint)")
+    parser.add_argument("--out", default=MODEL_ARTIFACT_DIR, help="Artifact directory (default: SOL_MODEL_ARTIFACT_DIR)")
+    args = parser.parse_args()
+    if not args.out:
+        parser.error("no output directory (SOL_MODEL_ARTIFACT_DIR is empty)")
+
+    start = time.time()
+    # Sized from the checkpoint's own weights, as the server does when it loads a checkpoint
+    state_dict = torch.load(args.checkpoint, map_location="cpu", weights_only=False)["model_state_dict"]
+    model_params = infer_model_params(state_dict)
+    del state_dict
+    meta = export_artifact(
+        args.checkpoint, args.out, SolubilityModel, model_params, checkpoint_fingerprint(args.checkpoint)
+    )
+    print(f"[INFO] Exported {meta['parameters']} parameters from {meta['source_checkpoint']} "
+          f"to {args.out} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
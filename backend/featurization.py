@@ -12,6 +12,39 @@ import numpy as np
 from typing import Optional, List, Tuple
 
 
+# Bond categories one-hot encoded by get_bond_features (anything else is all-zero)
+BOND_TYPES = [
+    Chem.rdchem.BondType.SINGLE,
+    Chem.rdchem.BondType.DOUBLE,
+    Chem.rdchem.BondType.TRIPLE,
+    Chem.rdchem.BondType.AROMATIC
+]
+BOND_STEREO_TYPES = [
+    Chem.rdchem.BondStereo.STEREONONE,
+    Chem.rdchem.BondStereo.STEREOANY,
+    Chem.rdchem.BondStereo.STEREOZ,
+    Chem.rdchem.BondStereo.STEREOE,
+]
+
+# Atom categories one-hot encoded by get_atom_features (plus an 'other' column where noted)
+ATOMIC_NUMS = [1, 6, 7, 8, 9, 15, 16, 17, 35, 53]  # H, C, N, O, F, P, S, Cl, Br, I (+ other)
+HYBRIDIZATION_TYPES = [
+    Chem.rdchem.HybridizationType.SP,
+    Chem.rdchem.HybridizationType.SP2,
+    Chem.rdchem.HybridizationType.SP3,
+    Chem.rdchem.HybridizationType.SP3D,
+    Chem.rdchem.HybridizationType.SP3D2
+]  # (+ other)
+CHIRAL_TYPES = [
+    Chem.rdchem.ChiralType.CHI_UNSPECIFIED,
+    Chem.rdchem.ChiralType.CHI_TETRAHEDRAL_CW,
+    Chem.rdchem.ChiralType.CHI_TETRAHEDRAL_CCW,
+]
+
+# Every distinct bond feature row: (bond type or other) x conjugated x in ring x (stereo or other)
+NUM_BOND_TYPE_IDS = (len(BOND_TYPES) + 1) * 2 * 2 * (len(BOND_STEREO_TYPES) + 1)
+
+
 class MolecularGraphFeaturizer:
     """Featurizer for converting molecules to PyTorch Geometric graphs."""
     
@@ -19,7 +52,8 @@ class MolecularGraphFeaturizer:
         self, 
         use_edge_features: bool = True,
         use_3d_coords: bool = False,
-        add_partial_charges: bool = False
+        add_partial_charges: bool = False,
+        vectorized: bool = True
     ):
         """
         Initialize featurizer.
@@ -28,10 +62,13 @@ class MolecularGraphFeaturizer:
             use_edge_features: Whether to include bond features
             use_3d_coords: Whether to generate and include 3D coordinates
             add_partial_charges: Whether to add Gasteiger partial charges as atom features
+            vectorized: Build feature tensors with the NumPy fast path (same values as
+                the per-atom get_atom_features/get_bond_features reference path)
         """
         self.use_edge_features = use_edge_features
         self.use_3d_coords = use_3d_coords
         self.add_partial_charges = add_partial_charges
+        self.vectorized = vectorized
     
     def get_config(self) -> dict:
         """Get featurizer configuration as a dictionary."""
@@ -82,9 +119,8 @@ class MolecularGraphFeaturizer:
         features = []
         
         # Atomic number (one-hot for common elements, else 'other')
-        atomic_nums = [1, 6, 7, 8, 9, 15, 16, 17, 35, 53]  # H, C, N, O, F, P, S, Cl, Br, I
-        features.extend([1 if atom.GetAtomicNum() == x else 0 for x in atomic_nums])
-        features.append(1 if atom.GetAtomicNum() not in atomic_nums else 0)  # Other
+        features.extend([1 if atom.GetAtomicNum() == x else 0 for x in ATOMIC_NUMS])
+        features.append(1 if atom.GetAtomicNum() not in ATOMIC_NUMS else 0)  # Other
         
         # Degree (one-hot: 0-5, >5)
         degree = atom.GetDegree()
@@ -95,15 +131,8 @@ class MolecularGraphFeaturizer:
         features.append(atom.GetFormalCharge())
         
         # Hybridization (one-hot)
-        hybrid_types = [
-            Chem.rdchem.HybridizationType.SP,
-            Chem.rdchem.HybridizationType.SP2,
-            Chem.rdchem.HybridizationType.SP3,
-            Chem.rdchem.HybridizationType.SP3D,
-            Chem.rdchem.HybridizationType.SP3D2
-        ]
-        features.extend([1 if atom.GetHybridization() == ht else 0 for ht in hybrid_types])
-        features.append(1 if atom.GetHybridization() not in hybrid_types else 0)  # Other
+        features.extend([1 if atom.GetHybridization() == ht else 0 for ht in HYBRIDIZATION_TYPES])
+        features.append(1 if atom.GetHybridization() not in HYBRIDIZATION_TYPES else 0)  # Other
         
         # Aromaticity
         features.append(1 if atom.GetIsAromatic() else 0)
@@ -115,12 +144,7 @@ class MolecularGraphFeaturizer:
         
         # Chirality (one-hot)
         try:
-            chiral_types = [
-                Chem.rdchem.ChiralType.CHI_UNSPECIFIED,
-                Chem.rdchem.ChiralType.CHI_TETRAHEDRAL_CW,
-                Chem.rdchem.ChiralType.CHI_TETRAHEDRAL_CCW,
-            ]
-            features.extend([1 if atom.GetChiralTag() == ct else 0 for ct in chiral_types])
+            features.extend([1 if atom.GetChiralTag() == ct else 0 for ct in CHIRAL_TYPES])
         except:
             features.extend([1, 0, 0])
         
@@ -152,13 +176,7 @@ class MolecularGraphFeaturizer:
         features = []
         
         # Bond type (one-hot)
-        bond_types = [
-            Chem.rdchem.BondType.SINGLE,
-            Chem.rdchem.BondType.DOUBLE,
-            Chem.rdchem.BondType.TRIPLE,
-            Chem.rdchem.BondType.AROMATIC
-        ]
-        features.extend([1 if bond.GetBondType() == bt else 0 for bt in bond_types])
+        features.extend([1 if bond.GetBondType() == bt else 0 for bt in BOND_TYPES])
         
         # Conjugation
         features.append(1 if bond.GetIsConjugated() else 0)
@@ -167,16 +185,132 @@ class MolecularGraphFeaturizer:
         features.append(1 if bond.IsInRing() else 0)
         
         # Stereochemistry (one-hot)
-        stereo_types = [
-            Chem.rdchem.BondStereo.STEREONONE,
-            Chem.rdchem.BondStereo.STEREOANY,
-            Chem.rdchem.BondStereo.STEREOZ,
-            Chem.rdchem.BondStereo.STEREOE,
-        ]
-        features.extend([1 if bond.GetStereo() == st else 0 for st in stereo_types])
+        features.extend([1 if bond.GetStereo() == st else 0 for st in BOND_STEREO_TYPES])
         
         return features
     
+    def get_bond_type_id(self, bond: Chem.Bond) -> int:
+        """
+        Get the index of a bond's feature row in get_bond_type_table().
+        
+        Bond features are all one-hot/binary, so each bond maps to one of
+        NUM_BOND_TYPE_IDS distinct rows; models can precompute per-row weights.
+        
+        Args:
+            bond: RDKit Bond object
+            
+        Returns:
+            Bond type id in [0, NUM_BOND_TYPE_IDS)
+        """
+        bond_type = bond.GetBondType()
+        type_idx = BOND_TYPES.index(bond_type) if bond_type in BOND_TYPES else len(BOND_TYPES)
+        stereo = bond.GetStereo()
+        stereo_idx = (BOND_STEREO_TYPES.index(stereo) if stereo in BOND_STEREO_TYPES
+                      else len(BOND_STEREO_TYPES))
+        return _bond_type_id(type_idx, int(bond.GetIsConjugated()), int(bond.IsInRing()), stereo_idx)
+    
+    def _graph_tensors_reference(self, mol: Chem.Mol, partial_charges: Optional[List[float]]) -> Tuple:
+        """Build (x, edge_index, edge_attr, edge_type) one atom/bond at a time via get_*_features."""
+        # Extract atom features
+        atom_features = []
+        for i, atom in enumerate(mol.GetAtoms()):
+            charge = partial_charges[i] if partial_charges else None
+            atom_features.append(self.get_atom_features(atom, partial_charge=charge))
+        x = torch.tensor(atom_features, dtype=torch.float)
+        
+        # Extract bonds and build edge index
+        edge_index = []
+        edge_attr = []
+        edge_type = []
+        
+        for bond in mol.GetBonds():
+            i = bond.GetBeginAtomIdx()
+            j = bond.GetEndAtomIdx()
+            
+            # Add both directions for undirected graph
+            edge_index.append([i, j])
+            edge_index.append([j, i])
+            
+            if self.use_edge_features:
+                bond_features = self.get_bond_features(bond)
+                edge_attr.append(bond_features)
+                edge_attr.append(bond_features)  # Same features for both directions
+                bond_type_id = self.get_bond_type_id(bond)
+                edge_type.extend([bond_type_id, bond_type_id])
+        
+        # Convert to tensors
+        if len(edge_index) > 0:
+            edge_index = torch.tensor(edge_index, dtype=torch.long).t().contiguous()
+        else:
+            edge_index = torch.empty((2, 0), dtype=torch.long)
+        
+        if self.use_edge_features and len(edge_attr) > 0:
+            edge_attr = torch.tensor(edge_attr, dtype=torch.float)
+        else:
+            edge_attr = None
+        
+        # Bond type ids index the rows of get_bond_type_table()
+        edge_type = torch.tensor(edge_type, dtype=torch.long) if self.use_edge_features else None
+        
+        return x, edge_index, edge_attr, edge_type
+    
+    def _graph_tensors_vectorized(self, mol: Chem.Mol, partial_charges: Optional[List[float]]) -> Tuple:
+        """
+        Build (x, edge_index, edge_attr, edge_type) with bit-identical values to
+        _graph_tensors_reference by filling preallocated NumPy arrays.
+        
+        Atom/bond invariants are read in one pass, then one-hot columns are set by
+        fancy indexing through lookup tables instead of per-atom Python lists.
+        """
+        num_atoms = mol.GetNumAtoms()
+        invariants = np.array([
+            (
+                atom.GetAtomicNum(),
+                atom.GetDegree(),
+                atom.GetFormalCharge(),
+                int(atom.GetHybridization()),
+                atom.GetIsAromatic(),
+                atom.GetTotalNumHs(),
+                int(atom.GetChiralTag()),
+            )
+            for atom in mol.GetAtoms()
+        ], dtype=np.int64).reshape(num_atoms, 7)
+        
+        x = np.zeros((num_atoms, self.get_node_dim()), dtype=np.float32)
+        rows = np.arange(num_atoms)
+        x[rows, _lookup(_ATOMIC_NUM_COLUMN, invariants[:, 0], len(ATOMIC_NUMS))] = 1
+        x[rows, 11 + np.minimum(invariants[:, 1], 6)] = 1   # Degree 0-5, >5
+        x[:, 18] = invariants[:, 2]                           # Formal charge
+        x[rows, 19 + _lookup(_HYBRIDIZATION_COLUMN, invariants[:, 3], len(HYBRIDIZATION_TYPES))] = 1
+        x[:, 25] = invariants[:, 4]                           # Aromaticity
+        x[rows, 26 + np.minimum(invariants[:, 5], 5)] = 1   # Number of Hs 0-4, >4
+        chiral = _lookup(_CHIRAL_COLUMN, invariants[:, 6], -1)
+        has_chiral = chiral >= 0
+        x[rows[has_chiral], 32 + chiral[has_chiral]] = 1
+        if self.add_partial_charges:
+            if partial_charges:
+                charges = np.asarray(partial_charges, dtype=np.float64)
+                x[:, 35] = np.where(np.isnan(charges), 0.0, charges)
+        
+        # Bonds: (begin, end, bond type id), both directions interleaved as (i, j), (j, i)
+        bonds = np.array([
+            (bond.GetBeginAtomIdx(), bond.GetEndAtomIdx(), self.get_bond_type_id(bond))
+            for bond in mol.GetBonds()
+        ], dtype=np.int64).reshape(-1, 3)
+        edge_index = np.empty((2, 2 * len(bonds)), dtype=np.int64)
+        edge_index[0, 0::2] = edge_index[1, 1::2] = bonds[:, 0]
+        edge_index[1, 0::2] = edge_index[0, 1::2] = bonds[:, 1]
+        
+        edge_attr = None
+        edge_type = None
+        if self.use_edge_features:
+            bond_type_ids = np.repeat(bonds[:, 2], 2)
+            edge_type = torch.from_numpy(bond_type_ids)
+            if len(bonds) > 0:
+                edge_attr = torch.from_numpy(_BOND_TYPE_ROWS[bond_type_ids])
+        
+        return torch.from_numpy(x), torch.from_numpy(edge_index), edge_attr, edge_type
+    
     def smiles_to_graph(self, smiles: str) -> Optional[Data]:
         """
         Convert SMILES to PyTorch Geometric Data object.
@@ -214,40 +348,10 @@ class MolecularGraphFeaturizer:
                     # Fall back to zero charges if computation fails
                     partial_charges = [0.0] * mol.GetNumAtoms()
             
-            # Extract atom features
-            atom_features = []
-            for i, atom in enumerate(mol.GetAtoms()):
-                charge = partial_charges[i] if partial_charges else None
-                atom_features.append(self.get_atom_features(atom, partial_charge=charge))
-            x = torch.tensor(atom_features, dtype=torch.float)
-            
-            # Extract bonds and build edge index
-            edge_index = []
-            edge_attr = []
-            
-            for bond in mol.GetBonds():
-                i = bond.GetBeginAtomIdx()
-                j = bond.GetEndAtomIdx()
-                
-                # Add both directions for undirected graph
-                edge_index.append([i, j])
-                edge_index.append([j, i])
-                
-                if self.use_edge_features:
-                    bond_features = self.get_bond_features(bond)
-                    edge_attr.append(bond_features)
-                    edge_attr.append(bond_features)  # Same features for both directions
-            
-            # Convert to tensors
-            if len(edge_index) > 0:
-                edge_index = torch.tensor(edge_index, dtype=torch.long).t().contiguous()
+            if self.vectorized:
+                x, edge_index, edge_attr, edge_type = self._graph_tensors_vectorized(mol, partial_charges)
             else:
-                edge_index = torch.empty((2, 0), dtype=torch.long)
-            
-            if self.use_edge_features and len(edge_attr) > 0:
-                edge_attr = torch.tensor(edge_attr, dtype=torch.float)
-            else:
-                edge_attr = None
+                x, edge_index, edge_attr, edge_type = self._graph_tensors_reference(mol, partial_charges)
             
             # 3D coordinates (optional)
             pos = None
@@ -263,6 +367,7 @@ class MolecularGraphFeaturizer:
                 x=x,
                 edge_index=edge_index,
                 edge_attr=edge_attr,
+                edge_type=edge_type,
                 pos=pos
             )
             
@@ -384,6 +489,74 @@ def get_bond_feature_dims() -> dict:
     }
 
 
+def _bond_type_id(type_idx: int, conjugated: int, in_ring: int, stereo_idx: int) -> int:
+    """Mixed-radix bond type id shared by get_bond_type_id and get_bond_type_table."""
+    return ((type_idx * 2 + conjugated) * 2 + in_ring) * (len(BOND_STEREO_TYPES) + 1) + stereo_idx
+
+
+def get_bond_type_table() -> torch.Tensor:
+    """
+    Get the bond feature row for every bond type id.
+    
+    Returns:
+        Float tensor (NUM_BOND_TYPE_IDS, bond feature dim) where row k equals
+        get_bond_features() of any bond whose get_bond_type_id() is k
+    """
+    table = torch.zeros(NUM_BOND_TYPE_IDS, get_bond_feature_dims()['total'])
+    for type_idx in range(len(BOND_TYPES) + 1):
+        for conjugated in (0, 1):
+            for in_ring in (0, 1):
+                for stereo_idx in range(len(BOND_STEREO_TYPES) + 1):
+                    row = table[_bond_type_id(type_idx, conjugated, in_ring, stereo_idx)]
+                    if type_idx < len(BOND_TYPES):
+                        row[type_idx] = 1
+                    row[4] = conjugated
+                    row[5] = in_ring
+                    if stereo_idx < len(BOND_STEREO_TYPES):
+                        row[6 + stereo_idx] = 1
+    return table
+
+
+
+def graph_to_arrays(data: Data) -> dict:
+    """
+    Convert a featurized graph to a dict of NumPy arrays.
+    
+    Compact, pickle-friendly payload for moving graphs between processes.
+    """
+    arrays = {}
+    for key in ('x', 'edge_index', 'edge_attr', 'edge_type', 'pos'):
+        value = getattr(data, key, None)
+        if value is not None:
+            arrays[key] = value.numpy()
+    return arrays
+
+
+def arrays_to_graph(arrays: dict) -> Data:
+    """Rebuild a PyTorch Geometric Data object from graph_to_arrays output (zero-copy)."""
+    return Data(**{key: torch.from_numpy(value) for key, value in arrays.items()})
+
+
+def _column_lut(categories: list, default: int, size: int) -> np.ndarray:
+    """Lookup table from an integer code (atomic number / RDKit enum value) to a one-hot column."""
+    lut = np.full(size, default, dtype=np.int64)
+    for column, category in enumerate(categories):
+        lut[int(category)] = column
+    return lut
+
+
+def _lookup(lut: np.ndarray, codes: np.ndarray, default: int) -> np.ndarray:
+    """Apply a column lookup table, mapping codes beyond the table to `default`."""
+    in_range = codes < len(lut)
+    return np.where(in_range, lut[np.where(in_range, codes, 0)], default)
+
+
+_ATOMIC_NUM_COLUMN = _column_lut(ATOMIC_NUMS, len(ATOMIC_NUMS), 128)
+_HYBRIDIZATION_COLUMN = _column_lut(HYBRIDIZATION_TYPES, len(HYBRIDIZATION_TYPES), 32)
+_CHIRAL_COLUMN = _column_lut(CHIRAL_TYPES, -1, 32)
+_BOND_TYPE_ROWS = get_bond_type_table().numpy()
+
+
 if __name__ == "__main__":
     # Example usage - without partial charges (backwards compatible)
     print("Testing without partial charges:")
@@ -400,6 +573,18 @@ if __name__ == "__main__":
         if graph.edge_attr is not None:
             print(f"Edge feature dimension: {graph.edge_attr.shape[1]}")
     
+    # Vectorized path must match the per-atom reference path exactly
+    reference_featurizer = MolecularGraphFeaturizer(use_edge_features=True, vectorized=False)
+    reference_graph = reference_featurizer.smiles_to_graph(aspirin_smiles)
+    if graph is not None and reference_graph is not None:
+        identical = (
+            torch.equal(graph.x, reference_graph.x)
+            and torch.equal(graph.edge_index, reference_graph.edge_index)
+            and torch.equal(graph.edge_attr, reference_graph.edge_attr)
+            and torch.equal(graph.edge_type, reference_graph.edge_type)
+        )
+        print(f"Vectorized matches reference: {identical}")
+    
     # Test with partial charges
     print("\nTesting with partial charges:")
     featurizer_charges = MolecularGraphFeaturizer(use_edge_features=True, add_partial_charges=True)
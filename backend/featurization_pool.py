@@ -0,0 +1,106 @@
+"""
+Process-pool featurization for large batches.
+
+RDKit parsing and graph construction are pure Python/C++ work that holds the GIL,
+so bulk requests fan them out to worker processes. Workers send back compact NumPy
+payloads (see graph_to_arrays) rather than pickled PyG Data objects. Each task
+names its featurizer configuration, so models featurized differently (e.g. with
+partial charges) share one pool.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import torch
+from rdkit import Chem
+from torch_geometric.data import Data
+
+from featurization import MolecularGraphFeaturizer, arrays_to_graph, graph_to_arrays
+
+# Per-process featurizers by configuration, created on first use
+_worker_featurizers: Dict[Tuple, MolecularGraphFeaturizer] = {}
+
+
+def _init_worker() -> None:
+    # Workers only featurize; keep torch from spawning intra-op threads in each of them
+    torch.set_num_threads(1)
+
+
+def _worker_featurizer(featurizer_config: dict) -> MolecularGraphFeaturizer:
+    key = tuple(sorted(featurizer_config.items()))
+    featurizer = _worker_featurizers.get(key)
+    if featurizer is None:
+        featurizer = _worker_featurizers[key] = MolecularGraphFeaturizer.from_config(featurizer_config)
+    return featurizer
+
+
+def _canonicalize_chunk(smiles_list: List[str]) -> List[Optional[str]]:
+    canonical = []
+    for smiles in smiles_list:
+        mol = Chem.MolFromSmiles(smiles)
+        canonical.append(Chem.MolToSmiles(mol) if mol is not None else None)
+    return canonical
+
+
+def _featurize_chunk(task: Tuple[dict, List[str]]) -> List[Optional[dict]]:
+    featurizer_config, smiles_list = task
+    featurizer = _worker_featurizer(featurizer_config)
+    payloads = []
+    for smiles in smiles_list:
+        graph = featurizer.smiles_to_graph(smiles)
+        payloads.append(graph_to_arrays(graph) if graph is not None else None)
+    return payloads
+
+
+class FeaturizationPool:
+    """ProcessPoolExecutor wrapper for chunked SMILES canonicalization and featurization."""
+    
+    def __init__(self, featurizer_config: dict, max_workers: int, chunk_size: int = 64):
+        """
+        Initialize pool. Worker processes are started lazily on first use.
+        
+        Args:
+            featurizer_config: MolecularGraphFeaturizer.get_config() used when featurize() names none
+            max_workers: Number of worker processes
+            chunk_size: SMILES per task sent to a worker
+        """
+        self.featurizer_config = featurizer_config
+        self.chunk_size = chunk_size
+        # spawn: forking a process that already runs torch/OpenMP threads is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    
+    def _chunks(self, smiles_list: List[str]) -> List[List[str]]:
+        return [
+            smiles_list[i:i + self.chunk_size]
+            for i in range(0, len(smiles_list), self.chunk_size)
+        ]
+    
+    def _map(self, fn, tasks: list) -> list:
+        results = []
+        for chunk_result in self._executor.map(fn, tasks):
+            results.extend(chunk_result)
+        return results
+    
+    def canonicalize(self, smiles_list: List[str]) -> List[Optional[str]]:
+        """RDKit canonical SMILES for each input (None where parsing fails), in input order."""
+        return self._map(_canonicalize_chunk, self._chunks(smiles_list))
+    
+    def featurize(self, smiles_list: List[str],
+                  featurizer_config: Optional[dict] = None) -> List[Optional[Data]]:
+        """
+        Featurized graphs for each input (None where featurization fails), in input order,
+        by the featurizer of `featurizer_config` (default: the pool's).
+        """
+        config = featurizer_config if featurizer_config is not None else self.featurizer_config
+        return [
+            arrays_to_graph(payload) if payload is not None else None
+            for payload in self._map(_featurize_chunk, [(config, chunk) for chunk in self._chunks(smiles_list)])
+        ]
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
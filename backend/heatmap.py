@@ -0,0 +1,361 @@
+"""
+Heatmap rendering for solvent x temperature prediction grids.
+
+Rendering used to build a new seaborn figure, run tight_layout and a tight bbox
+pass for every image. Here the figure for a given row/column layout (axes, tick
+labels, colorbar, margins) is built once and reused: a render only swaps the
+data, colormap/normalization and title, then rasterizes straight to PNG.
+
+Images are content-addressed and rendered lazily by HeatmapStore, so they are
+only drawn when a client actually fetches them.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import BoundaryNorm, ListedColormap, Normalize
+from matplotlib.figure import Figure
+
+from cache import LRUCache
+
+# Clinical View: Discrete 5-color tiers
+# -6.0 to -5.0 : Practically Insoluble (Dark Red)
+# -5.0 to -3.0 : Poorly Soluble (Orange)
+# -3.0 to -1.0 : Moderate (Yellow)
+# -1.0 to 0.5 : Good (Light Green)
+# 0.5 to 1.0+ : Excellent (Dark Green)
+STATIC_BOUNDARIES = [-6.0, -5.0, -3.0, -1.0, 0.5, 1.0]
+STATIC_COLORS = ['#8B0000', '#FF8C00', '#FFD700', '#90EE90', '#006400']
+STATIC_CMAP = ListedColormap(STATIC_COLORS)
+STATIC_NORM = BoundaryNorm(STATIC_BOUNDARIES, STATIC_CMAP.N)
+
+STATIC_TITLE = "Predicted solubility in different solvents across temperature"
+DYNAMIC_TITLE = "Dynamic Heatmap"
+
+HEATMAP_KINDS = ("static", "dynamic")
+
+FIGSIZE = (12, 8)
+DPI = 150
+
+# Longer solvent labels are ellipsized so the margins laid out for them stay sane
+MAX_ROW_LABEL_CHARS = 40
+ELLIPSIS = "\u2026"
+
+
+def ellipsize(text: str, max_chars: int) -> str:
+    """`text` cut to at most `max_chars` characters, ending in an ellipsis if it was cut."""
+    return text if len(text) <= max_chars else text[:max(max_chars - 1, 0)] + ELLIPSIS
+
+
+class HeatmapTemplate:
+    """Pre-laid-out figure for one (row labels, column labels) grid shape."""
+
+    def __init__(self, row_labels: Sequence[str], col_labels: Sequence[str]):
+        n_rows, n_cols = len(row_labels), len(col_labels)
+        self.fig = Figure(figsize=FIGSIZE, dpi=DPI)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.subplots()
+        self._title_width: Optional[float] = None
+
+        self.mesh = self.ax.pcolormesh(np.zeros((n_rows, n_cols)), cmap=STATIC_CMAP, norm=STATIC_NORM)
+        # Same geometry as seaborn: cell centers on half-integers, first row on top, no spines
+        self.ax.set_xlim(0, n_cols)
+        self.ax.set_ylim(n_rows, 0)
+        self.ax.set_xticks(np.arange(n_cols) + 0.5, labels=col_labels)
+        self.ax.set_yticks(np.arange(n_rows) + 0.5, rotation=0, va='center',
+                           labels=[ellipsize(label, MAX_ROW_LABEL_CHARS) for label in row_labels])
+        for spine in self.ax.spines.values():
+            spine.set_visible(False)
+
+        self.colorbar = self.fig.colorbar(self.mesh, ax=self.ax)
+        self.colorbar.set_label('Predicted LogS (mol/L)')
+        self.colorbar.outline.set_linewidth(0)
+
+        self.ax.set_xlabel("Temperature (K)", fontsize=12, fontweight='bold')
+        self.ax.set_ylabel("Solvent", fontsize=12, fontweight='bold')
+
+        # Lay out once against a representative two-line title; renders reuse the margins
+        self._set_title(STATIC_TITLE, "X" * 40)
+        self.fig.tight_layout()
+        # Titles are centred over the axes: they fit within twice the distance to the nearer figure edge
+        self._renderer = self.fig.canvas.get_renderer()
+        box = self.ax.get_position()
+        center = (box.x0 + box.x1) / 2
+        self._title_width = 2 * min(center, 1 - center) * self.fig.bbox.width
+
+    def close(self) -> None:
+        """Release the figure's artists (an evicted template is never drawn again)."""
+        self.fig.clear()
+
+    def _set_title(self, heading: str, solute_display: str) -> None:
+        """Set the two-line title, ellipsizing the solute so the title fits the figure width."""
+        title = self.ax.set_title(f"{heading}\nSolute: {solute_display}", fontsize=14, fontweight='bold', pad=20)
+        if self._title_width is None or title.get_window_extent(self._renderer).width <= self._title_width:
+            return
+        # Longest prefix that fits (bisection over the measured text width)
+        low, high = 0, len(solute_display) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            title.set_text(f"{heading}\nSolute: {ellipsize(solute_display, middle + 1)}")
+            if title.get_window_extent(self._renderer).width <= self._title_width:
+                low = middle
+            else:
+                high = middle - 1
+        title.set_text(f"{heading}\nSolute: {ellipsize(solute_display, low + 1)}")
+
+    def _to_png(self) -> bytes:
+        buffer = BytesIO()
+        self.fig.savefig(buffer, format='png', dpi=DPI)
+        return buffer.getvalue()
+
+    def render(self, data: np.ndarray, solute_display: str,
+               kinds: Sequence[str] = HEATMAP_KINDS) -> Dict[str, bytes]:
+        """
+        Render the static (clinical tiers) and/or dynamic (blue-white-red) heatmaps.
+
+        The data is loaded into the mesh once; only colormap, normalization and
+        title change between the two images.
+
+        Returns:
+            PNG bytes keyed by kind ("static", "dynamic")
+        """
+        self.mesh.set_array(data)
+        images = {}
+
+        if "static" in kinds:
+            # Fixed -6 to +1 tiers with black cell borders
+            self.mesh.set_cmap(STATIC_CMAP)
+            self.mesh.set_norm(STATIC_NORM)
+            self.mesh.set_edgecolor('black')
+            self.mesh.set_linewidth(0.5)
+            self.colorbar.update_normal(self.mesh)
+            self.colorbar.set_ticks(STATIC_BOUNDARIES)
+            self._set_title(STATIC_TITLE, solute_display)
+            images["static"] = self._to_png()
+
+        if "dynamic" in kinds:
+            # bwr scaled to the data range (centered on its midpoint)
+            self.mesh.set_cmap("bwr")
+            self.mesh.set_norm(Normalize(vmin=float(data.min()), vmax=float(data.max())))
+            self.mesh.set_edgecolor('face')
+            self.mesh.set_linewidth(0)
+            self.colorbar.update_normal(self.mesh)
+            self._set_title(DYNAMIC_TITLE, solute_display)
+            images["dynamic"] = self._to_png()
+
+        return images
+
+
+class HeatmapRenderer:
+    """
+    Thread-safe pool of HeatmapTemplates keyed by layout.
+
+    Each render checks out a template for its layout (building one only if all
+    are busy) and returns it afterwards, so concurrent render threads never share
+    a figure and a layout is only built as many times as it is rendered concurrently.
+    Idle templates are kept for the `max_layouts` most recently rendered layouts;
+    user-defined panels add layouts, and older ones are closed and rebuilt on demand.
+    """
+
+    def __init__(self, max_layouts: int = 16):
+        self.max_layouts = max_layouts
+        self._free: "OrderedDict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[HeatmapTemplate]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _acquire(self, key) -> HeatmapTemplate:
+        with self._lock:
+            templates = self._free.get(key)
+            if templates:
+                return templates.pop()
+        return HeatmapTemplate(*key)
+
+    def _release(self, key, template: HeatmapTemplate) -> None:
+        with self._lock:
+            self._free.setdefault(key, []).append(template)
+            self._free.move_to_end(key)
+            evicted = []
+            while len(self._free) > self.max_layouts:
+                _, templates = self._free.popitem(last=False)
+                evicted.extend(templates)
+                self.evictions += 1
+        for old in evicted:
+            old.close()
+
+    def warm(self, row_labels: Sequence[str], col_labels: Sequence[str]) -> None:
+        """Pre-build a template for a layout (e.g. the solvent registry) ahead of traffic."""
+        key = (tuple(row_labels), tuple(str(c) for c in col_labels))
+        self._release(key, self._acquire(key))
+
+    def render(self, row_labels: Sequence[str], col_labels: Sequence[str],
+               data: np.ndarray, solute_display: str,
+               kinds: Sequence[str] = HEATMAP_KINDS) -> Dict[str, bytes]:
+        """Render heatmaps of a rows x columns matrix as PNG bytes keyed by kind."""
+        key = (tuple(row_labels), tuple(str(c) for c in col_labels))
+        template = self._acquire(key)
+        try:
+            return template.render(np.asarray(data, dtype=float), solute_display, kinds)
+        finally:
+            self._release(key, template)
+
+
+class HeatmapSpec:
+    """Everything needed to render one solute's heatmaps later."""
+
+    __slots__ = ('row_labels', 'col_labels', 'data', 'solute_display')
+
+    def __init__(self, row_labels: Sequence[str], col_labels: Sequence[str],
+                 data: np.ndarray, solute_display: str):
+        self.row_labels = tuple(row_labels)
+        self.col_labels = tuple(str(c) for c in col_labels)
+        self.data = np.ascontiguousarray(data, dtype=np.float64)
+        self.solute_display = solute_display
+
+    @property
+    def nbytes(self) -> int:
+        labels = sum(len(label) for label in self.row_labels + self.col_labels)
+        return self.data.nbytes + labels + len(self.solute_display)
+
+    def to_dict(self) -> dict:
+        return {
+            'row_labels': self.row_labels, 'col_labels': self.col_labels,
+            'data': self.data.tolist(), 'solute_display': self.solute_display,
+        }
+
+    @classmethod
+    def from_dict(cls, fields: dict) -> "HeatmapSpec":
+        return cls(fields['row_labels'], fields['col_labels'], np.array(fields['data']), fields['solute_display'])
+
+    def image_id(self, kind: str) -> str:
+        """Content address of the image this spec renders to for `kind`."""
+        digest = hashlib.sha256()
+        for part in (kind, self.solute_display, *self.row_labels, "|", *self.col_labels):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")
+        digest.update(self.data.tobytes())
+        return digest.hexdigest()[:32]
+
+
+class HeatmapStore:
+    """
+    Content-addressed heatmap images, rendered lazily on first request.
+
+    register() only records the spec and returns image ids (hashes of everything
+    that determines the pixels), so /solvents never pays for rendering. get_png()
+    renders on first access, together with the spec's other registered kinds, and
+    keeps the PNGs in a byte-bounded LRU; the same ids always map to the same
+    bytes, which makes them safe to cache as immutable.
+
+    With `spec_dir`, specs are also written to a directory shared by several
+    server processes, so any of them can render an image another one registered.
+    """
+
+    def __init__(self, renderer: HeatmapRenderer, max_bytes: int,
+                 spec_dir: Optional[str] = None, spec_ttl_s: float = 86400.0):
+        """
+        Args:
+            renderer: Template pool used for rendering
+            max_bytes: Memory budget for rendered PNGs (specs get an eighth of it)
+            spec_dir: Optional directory for specs shared between processes
+            spec_ttl_s: Age after which unused shared spec files are pruned
+        """
+        self.renderer = renderer
+        self._specs = LRUCache(max_bytes // 8, sizeof=lambda entry: entry[0].nbytes)
+        self._pngs = LRUCache(max_bytes, sizeof=len)
+        self.spec_dir = spec_dir
+        self.spec_ttl_s = spec_ttl_s
+        self._registrations = 0
+        if spec_dir is not None:
+            os.makedirs(spec_dir, exist_ok=True)
+
+    def _spec_path(self, image_id: str) -> str:
+        return os.path.join(self.spec_dir, f"{image_id}.json")
+
+    def _share(self, image_id: str, spec: HeatmapSpec, kind: str) -> None:
+        path = self._spec_path(image_id)
+        if os.path.exists(path):
+            os.utime(path)
+            return
+        # Unique per process and thread: render threads may share the same spec concurrently
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'kind': kind, 'spec': spec.to_dict()}, f)
+        os.replace(tmp_path, path)
+
+    def _load_shared(self, image_id: str) -> Optional[Tuple[HeatmapSpec, str]]:
+        # Ids are hex digests; anything else cannot name a spec file
+        if self.spec_dir is None or not image_id or not all(c in "0123456789abcdef" for c in image_id):
+            return None
+        try:
+            with open(self._spec_path(image_id)) as f:
+                fields = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return HeatmapSpec.from_dict(fields['spec']), fields['kind']
+
+    def _prune_shared(self) -> None:
+        cutoff = time.time() - self.spec_ttl_s
+        for filename in os.listdir(self.spec_dir):
+            path = os.path.join(self.spec_dir, filename)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def register(self, spec: HeatmapSpec, kinds: Sequence[str]) -> Dict[str, str]:
+        """Record a spec and return its image id for each requested kind."""
+        ids = {}
+        for kind in kinds:
+            image_id = spec.image_id(kind)
+            self._specs.put(image_id, (spec, kind))
+            if self.spec_dir is not None:
+                self._share(image_id, spec, kind)
+            ids[kind] = image_id
+        if self.spec_dir is not None:
+            self._registrations += 1
+            if self._registrations % 1000 == 0:
+                self._prune_shared()
+        return ids
+
+    def get_png(self, image_id: str) -> Optional[bytes]:
+        """PNG bytes for an image id, rendering it if needed; None if the id is unknown/evicted."""
+        png = self._pngs.get(image_id)
+        if png is not None:
+            return png
+        entry = self._specs.get(image_id)
+        if entry is None:
+            entry = self._load_shared(image_id)
+        if entry is None:
+            return None
+        spec, kind = entry
+        # Render every registered kind of the spec in one pass: the data is loaded into
+        # the figure once and the sibling image is usually fetched right after
+        ids = {kind: image_id}
+        for other in HEATMAP_KINDS:
+            if other != kind:
+                other_id = spec.image_id(other)
+                if self._registered(other_id) and other_id not in self._pngs:
+                    ids[other] = other_id
+        pngs = self.renderer.render(
+            spec.row_labels, spec.col_labels, spec.data, spec.solute_display, kinds=tuple(ids)
+        )
+        for other, other_id in ids.items():
+            self._pngs.put(other_id, pngs[other])
+        return pngs[kind]
+
+    def _registered(self, image_id: str) -> bool:
+        if image_id in self._specs:
+            return True
+        return self.spec_dir is not None and os.path.exists(self._spec_path(image_id))
+
+    def stats(self) -> dict:
+        return {'specs': self._specs.stats(), 'images': self._pngs.stats()}
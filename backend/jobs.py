@@ -0,0 +1,306 @@
+"""
+Asynchronous scoring jobs for screening runs too large for one HTTP request.
+
+Each job owns a directory holding its uploaded input and one NDJSON file per
+completed chunk; job metadata and progress live in a small SQLite database next
+to them. A single background thread processes queued jobs chunk by chunk and
+records every completed chunk, so a job interrupted by a restart resumes from
+the last completed chunk instead of starting over.
+"""
+
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from bulk_io import iter_upload_chunks
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+
+_COLUMNS = (
+    "id", "status", "created_at", "started_at", "resumed_at", "finished_at",
+    "file_format", "chunk_size", "solvents", "temperatures", "model", "panel_id",
+    "input_rows", "total_rows", "rows_done", "rows_at_resume", "chunks_done", "error",
+)
+
+
+def count_input_rows(path: str, file_format: str) -> int:
+    """Number of data rows in an uploaded CSV/Parquet file."""
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+class JobStore:
+    """On-disk job queue: SQLite metadata plus a directory of chunk files per job."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open (or re-open after fork) this process's connection."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(os.path.join(self.root, "jobs.sqlite"), check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL,"
+                " started_at REAL, resumed_at REAL, finished_at REAL,"
+                " file_format TEXT NOT NULL, chunk_size INTEGER NOT NULL,"
+                " solvents TEXT, temperatures TEXT,"
+                " input_rows INTEGER, total_rows INTEGER,"
+                " rows_done INTEGER NOT NULL DEFAULT 0, rows_at_resume INTEGER NOT NULL DEFAULT 0,"
+                " chunks_done INTEGER NOT NULL DEFAULT 0, error TEXT, model TEXT, panel_id TEXT)"
+            )
+            # Queues created before jobs named their model and panel
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+            for column in ("model", "panel_id"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def input_path(self, job: Dict[str, Any]) -> str:
+        return os.path.join(self.job_dir(job["id"]), f"input.{job['file_format']}")
+
+    def chunk_path(self, job_id: str, index: int) -> str:
+        return os.path.join(self.job_dir(job_id), "chunks", f"{index:06d}.ndjson")
+
+    def create(self, upload, file_format: str, chunk_size: int,
+               solvents: Optional[List[str]] = None,
+               temperatures: Optional[List[float]] = None,
+               model: Optional[str] = None,
+               panel_id: Optional[str] = None) -> str:
+        """
+        Copy an uploaded file into a new job directory and queue it.
+
+        Args:
+            upload: Binary file object with the CSV/Parquet input
+            file_format: "csv" or "parquet"
+            chunk_size: Input rows scored per checkpointed chunk
+            solvents: If given, every input row's solute is scored against each of these
+                      solvent SMILES (library mode); otherwise rows carry their own solvent
+            temperatures: Temperatures (K) crossed with `solvents` in library mode
+            model: Name of the model scoring the job (None: the default model)
+            panel_id: Panel `solvents` were taken from, so the model scores them from its
+                      pinned panel encodings
+        """
+        job_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.job_dir(job_id), "chunks"))
+        job = {"id": job_id, "file_format": file_format}
+        with open(self.input_path(job), "wb") as f:
+            shutil.copyfileobj(upload, f, 1 << 20)
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, file_format, chunk_size, solvents, temperatures,"
+                " model, panel_id) VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, time.time(), file_format, chunk_size,
+                 json.dumps(solvents) if solvents is not None else None,
+                 json.dumps(temperatures) if temperatures is not None else None,
+                 model, panel_id)
+            )
+            conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["solvents"] = json.loads(job["solvents"]) if job["solvents"] else None
+        job["temperatures"] = json.loads(job["temperatures"]) if job["temperatures"] else None
+        return job
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        assert all(name in _COLUMNS for name in fields)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            conn.commit()
+
+    def next_queued(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+        return self.get(row["id"]) if row is not None else None
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs left 'running' by a previous process back in the queue."""
+        with self._lock:
+            conn = self._connection()
+            count = conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+            conn.commit()
+        return count
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            conn.commit()
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def iter_results(self, job_id: str, start: int, stop: int) -> Iterator[bytes]:
+        """Contents of chunk files [start, stop), in order."""
+        for index in range(start, stop):
+            with open(self.chunk_path(job_id, index), "rb") as f:
+                yield from iter(lambda: f.read(1 << 20), b"")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+def job_progress(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job: status, progress, throughput of the current run and ETA."""
+    total, done = job["total_rows"], job["rows_done"]
+    throughput = eta = None
+    if job["status"] == "running" and job["resumed_at"]:
+        elapsed = time.time() - job["resumed_at"]
+        if elapsed > 0 and done > job["rows_at_resume"]:
+            throughput = (done - job["rows_at_resume"]) / elapsed
+            if total is not None:
+                eta = max(total - done, 0) / throughput
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "model": job["model"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "total_rows": total,
+        "rows_done": done,
+        "chunks_done": job["chunks_done"],
+        "progress": done / total if total else (1.0 if job["status"] == "completed" else 0.0),
+        "throughput_rows_per_s": throughput,
+        "eta_s": eta,
+        "error": job["error"],
+    }
+
+
+class JobRunner:
+    """Background thread that works through queued jobs one checkpointed chunk at a time."""
+
+    def __init__(self, store: JobStore,
+                 score_rows: Callable[[List[Dict[str, Any]], Optional[str]], List[Dict[str, Any]]],
+                 score_library: Callable[[List[Dict[str, Any]], List[str], List[float], Optional[str],
+                                          Optional[str]], List[Dict[str, Any]]]):
+        """
+        Args:
+            store: Job queue and result storage
+            score_rows: Blocking scorer for bulk records (see bulk_io.parse_row) with the job's
+                        model name, returning them scored
+            score_library: Blocking scorer crossing records' solutes with solvents x temperatures
+                           (library mode) with the job's panel id and model name, returning one
+                           scored record per combination
+        """
+        self.store = store
+        self.score_rows = score_rows
+        self.score_library = score_library
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            resumed = self.store.requeue_interrupted()
+            if resumed:
+                print(f"[INFO] Resuming {resumed} interrupted job(s)")
+            self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+            self._thread.start()
+
+    def wake(self) -> None:
+        """Signal that a job was queued."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop after the current chunk; an unfinished job stays resumable."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            job = self.store.next_queued()
+            if job is None:
+                self._wake.wait(5.0)
+                self._wake.clear()
+                continue
+            try:
+                self._run(job)
+            except Exception as e:
+                if self._stopping.is_set():
+                    break  # chunk cut short by shutdown: left 'running', requeued on next start
+                print(f"[ERROR] Job {job['id']} failed: {e}")
+                self.store.update(job["id"], status="failed", error=str(e), finished_at=time.time())
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        now = time.time()
+        fields = {"status": "running", "resumed_at": now, "rows_at_resume": job["rows_done"]}
+        if job["started_at"] is None:
+            fields["started_at"] = now
+        if job["input_rows"] is None:
+            input_rows = count_input_rows(self.store.input_path(job), job["file_format"])
+            per_row = len(job["solvents"]) * len(job["temperatures"]) if job["solvents"] is not None else 1
+            fields.update(input_rows=input_rows, total_rows=input_rows * per_row)
+        self.store.update(job_id, **fields)
+
+        rows_done = job["rows_done"]
+        with open(self.store.input_path(job), "rb") as f:
+            chunks = iter_upload_chunks(f, job["file_format"], job["chunk_size"])
+            for index, chunk in enumerate(chunks):
+                if index < job["chunks_done"]:
+                    continue  # completed before an interruption
+                if self._stopping.is_set():
+                    return  # left 'running'; requeued on next start
+                current = self.store.get(job_id)
+                if current is None or current["status"] == "cancelled":
+                    self.store.delete(job_id)
+                    return
+
+                if job["solvents"] is None:
+                    scored = self.score_rows(chunk, job["model"])
+                else:
+                    scored = self.score_library(
+                        chunk, job["solvents"], job["temperatures"], job["panel_id"], job["model"]
+                    )
+
+                # Write then rename, so a chunk file is either complete or absent
+                path = self.store.chunk_path(job_id, index)
+                with open(path + ".tmp", "w") as out:
+                    out.write("".join(json.dumps(row) + "\n" for row in scored))
+                os.replace(path + ".tmp", path)
+                rows_done += len(scored)
+                self.store.update(job_id, chunks_done=index + 1, rows_done=rows_done)
+
+        current = self.store.get(job_id)
+        if current is not None and current["status"] == "cancelled":
+            self.store.delete(job_id)
+        else:
+            self.store.update(job_id, status="completed", finished_at=time.time())
@@ -3,11 +3,24 @@ FastAPI Backend for Solubility Prediction Model
 
 Endpoints:
 - POST /predict: Batch prediction for solute-solvent pairs
+- POST /predict/stream: Bulk scoring of a CSV/Parquet upload, streamed back as NDJSON
+- POST /jobs, GET /jobs/{job_id}, GET /jobs/{job_id}/results: Resumable background scoring jobs
+- POST /matrix: Solutes x solvents x temperatures screening as a dense array
+- POST/GET/DELETE /panels: Named solvent panels, pre-encoded at registration
 - POST /solvents: Solvent ranking and heatmap generation for a given solute
+- GET /heatmaps/{image_id}: Heatmap PNGs referenced by /solvents responses
 - GET /health: Health check
 """
 
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sqlite3
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Utilities (featurization, mpnn) are now local to the backend directory
@@ -15,26 +28,136 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 import torch
 import numpy as np
-from typing import List, Optional, Dict, Any, Tuple
-from fastapi import FastAPI, HTTPException
+from typing import List, Optional, Dict, Any, Tuple, Literal
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 from torch_geometric.data import Batch
 from rdkit import Chem
 
-from featurization import MolecularGraphFeaturizer
-from mpnn import SolubilityModel, get_model_params
+from featurization import MolecularGraphFeaturizer, get_bond_type_table
+from cache import EncodedMolecule, EncoderStateCache
+from batching import MicroBatcher, SingleFlight
+from bulk_io import detect_format, iter_upload_chunks
+from jobs import JobRunner, JobStore, job_progress
+from panels import PanelRegistry, SolventPanel
+from embedding_store import EmbeddingStore
+from engines import InferenceEngine, check_parity, create_engine
+from executors import BoundedExecutor
+from featurization_pool import FeaturizationPool
+from heatmap import HeatmapRenderer, HeatmapSpec, HeatmapStore
+from model_artifact import artifact_is_current, load_artifact, read_artifact_meta
+from model_registry import ModelRegistry, UnknownModelError
+from result_store import ResultStore, checkpoint_fingerprint
+from scheduling import plan_batches
+from mpnn import MODEL_PARAMS_WITH_CHARGES, SolubilityModel, infer_model_params
 
 # ============================================================================
 # Configuration
 # ============================================================================
 
 CHECKPOINT_PATH = Path(__file__).parent / "experiments/solubility_20251203_140814/checkpoint_best.pt"
+# Inference-only export of the checkpoint written by export_model.py, used when current (empty disables)
+MODEL_ARTIFACT_DIR = os.environ.get("SOL_MODEL_ARTIFACT_DIR", str(Path(__file__).parent / "model_artifact"))
+# Other checkpoints (<dir>/<name>/checkpoint_best.pt) served by name via the optional `model` request
+# field; they load on first use and the least recently used are dropped past the per-process budget
+MODELS_DIR = os.environ.get("SOL_MODELS_DIR", str(CHECKPOINT_PATH.parent.parent))
+MODEL_MEMORY_MAX_BYTES = int(os.environ.get("SOL_MODEL_MEMORY_MB", "1024")) * 1024 * 1024
+# Encoder cache budget of each non-default model (the default one uses SOL_ENCODER_CACHE_MB)
+MODEL_ENCODER_CACHE_MAX_BYTES = int(os.environ.get("SOL_MODEL_ENCODER_CACHE_MB", "64")) * 1024 * 1024
 TARGET_MEAN = -0.9832843100207638
 TARGET_STD = 1.2159083883491026
 TEMP_MIN = 243.15  # K
 TEMP_MAX = 425.77  # K
 
-# Predefined solvents for ranking/heatmap (top 20 by training frequency)
+# Solute-solvent interaction kernel: "segment" (padding-free) or "dense" (padded bmm)
+INTERACTION_KERNEL = os.environ.get("SOL_INTERACTION_KERNEL", "segment")
+
+# Inference engine: "eager", "compile" (torch.compile) or "onnx" (ONNX Runtime, CPU). A non-eager
+# engine is used only if it matches eager within SOL_ENGINE_TOLERANCE (LogS) at startup
+INFERENCE_ENGINE = os.environ.get("SOL_ENGINE", "eager")
+ENGINE_TOLERANCE = float(os.environ.get("SOL_ENGINE_TOLERANCE", "1e-3"))
+COMPILE_BACKEND = os.environ.get("SOL_COMPILE_BACKEND", "inductor")
+
+# Numeric precision: "fp32", "int8" (dynamic quantization, CPU) or "bf16" (autocast). A reduced
+# precision is used only if it stays within SOL_PRECISION_TOLERANCE (LogS) of fp32 at startup;
+# see precision_report.py for its accuracy and speed on a reference set
+PRECISION = os.environ.get("SOL_PRECISION", "fp32")
+PRECISION_TOLERANCE = float(os.environ.get("SOL_PRECISION_TOLERANCE", "0.05"))
+
+# /predict?uncertainty=true: stochastic (MC dropout) head passes per model, 0 for deterministic heads;
+# extra checkpoints (comma-separated) that form an ensemble with the serving model
+MC_DROPOUT_SAMPLES = int(os.environ.get("SOL_MC_SAMPLES", "32"))
+ENSEMBLE_CHECKPOINTS = [path.strip() for path in os.environ.get("SOL_ENSEMBLE_CHECKPOINTS", "").split(",") if path.strip()]
+
+# Sub-batch budgets for size-bucketed inference (bound peak memory on large uploads)
+MAX_ATOMS_PER_BATCH = int(os.environ.get("SOL_MAX_ATOMS_PER_BATCH", "20000"))
+MAX_EDGES_PER_BATCH = int(os.environ.get("SOL_MAX_EDGES_PER_BATCH", "40000"))
+# Solute atom x solvent atom entries per interaction sub-batch
+MAX_INTERACTIONS_PER_BATCH = int(os.environ.get("SOL_MAX_INTERACTIONS_PER_BATCH", "250000"))
+
+# Process-pool featurization for bulk requests (0 workers disables the pool)
+FEATURIZE_POOL_WORKERS = int(os.environ.get("SOL_FEATURIZE_WORKERS", str(os.cpu_count() or 1)))
+FEATURIZE_POOL_THRESHOLD = int(os.environ.get("SOL_FEATURIZE_POOL_THRESHOLD", "256"))
+
+# Dedicated pools for blocking work; requests beyond workers + queue get a fast 503
+INFERENCE_WORKERS = int(os.environ.get("SOL_INFERENCE_WORKERS", "2"))
+INFERENCE_QUEUE = int(os.environ.get("SOL_INFERENCE_QUEUE", "32"))
+RENDER_WORKERS = int(os.environ.get("SOL_RENDER_WORKERS", "2"))
+RENDER_QUEUE = int(os.environ.get("SOL_RENDER_QUEUE", "16"))
+
+# Cross-request micro-batching for /predict
+PREDICT_MAX_BATCH_SIZE = int(os.environ.get("SOL_PREDICT_MAX_BATCH_SIZE", "256"))
+PREDICT_MAX_WAIT_MS = float(os.environ.get("SOL_PREDICT_MAX_WAIT_MS", "5"))
+
+# Rows scored per chunk by /predict/stream (one inference call, one NDJSON flush)
+BULK_CHUNK_ROWS = int(os.environ.get("SOL_BULK_CHUNK_ROWS", "1024"))
+
+# /matrix limits: total cells per request, and solute-solvent pairs interacted per chunk
+MATRIX_MAX_CELLS = int(os.environ.get("SOL_MATRIX_MAX_CELLS", "5000000"))
+MATRIX_PAIRS_PER_CHUNK = int(os.environ.get("SOL_MATRIX_PAIRS_PER_CHUNK", "4096"))
+
+# Memory budget for lazily rendered heatmap PNGs served from /heatmaps/{image_id}
+HEATMAP_CACHE_MAX_BYTES = int(os.environ.get("SOL_HEATMAP_CACHE_MB", "64")) * 1024 * 1024
+# Heatmap layouts (solvent rows x temperature columns) whose pre-built figures are kept for reuse
+HEATMAP_MAX_LAYOUTS = int(os.environ.get("SOL_HEATMAP_LAYOUTS", "16"))
+# Directory shared by worker processes so any of them can serve any heatmap id (empty: per process)
+HEATMAP_SPEC_DIR = os.environ.get("SOL_HEATMAP_SPEC_DIR", "")
+
+# Memory budget for cached featurized graphs + encoder states (shared by solutes and solvents)
+ENCODER_CACHE_MAX_BYTES = int(os.environ.get("SOL_ENCODER_CACHE_MB", "256")) * 1024 * 1024
+
+# On-disk prediction results keyed by checkpoint, survive restarts (empty path disables)
+DATA_DIR = Path(os.environ.get("SOL_DATA_DIR", str(Path(__file__).parent / "data")))
+RESULT_STORE_PATH = os.environ.get("SOL_RESULT_STORE_PATH", str(DATA_DIR / "results.sqlite"))
+RESULT_STORE_MAX_BYTES = int(os.environ.get("SOL_RESULT_STORE_MB", "512")) * 1024 * 1024
+RESULT_STORE_WARM_ROWS = int(os.environ.get("SOL_RESULT_STORE_WARM_ROWS", "100000"))
+
+# Background scoring jobs: queue, inputs and checkpointed result chunks (under SOL_DATA_DIR);
+# with several worker processes only the one started with SOL_RUN_JOBS=1 processes the queue
+JOBS_DIR = Path(os.environ.get("SOL_JOBS_DIR", str(DATA_DIR / "jobs")))
+JOB_CHUNK_ROWS = int(os.environ.get("SOL_JOB_CHUNK_ROWS", "4096"))
+RUN_JOBS = os.environ.get("SOL_RUN_JOBS", "1") == "1"
+
+# Exported ONNX graphs, one directory per checkpoint
+ENGINES_DIR = Path(os.environ.get("SOL_ENGINES_DIR", str(DATA_DIR / "engines")))
+
+# Precomputed solute encoder states written by build_embeddings.py (memory-mapped, shared by workers)
+EMBEDDINGS_DIR = Path(os.environ.get("SOL_EMBEDDINGS_DIR", str(DATA_DIR / "embeddings")))
+
+# Solvent panels: definitions and encodings persisted here; size cap per panel;
+# panels longer than SOL_HEATMAP_MAX_SOLVENTS get rankings/grid data but no heatmap images
+PANELS_DIR = Path(os.environ.get("SOL_PANELS_DIR", str(DATA_DIR / "panels")))
+PANEL_MAX_SOLVENTS = int(os.environ.get("SOL_PANEL_MAX_SOLVENTS", "10000"))
+HEATMAP_MAX_SOLVENTS = int(os.environ.get("SOL_HEATMAP_MAX_SOLVENTS", "60"))
+DEFAULT_PANEL = "registry"
+
+# Temperature range for heatmap (250K to 450K at 10K intervals) and ranking temperature
+HEATMAP_TEMPERATURES = list(range(250, 451, 10))  # [250, 260, ..., 450]
+RANKING_TEMPERATURE = 298.15  # K
+
+# Predefined solvents for ranking/heatmap (top 20 by training frequency); the default panel
 SOLVENT_REGISTRY = {
     "n-hexane (ε = 1.88)": "CCCCCC",
     "1,4-dioxane (ε = 2.25)": "C1COCCO1",
@@ -58,6 +181,9 @@ SOLVENT_REGISTRY = {
     "water (ε = 78.4)": "O",
 }
 
+# Synthetic solutes run against the registry at startup, before /health reports ready
+WARMUP_SOLUTES = ["CC(=O)Oc1ccccc1C(=O)O", "Cn1cnc2c1c(=O)n(C)c(=O)n2C", "c1ccc2ccccc2c1", "OCC(O)CO"]
+
 # ============================================================================
 # Pydantic Models
 # ============================================================================
@@ -67,6 +193,7 @@ class PredictionRequest(BaseModel):
     solute_smiles: str = Field(..., description="SMILES string of the solute")
     solvent_smiles: str = Field(..., description="SMILES string of the solvent")
     temperature_k: float = Field(..., description="Temperature in Kelvin", ge=0)
+    model: Optional[str] = Field(None, description="Model name (see /models); the default model if omitted")
     
     @field_validator('temperature_k')
     @classmethod
@@ -82,12 +209,20 @@ class PredictionResponse(BaseModel):
     predicted_logs: float
     temperature_k: float
     warning: Optional[str] = None
+    predicted_logs_mean: Optional[float] = Field(None, description="Mean of the MC dropout / ensemble samples (uncertainty mode)")
+    predicted_logs_std: Optional[float] = Field(None, description="Standard deviation of the samples (uncertainty mode)")
+    temperature_extrapolation_k: float = Field(0.0, description="Kelvin outside the training temperature range (0 inside)")
 
 
 class AnalysisRequest(BaseModel):
     """Solvent ranking/heatmap request"""
     solute_smiles: str = Field(..., description="SMILES string of the solute")
     solute_name: Optional[str] = Field(None, description="Optional name of the solute for display")
+    images: Literal["none", "static", "dynamic", "both"] = Field(
+        "both", description="Heatmap images to make available via /heatmaps/{image_id}"
+    )
+    panel_id: str = Field(DEFAULT_PANEL, description="Solvent panel to rank against (see /panels)")
+    model: Optional[str] = Field(None, description="Model name (see /models); the default model if omitted")
 
 
 class SolventRanking(BaseModel):
@@ -104,12 +239,63 @@ class AnalysisResponse(BaseModel):
     solute_name: Optional[str]
     ranking_temperature_k: float = Field(..., description="Temperature at which rankings were calculated")
     rankings: List[SolventRanking]
-    static_heatmap_base64: str = Field(..., description="Base64 PNG static heatmap (Red-to-Green, 5 clinical tiers)")
-    dynamic_heatmap_base64: str = Field(..., description="Base64 PNG dynamic heatmap (Blue-White-Red)")
+    static_heatmap_url: Optional[str] = Field(None, description="URL of the PNG static heatmap (Red-to-Green, 5 clinical tiers)")
+    dynamic_heatmap_url: Optional[str] = Field(None, description="URL of the PNG dynamic heatmap (Blue-White-Red)")
     temperatures: List[int] = Field(..., description="List of temperatures used for the heatmap")
     heatmap_data: List[Dict[str, Any]] = Field(..., description="Raw prediction data formatted for ag-grid")
 
 
+class MatrixRequest(BaseModel):
+    """Solutes x solvents x temperatures screening request"""
+    solute_smiles: List[str] = Field(..., min_length=1, description="SMILES strings of the solutes")
+    solvent_smiles: Optional[List[str]] = Field(None, description="SMILES strings of the solvents")
+    panel_id: Optional[str] = Field(
+        None, description='Solvent panel used instead of solvent_smiles ("registry": the 20 predefined solvents)'
+    )
+    model: Optional[str] = Field(None, description="Model name (see /models); the default model if omitted")
+    temperatures_k: List[float] = Field(
+        default_factory=lambda: [RANKING_TEMPERATURE], min_length=1, description="Temperatures in Kelvin"
+    )
+    encoding: Literal["base64", "list"] = Field(
+        "base64", description="base64: little-endian float32 C-order array in data_base64; list: nested lists in data"
+    )
+
+
+class MatrixResponse(BaseModel):
+    """Dense LogS array indexed [solute, solvent, temperature]; NaN (null in lists) where no prediction"""
+    shape: List[int]
+    dtype: str = "float32"
+    data_base64: Optional[str] = None
+    data: Optional[List[List[List[Optional[float]]]]] = None
+    solute_smiles: List[str]
+    solvent_smiles: List[str]
+    solvent_names: Optional[List[str]] = Field(None, description="Display names when a panel was used")
+    temperatures_k: List[float]
+    failed_solutes: List[int] = Field(..., description="Indices of solutes without any prediction")
+    failed_solvents: List[int] = Field(..., description="Indices of solvents without any prediction")
+    warnings: List[str] = []
+
+
+class PanelSolvent(BaseModel):
+    """One solvent of a panel"""
+    name: str = Field(..., min_length=1, description="Display name (unique within the panel)")
+    smiles: str = Field(..., description="SMILES string of the solvent")
+
+
+class PanelRequest(BaseModel):
+    """Solvent panel registration request"""
+    panel_id: str = Field(..., description="Panel name: letters, digits, '-' and '_'")
+    solvents: List[PanelSolvent] = Field(..., min_length=1)
+
+
+class PanelSummary(BaseModel):
+    """Registered solvent panel"""
+    panel_id: str
+    size: int
+    encoded_bytes: int
+    solvents: Optional[List[PanelSolvent]] = None
+
+
 class StructureRequest(BaseModel):
     """Molecule structure generation request"""
     smiles: str = Field(..., description="SMILES string of the molecule")
@@ -128,209 +314,585 @@ class StructureResponse(BaseModel):
 # ============================================================================
 
 class SolubilityPredictor:
-    """Singleton class for model inference with graph caching"""
+    """Singleton class for model inference with encoder-state caching"""
     
-    def __init__(self, checkpoint_path: str, device: str = "cuda"):
+    def __init__(self, checkpoint_path: str, device: str = "cuda",
+                 engine: str = INFERENCE_ENGINE, precision: str = PRECISION,
+                 artifact_dir: Optional[str] = MODEL_ARTIFACT_DIR,
+                 encoder_cache_bytes: int = ENCODER_CACHE_MAX_BYTES,
+                 shared_with: Optional["SolubilityPredictor"] = None,
+                 ensemble_checkpoints: List[str] = ENSEMBLE_CHECKPOINTS,
+                 preload_panels: bool = True):
         self.device = torch.device(device if torch.cuda.is_available() else "cpu")
         print(f"[INFO] Loading model on device: {self.device}")
         
-        # Load checkpoint
-        checkpoint = torch.load(checkpoint_path, map_location=self.device, weights_only=False)
+        # Initialize model; the fingerprint keys persisted results (a retrained model gets a new key space)
+        self.model, self.model_hash = self._load_model(checkpoint_path, artifact_dir)
+        self.model = self.model.to(self.device)
+        self.model.eval()
+        self.model.build_edge_lookup(get_bond_type_table())
+        self.model.interaction_kernel = INTERACTION_KERNEL
         
-        # Initialize featurizer (no partial charges based on checkpoint inspection)
+        # Initialize featurizer; the checkpoint's input width tells whether it was trained with partial charges
         self.featurizer = MolecularGraphFeaturizer(
             use_edge_features=True,
             use_3d_coords=False,
-            add_partial_charges=False
+            add_partial_charges=self.model.encoder.node_proj.in_features == MODEL_PARAMS_WITH_CHARGES["node_dim"]
         )
         
-        # Initialize model
-        model_params = get_model_params(add_partial_charges=False)
-        self.model = SolubilityModel(**model_params)
-        self.model.load_state_dict(checkpoint["model_state_dict"])
-        self.model = self.model.to(self.device)
-        self.model.eval()
-        
         # Normalization constants
         self.target_mean = TARGET_MEAN
         self.target_std = TARGET_STD
         
-        # Solvent graph cache
-        self.solvent_cache: Dict[str, Any] = {}
+        # Featurized graphs and encoder states, shared by solutes and solvents
+        self.encoder_cache = EncoderStateCache(encoder_cache_bytes)
+        # Further models of a server (shared_with: its default model) use that model's
+        # featurization pool, result store and heatmap store rather than their own
+        self._shared_with = shared_with
+        self._featurization_pool: Optional[FeaturizationPool] = None
+        self._featurization_pool_lock = threading.Lock()
+        
+        # Runs the encoder, interaction and head (checked against the eager model)
+        self.engine = self._create_engine(engine, precision)
+        # Further checkpoints for ensemble uncertainty; their encoder states are not cached
+        self.members = [self._load_member(path) for path in ensemble_checkpoints]
+        self._weight_bytes: Optional[int] = None
+        # Persisted predictions and panel encodings of a reduced precision are kept apart from fp32 ones
+        self.output_key = self.model_hash if self.engine.precision == "fp32" else \
+            hashlib.sha256(f"{self.model_hash}:{self.engine.precision}".encode()).hexdigest()
+        
+        # Reusable heatmap figures, pre-built for the solvent registry layout
+        if shared_with is not None:
+            self.heatmap_store = shared_with.heatmap_store
+        else:
+            renderer = HeatmapRenderer(HEATMAP_MAX_LAYOUTS)
+            renderer.warm(list(SOLVENT_REGISTRY.keys()), HEATMAP_TEMPERATURES)
+            self.heatmap_store = HeatmapStore(renderer, HEATMAP_CACHE_MAX_BYTES, spec_dir=HEATMAP_SPEC_DIR or None)
+        self.heatmap_renderer = self.heatmap_store.renderer
+        
+        # Persistent results of this exact checkpoint
+        if shared_with is not None:
+            self.result_store = shared_with.result_store.for_model(self.output_key) \
+                if shared_with.result_store is not None else None
+        else:
+            self.result_store = self._open_result_store()
+        
+        # Library encoder states precomputed offline for this checkpoint, if any
+        self.embedding_store = EmbeddingStore.open(str(EMBEDDINGS_DIR), self.model_hash)
+        if self.embedding_store is not None:
+            print(f"[INFO] Embedding store: {self.embedding_store.path} ({len(self.embedding_store)} molecules)")
+        
+        # Solvent panels, encoded once and pinned outside the encoder cache
+        self._pinned: Dict[str, EncodedMolecule] = {}
+        self._pinned_canonical: Dict[str, str] = {}
+        self._pinned_version = -1
+        self.panels = PanelRegistry(
+            self._panels_dir(), self.output_key,
+            self._canonicalize_many, self._encode_panel_solvents, self.device
+        )
+        self.register_panel(DEFAULT_PANEL, list(SOLVENT_REGISTRY.items()), persist=False)
+        # Otherwise persisted panels are loaded (and encoded for this checkpoint if need be) on first use
+        loaded = self.panels.load_all() if preload_panels else []
+        self._refresh_pinned()
+        if loaded:
+            print(f"[INFO] Loaded solvent panels: {', '.join(loaded)}")
         print(f"[INFO] Model loaded successfully")
     
+    def _load_model(self, checkpoint_path: str,
+                    artifact_dir: Optional[str]) -> Tuple[SolubilityModel, str]:
+        """Model (on CPU) and checkpoint fingerprint, from the exported artifact if it is current"""
+        meta = read_artifact_meta(artifact_dir)
+        if meta is not None and artifact_is_current(meta, checkpoint_path):
+            print(f"[INFO] Loading model artifact: {artifact_dir}")
+            return load_artifact(artifact_dir, SolubilityModel, meta), meta["model_hash"]
+        if meta is not None:
+            print(f"[WARN] Model artifact {artifact_dir} is stale, loading the checkpoint (re-run export_model.py)")
+        return self._read_checkpoint(checkpoint_path), checkpoint_fingerprint(checkpoint_path)
+    
+    @staticmethod
+    def _read_checkpoint(checkpoint_path: str) -> SolubilityModel:
+        """Model (on CPU) sized from the checkpoint's own weights"""
+        checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+        state_dict = checkpoint["model_state_dict"]
+        model = SolubilityModel(**infer_model_params(state_dict))
+        model.load_state_dict(state_dict)
+        return model
+    
+    def resident_bytes(self) -> int:
+        """
+        Estimated memory held by this model alone: weights (ensemble members included),
+        the engine's copy of them, a full encoder cache and the loaded panel encodings.
+        Stores shared with other models (see shared_with) are not counted.
+        """
+        if self._weight_bytes is None:
+            weights = [sum(tensor.numel() * tensor.element_size()
+                           for tensor in [*model.parameters(), *model.buffers()])
+                       for model in [self.model] + [member.model for member in self.members]]
+            self._weight_bytes = sum(weights) + self.engine.weight_copy_bytes(weights[0])
+        return self._weight_bytes + self.encoder_cache.max_bytes + self.panels.nbytes()
+    
+    def _load_member(self, checkpoint_path: str) -> InferenceEngine:
+        """Eager engine of an ensemble member checkpoint"""
+        model = self._read_checkpoint(checkpoint_path).to(self.device)
+        model.eval()
+        model.build_edge_lookup(get_bond_type_table())
+        model.interaction_kernel = INTERACTION_KERNEL
+        print(f"[INFO] Ensemble member: {checkpoint_path}")
+        return create_engine("eager", model, self.device)
+    
+    def _parity_workloads(self) -> List[tuple]:
+        """Warm-up solutes x registry solvents, as aligned graph batches, for engine parity checks"""
+        solutes = [graph for graph in self._featurize_many(WARMUP_SOLUTES) if graph is not None]
+        solvents = [graph for graph in self._featurize_many(list(SOLVENT_REGISTRY.values())) if graph is not None]
+        temperature = torch.tensor([HEATMAP_TEMPERATURES], dtype=torch.float, device=self.device)
+        return [(
+            Batch.from_data_list([solute] * len(solvents)).to(self.device),
+            Batch.from_data_list(solvents).to(self.device),
+            temperature
+        ) for solute in solutes]
+    
+    def _create_engine(self, name: str, precision: str = "fp32") -> InferenceEngine:
+        """Build an engine, falling back to eager fp32 if it fails or disagrees with it"""
+        eager = create_engine("eager", self.model, self.device)
+        if name == "eager" and precision == "fp32":
+            return eager
+        label = f"{name}/{precision}"
+        tolerance = ENGINE_TOLERANCE if precision == "fp32" else PRECISION_TOLERANCE
+        try:
+            engine = create_engine(name, self.model, self.device,
+                                   str(ENGINES_DIR / self.model_hash[:16]), COMPILE_BACKEND, precision)
+            engine.parity_error = check_parity(engine, eager, self._parity_workloads()) * self.target_std
+        except Exception as e:
+            print(f"[WARN] Inference engine {label} unavailable, using eager/fp32: {e}")
+            return eager
+        if engine.parity_error > tolerance:
+            print(f"[WARN] Inference engine {label} differs from eager/fp32 by {engine.parity_error:.2e} LogS "
+                  f"(> {tolerance:.0e}), using eager/fp32")
+            return eager
+        print(f"[INFO] Inference engine: {label} (max deviation from eager/fp32 {engine.parity_error:.2e} LogS)")
+        return engine
+    
+    def warm_up(self) -> None:
+        """
+        Run every inference stage once ahead of traffic: RDKit parsing and featurization,
+        encoder, interaction and head over the solvent registry, heatmap rendering and
+        structure drawing. Nothing is cached or stored.
+        """
+        start = time.time()
+        registry = self.get_panel(DEFAULT_PANEL)
+        solvents = [registry.encoded[smiles] for smiles in registry.canonical]
+        canonical = self._canonicalize_many(WARMUP_SOLUTES)
+        encoded = self._encode_molecules([smiles for smiles in canonical.values() if smiles], use_cache=False)
+        solutes = list(encoded.values())
+        if not solutes:
+            return
+        temp_tensor = torch.tensor(HEATMAP_TEMPERATURES, dtype=torch.float, device=self.device).unsqueeze(0)
+        with torch.no_grad():
+            pair_vec = self._pair_vectors(
+                [solute for solute in solutes for _ in solvents], solvents * len(solutes)
+            )
+            grid = (self.engine.head(pair_vec, temp_tensor) * self.target_std + self.target_mean).cpu().numpy()
+        self.heatmap_renderer.render(registry.names, HEATMAP_TEMPERATURES, grid[:len(solvents)], "warm-up")
+        self.smiles_to_image(WARMUP_SOLUTES[0])
+        print(f"[INFO] Warm-up done in {time.time() - start:.1f}s")
+    
+    def _panels_dir(self) -> Optional[str]:
+        """Panel storage directory, or None (in-memory panels) if it cannot be created"""
+        try:
+            PANELS_DIR.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"[WARN] Solvent panels will not persist ({PANELS_DIR}): {e}")
+            return None
+        return str(PANELS_DIR)
+    
+    def _encode_panel_solvents(self, canonical_smiles: List[str]) -> Dict[str, EncodedMolecule]:
+        # Panels keep their own copy; don't flush the shared encoder cache with them
+        return self._encode_molecules(canonical_smiles, use_cache=False)
+    
+    def _refresh_pinned(self) -> None:
+        version = self.panels.version
+        self._pinned, self._pinned_canonical = self.panels.pinned()
+        self._pinned_version = version
+    
+    def register_panel(self, panel_id: str, solvents: List[Tuple[str, str]],
+                       persist: bool = True) -> SolventPanel:
+        """Encode and register a (name, SMILES) solvent panel; raises ValueError on bad input"""
+        names = [name for name, _ in solvents]
+        if len(set(names)) != len(names):
+            raise ValueError("Solvent names must be unique within a panel")
+        panel = self.panels.register(panel_id, solvents, persist=persist)
+        self._refresh_pinned()
+        return panel
+    
+    def delete_panel(self, panel_id: str) -> bool:
+        deleted = self.panels.delete(panel_id)
+        self._refresh_pinned()
+        return deleted
+    
+    def get_panel(self, panel_id: str) -> SolventPanel:
+        panel = self.panels.get(panel_id)
+        if self.panels.version != self._pinned_version:
+            # Panels changed (possibly registered by another worker process)
+            self._refresh_pinned()
+        if panel is None:
+            raise HTTPException(status_code=404, detail=f"Unknown solvent panel: {panel_id}")
+        return panel
+    
+    def _open_result_store(self) -> Optional[ResultStore]:
+        """Open the on-disk result store; serve without it if disabled or unwritable"""
+        if not RESULT_STORE_PATH:
+            return None
+        try:
+            store = ResultStore(
+                RESULT_STORE_PATH, self.output_key,
+                max_bytes=RESULT_STORE_MAX_BYTES, warm_rows=RESULT_STORE_WARM_ROWS
+            )
+        except (OSError, sqlite3.Error) as e:
+            print(f"[WARN] Result store disabled ({RESULT_STORE_PATH}): {e}")
+            return None
+        print(f"[INFO] Result store: {RESULT_STORE_PATH} ({store.stats()['memory_rows']} warm rows)")
+        return store
+    
     def _validate_smiles(self, smiles: str) -> bool:
         """Validate SMILES using RDKit"""
         mol = Chem.MolFromSmiles(smiles)
         return mol is not None
     
+    def _temperature_extrapolation(self, temp_k: float) -> float:
+        """Distance (K) of a temperature outside the training domain, 0 inside it"""
+        return max(TEMP_MIN - temp_k, temp_k - TEMP_MAX, 0.0)
+    
     def _get_temperature_warning(self, temp_k: float) -> Optional[str]:
         """Check if temperature is outside training domain"""
         if temp_k < TEMP_MIN or temp_k > TEMP_MAX:
             return f"Temperature {temp_k}K is outside training range ({TEMP_MIN}K-{TEMP_MAX}K). Prediction may be less reliable."
         return None
     
-    def _get_or_cache_solvent(self, solvent_smiles: str):
-        """Get solvent graph from cache or create new"""
-        if solvent_smiles not in self.solvent_cache:
-            graph = self.featurizer.smiles_to_graph(solvent_smiles)
-            if graph is None:
-                return None
-            self.solvent_cache[solvent_smiles] = graph
-        return self.solvent_cache[solvent_smiles]
-    
-    def predict_batch(self, requests: List[PredictionRequest]) -> List[PredictionResponse]:
-        """Batch prediction for multiple solute-solvent pairs"""
-        responses = []
+    def _canonicalize(self, smiles: str) -> Optional[str]:
+        """Return RDKit canonical SMILES, or None if the SMILES does not parse"""
+        mol = Chem.MolFromSmiles(smiles)
+        if mol is None:
+            return None
+        return Chem.MolToSmiles(mol)
+    
+    def _get_featurization_pool(self) -> Optional[FeaturizationPool]:
+        """Featurization process pool, started on first bulk request (None if disabled)"""
+        if FEATURIZE_POOL_WORKERS <= 0:
+            return None
+        if self._shared_with is not None:
+            return self._shared_with._get_featurization_pool()
+        # Inference threads run concurrently; only one of them may start the pool
+        with self._featurization_pool_lock:
+            if self._featurization_pool is None:
+                self._featurization_pool = FeaturizationPool(
+                    self.featurizer.get_config(), max_workers=FEATURIZE_POOL_WORKERS
+                )
+            return self._featurization_pool
+    
+    def _canonicalize_many(self, smiles_list: List[str]) -> Dict[str, Optional[str]]:
+        """Map each distinct SMILES to its canonical form (None if invalid)"""
+        # Panel solvents were canonicalized at registration
+        known = {smiles: self._pinned_canonical[smiles]
+                 for smiles in smiles_list if smiles in self._pinned_canonical}
+        distinct = [smiles for smiles in dict.fromkeys(smiles_list) if smiles not in known]
+        pool = self._get_featurization_pool() if len(distinct) >= FEATURIZE_POOL_THRESHOLD else None
+        if pool is not None:
+            return {**known, **dict(zip(distinct, pool.canonicalize(distinct)))}
+        return {**known, **{smiles: self._canonicalize(smiles) for smiles in distinct}}
+    
+    def _featurize_many(self, smiles_list: List[str]) -> List[Optional[Any]]:
+        """Featurize SMILES in order, in the process pool for large inputs and serially otherwise"""
+        pool = self._get_featurization_pool() if len(smiles_list) >= FEATURIZE_POOL_THRESHOLD else None
+        if pool is not None:
+            return pool.featurize(smiles_list, self.featurizer.get_config())
+        return [self.featurizer.smiles_to_graph(smiles) for smiles in smiles_list]
+    
+    def close(self) -> None:
+        """Release worker processes and the result store connection (shared ones stay open for their owner)"""
+        with self._featurization_pool_lock:
+            if self._featurization_pool is not None:
+                self._featurization_pool.shutdown()
+                self._featurization_pool = None
+        if self.result_store is not None:
+            self.result_store.close()
+    
+    def _encode_molecules(self, canonical_smiles: List[str],
+                          use_cache: bool = True) -> Dict[str, EncodedMolecule]:
+        """
+        Get encoder states for canonical SMILES, encoding cache misses in batches.
+        Panel solvents are served from their pinned states and library molecules from
+        the embedding store. Molecules that fail featurization are absent from the result.
+        """
+        encoded: Dict[str, EncodedMolecule] = {}
+        missing_smiles = []
+        missing_graphs = []
+        uncached = []
+        for smiles in dict.fromkeys(canonical_smiles):
+            entry = self._pinned.get(smiles)
+            if entry is None and self.embedding_store is not None:
+                h = self.embedding_store.get(smiles)
+                if h is not None:
+                    # No copy for float32 stores on CPU
+                    entry = EncodedMolecule(None, h.to(self.device, torch.float32))
+            if entry is None and use_cache:
+                entry = self.encoder_cache.get(smiles)
+            if entry is not None:
+                encoded[smiles] = entry
+            else:
+                uncached.append(smiles)
         
-        # Validate all SMILES first
-        for req in requests:
-            if not self._validate_smiles(req.solute_smiles):
-                raise HTTPException(status_code=400, detail=f"Invalid solute SMILES: {req.solute_smiles}")
-            if not self._validate_smiles(req.solvent_smiles):
-                raise HTTPException(status_code=400, detail=f"Invalid solvent SMILES: {req.solvent_smiles}")
+        for smiles, graph in zip(uncached, self._featurize_many(uncached)):
+            if graph is not None:
+                missing_smiles.append(smiles)
+                missing_graphs.append(graph)
         
-        # Prepare graphs
-        solute_graphs = []
-        solvent_graphs = []
+        for smiles, graph, h in zip(missing_smiles, missing_graphs, self._encode_graphs(missing_graphs)):
+            entry = EncodedMolecule(graph, h)
+            if use_cache:
+                self.encoder_cache.put(smiles, entry)
+            encoded[smiles] = entry
+        
+        return encoded
+    
+    def _encode_graphs(self, graphs: List[Any], engine: Optional[InferenceEngine] = None) -> List[torch.Tensor]:
+        """Encoder states of featurized graphs, in size-sorted sub-batches bounded by atom/edge budgets"""
+        engine = engine or self.engine
+        states: List[Optional[torch.Tensor]] = [None] * len(graphs)
+        sizes = [(graph.num_nodes, graph.num_edges) for graph in graphs]
+        for chunk in plan_batches(sizes, (MAX_ATOMS_PER_BATCH, MAX_EDGES_PER_BATCH)):
+            batch = Batch.from_data_list([graphs[i] for i in chunk]).to(self.device)
+            with torch.no_grad():
+                h = engine.encode(batch.x, batch.edge_index, batch.edge_attr, batch.edge_type)
+            # Clone so each entry owns (and is accounted for) only its own rows
+            for i, h_mol in zip(chunk, torch.split(h, [graphs[i].num_nodes for i in chunk])):
+                states[i] = h_mol.clone()
+        return states
+    
+    def _member_states(self, member: InferenceEngine, canonical_smiles: List[str]) -> Dict[str, EncodedMolecule]:
+        """Encoder states of an ensemble member, reusing cached graphs where there are any"""
+        graphs = {}
+        unknown = []
+        for smiles in dict.fromkeys(canonical_smiles):
+            entry = self.encoder_cache.get(smiles)
+            if entry is not None and entry.graph is not None:
+                graphs[smiles] = entry.graph
+            else:
+                unknown.append(smiles)
+        for smiles, graph in zip(unknown, self._featurize_many(unknown)):
+            if graph is not None:
+                graphs[smiles] = graph
+        smiles_list = list(graphs)
+        states = self._encode_graphs([graphs[smiles] for smiles in smiles_list], member)
+        return {smiles: EncodedMolecule(graphs[smiles], h) for smiles, h in zip(smiles_list, states)}
+    
+    def _pair_vectors(self, solutes: List[EncodedMolecule], solvents: List[EncodedMolecule],
+                      engine: Optional[InferenceEngine] = None) -> torch.Tensor:
+        """
+        Run the interaction map and Set2Set over aligned lists of encoded molecules.
+        Pairs are grouped by size into bounded sub-batches; rows come back in input order.
+        """
+        engine = engine or self.engine
+        def stack(molecules: List[EncodedMolecule]) -> Tuple[torch.Tensor, torch.Tensor]:
+            h = torch.cat([mol.h for mol in molecules], dim=0)
+            counts = torch.tensor([mol.num_atoms for mol in molecules], device=self.device)
+            batch = torch.repeat_interleave(torch.arange(len(molecules), device=self.device), counts)
+            return h, batch
+        
+        sizes = [
+            (solute.num_atoms + solvent.num_atoms, solute.num_atoms * solvent.num_atoms)
+            for solute, solvent in zip(solutes, solvents)
+        ]
+        pair_vec = torch.empty(len(solutes), 4 * engine.hidden_dim, device=self.device)
+        for chunk in plan_batches(sizes, (MAX_ATOMS_PER_BATCH, MAX_INTERACTIONS_PER_BATCH)):
+            h_s, solute_batch = stack([solutes[i] for i in chunk])
+            h_v, solvent_batch = stack([solvents[i] for i in chunk])
+            with torch.no_grad():
+                pair_vec[torch.tensor(chunk, device=self.device)] = engine.interact(
+                    h_s, solute_batch, h_v, solvent_batch
+                )
+        return pair_vec
+    
+    @staticmethod
+    def _group_pairs(keys: List[Tuple[str, str, float]], indices: List[int],
+                     encoded: Dict[str, EncodedMolecule]) -> Tuple[List[Tuple[str, str]], List[int], List[float], List[int]]:
+        """
+        Each distinct (solute, solvent) pair is interacted once and its requests only
+        differ in the temperature fed to the MLP head. Returns the distinct encodable
+        pairs, then per valid key: its pair index, its temperature and its key index.
+        """
+        pairs: List[Tuple[str, str]] = []
+        pair_index: Dict[Tuple[str, str], int] = {}
+        request_pairs = []
         temps = []
         valid_indices = []
-        
-        for i, req in enumerate(requests):
-            solute_graph = self.featurizer.smiles_to_graph(req.solute_smiles)
-            solvent_graph = self._get_or_cache_solvent(req.solvent_smiles)
-            
-            if solute_graph is not None and solvent_graph is not None:
-                solute_graphs.append(solute_graph)
-                solvent_graphs.append(solvent_graph)
-                temps.append(req.temperature_k)
+        for i in indices:
+            key = keys[i][:2]
+            if key not in pair_index:
+                if key[0] in encoded and key[1] in encoded:
+                    pair_index[key] = len(pairs)
+                    pairs.append(key)
+                else:
+                    pair_index[key] = -1
+            if pair_index[key] >= 0:
+                request_pairs.append(pair_index[key])
+                temps.append(keys[i][2])
                 valid_indices.append(i)
+        return pairs, request_pairs, temps, valid_indices
+    
+    def _predict_keys_uncertain(self, keys: List[Tuple[str, str, float]]) -> Dict[int, Tuple[float, float, float]]:
+        """
+        Predict LogS with its spread for (canonical solute, canonical solvent, temperature) keys.
         
-        if len(solute_graphs) == 0:
-            raise HTTPException(status_code=400, detail="No valid molecule pairs to process")
+        The encoder and interaction run once per model (the serving model, then each ensemble
+        member); the SOL_MC_SAMPLES dropout passes of a model's head run as one batched tensor op.
+        
+        Returns:
+            (prediction, sample mean, sample std) by key index; keys whose molecules fail
+            featurization are absent. Results are not stored.
+        """
+        encoded = self._encode_molecules([smiles for key in keys for smiles in key[:2]])
+        pairs, request_pairs, temps, valid_indices = self._group_pairs(keys, list(range(len(keys))), encoded)
+        if not pairs:
+            return {}
+        pair_tensor = torch.tensor(request_pairs, dtype=torch.long, device=self.device)
+        temp_tensor = torch.tensor(temps, dtype=torch.float, device=self.device).unsqueeze(1)
+        pair_smiles = [smiles for pair in pairs for smiles in pair]
+        
+        samples = []
+        with torch.no_grad():
+            for engine in [self.engine] + self.members:
+                states = encoded if engine is self.engine else self._member_states(engine, pair_smiles)
+                pair_vec = self._pair_vectors(
+                    [states[a] for a, _ in pairs], [states[b] for _, b in pairs], engine
+                )[pair_tensor]
+                if engine is self.engine:
+                    point = self.engine.head(pair_vec, temp_tensor)[:, 0]
+                if MC_DROPOUT_SAMPLES > 0:
+                    samples.append(engine.head_samples(pair_vec, temp_tensor, MC_DROPOUT_SAMPLES)[..., 0])
+                else:
+                    samples.append(engine.head(pair_vec, temp_tensor)[:, 0].unsqueeze(0))
+            samples = torch.cat(samples, dim=0) * self.target_std + self.target_mean   # (S, N)
+            point = point * self.target_std + self.target_mean
+        
+        mean = samples.mean(dim=0).tolist()
+        std = samples.std(dim=0, unbiased=False).tolist()
+        return {i: (p, m, sd) for i, p, m, sd in zip(valid_indices, point.tolist(), mean, std)}
+    
+    def _predict_keys(self, keys: List[Tuple[str, str, float]]) -> Dict[int, float]:
+        """
+        Predict LogS for (canonical solute, canonical solvent, temperature) keys.
+        Returns predictions by key index; keys whose molecules fail featurization are absent.
+        """
+        # Results this checkpoint already produced (possibly before a restart)
+        stored = self.result_store.get_many(keys) if self.result_store is not None else {}
+        predictions: Dict[int, float] = {i: stored[key] for i, key in enumerate(keys) if key in stored}
+        pending = [i for i in range(len(keys)) if i not in predictions]
+        if not pending:
+            return predictions
+        
+        encoded = self._encode_molecules([smiles for i in pending for smiles in keys[i][:2]])
+        pairs, request_pairs, temps, valid_indices = self._group_pairs(keys, pending, encoded)
+        if not pairs:
+            return predictions
         
         # Batch inference
-        solute_batch = Batch.from_data_list(solute_graphs).to(self.device)
-        solvent_batch = Batch.from_data_list(solvent_graphs).to(self.device)
+        pair_tensor = torch.tensor(request_pairs, dtype=torch.long, device=self.device)
         temp_tensor = torch.tensor(temps, dtype=torch.float, device=self.device).unsqueeze(1)
         
         with torch.no_grad():
-            pred_norm = self.model(solute_batch, solvent_batch, temp_tensor)
+            pair_vec = self._pair_vectors([encoded[a] for a, _ in pairs], [encoded[b] for _, b in pairs])
+            pred_norm = self.engine.head(pair_vec[pair_tensor], temp_tensor)
             pred = pred_norm * self.target_std + self.target_mean
         
-        predictions = pred.cpu().numpy().flatten().tolist()
+        for i, value in zip(valid_indices, pred.cpu().numpy().flatten().tolist()):
+            predictions[i] = value
+        if self.result_store is not None:
+            self.result_store.put_many([keys[i] + (predictions[i],) for i in valid_indices])
+        return predictions
+    
+    def predict_batch(self, requests: List[PredictionRequest],
+                      uncertainty: bool = False) -> List[PredictionResponse]:
+        """Batch prediction for multiple solute-solvent pairs, optionally with MC dropout / ensemble spread"""
+        responses = []
+        
+        # Validate and canonicalize all SMILES first
+        canonical = self._canonicalize_many(
+            [smiles for req in requests for smiles in (req.solute_smiles, req.solvent_smiles)]
+        )
+        for req in requests:
+            if canonical[req.solute_smiles] is None:
+                raise HTTPException(status_code=400, detail=f"Invalid solute SMILES: {req.solute_smiles}")
+            if canonical[req.solvent_smiles] is None:
+                raise HTTPException(status_code=400, detail=f"Invalid solvent SMILES: {req.solvent_smiles}")
+        
+        keys = [
+            (canonical[req.solute_smiles], canonical[req.solvent_smiles], req.temperature_k)
+            for req in requests
+        ]
+        if uncertainty:
+            predictions = self._predict_keys_uncertain(keys)
+        else:
+            predictions = {i: (value, None, None) for i, value in self._predict_keys(keys).items()}
+        if not predictions:
+            raise HTTPException(status_code=400, detail="No valid molecule pairs to process")
         
         # Build responses
         for i, req in enumerate(requests):
-            if i in valid_indices:
-                idx = valid_indices.index(i)
+            if i in predictions:
+                value, mean, std = predictions[i]
                 warning = self._get_temperature_warning(req.temperature_k)
                 responses.append(PredictionResponse(
-                    predicted_logs=predictions[idx],
+                    predicted_logs=value,
                     temperature_k=req.temperature_k,
-                    warning=warning
+                    warning=warning,
+                    predicted_logs_mean=mean,
+                    predicted_logs_std=std,
+                    temperature_extrapolation_k=self._temperature_extrapolation(req.temperature_k)
                 ))
             else:
                 responses.append(PredictionResponse(
                     predicted_logs=0.0,
                     temperature_k=req.temperature_k,
-                    warning="Failed to process molecule"
+                    warning="Failed to process molecule",
+                    temperature_extrapolation_k=self._temperature_extrapolation(req.temperature_k)
                 ))
         
         return responses
     
-    def generate_heatmap(self, solute_smiles: str, solute_name: Optional[str],
-                        solvent_names: List[str], 
-                        solvent_predictions: Dict[str, List[float]], 
-                        temp_range: List[float],
-                        title_heading: str,
-                        cmap_type: str = "dynamic",
-                        vmin: Optional[float] = None,
-                        vmax: Optional[float] = None) -> str:
-        """Generate base64-encoded heatmap of solubility predictions"""
-        import matplotlib
-        matplotlib.use('Agg')  # Non-interactive backend
-        import matplotlib.pyplot as plt
-        import seaborn as sns
-        import base64
-        from io import BytesIO
-        from matplotlib.colors import ListedColormap, BoundaryNorm
+    def score_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score bulk upload records (see bulk_io.parse_row) without failing the whole chunk.
+        Each record gets "predicted_logs" and "warning", or an "error" explaining why it was skipped.
+        """
+        canonical = self._canonicalize_many([
+            smiles for row in rows if "error" not in row
+            for smiles in (row["solute_smiles"], row["solvent_smiles"])
+        ])
+        for row in rows:
+            if "error" in row:
+                continue
+            if canonical[row["solute_smiles"]] is None:
+                row["error"] = f"Invalid solute SMILES: {row['solute_smiles']}"
+            elif canonical[row["solvent_smiles"]] is None:
+                row["error"] = f"Invalid solvent SMILES: {row['solvent_smiles']}"
         
-        # Prepare data matrix (solvents x temperatures)
-        data_matrix = np.array([solvent_predictions[name] for name in solvent_names])
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        # Custom Colormap and Normalization
-        if cmap_type == "static":
-            # Clinical View: Discrete 5-color tiers as requested
-            # -6.0 to -5.0 : Practically Insoluble (Dark Red)
-            # -5.0 to -3.0 : Poorly Soluble (Orange)
-            # -3.0 to -1.0 : Moderate (Yellow)
-            # -1.0 to 0.5 : Good (Light Green)
-            # 0.5 to 1.0+ : Excellent (Dark Green)
-            
-            boundaries = [-6.0, -5.0, -3.0, -1.0, 0.5, 1.0]
-            colors = ['#8B0000', '#FF8C00', '#FFD700', '#90EE90', '#006400']
-            custom_cmap = ListedColormap(colors)
-            norm = BoundaryNorm(boundaries, custom_cmap.N)
-            
-            sns.heatmap(
-                data_matrix,
-                xticklabels=[int(t) for t in temp_range],
-                yticklabels=solvent_names,
-                cmap=custom_cmap,
-                norm=norm,
-                annot=False,
-                fmt=".2f",
-                cbar_kws={
-                    'label': 'Predicted LogS (mol/L)',
-                    'ticks': boundaries
-                },
-                linewidths=0.5,
-                linecolor='black',
-                ax=ax
-            )
-        else:
-            # Dynamic View: Blue (low) -> White (center) -> Red (high)
-            dyn_vmin = data_matrix.min()
-            dyn_vmax = data_matrix.max()
-            dyn_center = (dyn_vmin + dyn_vmax) / 2
-            
-            # Use sns.heatmap for dynamic for consistency with previous "fine" version
-            sns.heatmap(
-                data_matrix,
-                xticklabels=[int(t) for t in temp_range],
-                yticklabels=solvent_names,
-                cmap="bwr",
-                vmin=dyn_vmin,
-                vmax=dyn_vmax,
-                center=dyn_center,
-                annot=False,
-                fmt=".2f",
-                cbar_kws={'label': 'Predicted LogS (mol/L)'},
-                ax=ax
-            )
-        
-        ax.set_xlabel("Temperature (K)", fontsize=12, fontweight='bold')
-        ax.set_ylabel("Solvent", fontsize=12, fontweight='bold')
-        
-        # Use solute_name if provided, otherwise show truncated SMILES
-        solute_display = solute_name if solute_name else solute_smiles[:40] + '...'
-        title_text = f"{title_heading}\nSolute: {solute_display}"
-        ax.set_title(title_text, fontsize=14, fontweight='bold', pad=20)
-        
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-        plt.close(fig)
+        scored = [row for row in rows if "error" not in row]
+        predictions = self._predict_keys([
+            (canonical[row["solute_smiles"]], canonical[row["solvent_smiles"]], row["temperature_k"])
+            for row in scored
+        ])
+        for i, row in enumerate(scored):
+            if i in predictions:
+                row["predicted_logs"] = predictions[i]
+                row["warning"] = self._get_temperature_warning(row["temperature_k"])
+            else:
+                row["error"] = "Failed to process molecule"
         
-        return image_base64
+        for row in rows:
+            if "error" in row:
+                row["predicted_logs"] = None
+                row["warning"] = None
+        return rows
     
     def smiles_to_image(self, smiles: str, size: int = 400) -> Tuple[Optional[str], bool, Optional[str]]:
         """Generate high-quality 2D PNG rendering of a molecule"""
@@ -364,72 +926,149 @@ class SolubilityPredictor:
         except Exception as e:
             return None, False, str(e)
     
-    def analyze_solvents(self, solute_smiles: str, solute_name: Optional[str] = None) -> AnalysisResponse:
-        """Rank all predefined solvents for a given solute and generate dual heatmaps"""
-        if not self._validate_smiles(solute_smiles):
-            raise HTTPException(status_code=400, detail=f"Invalid solute SMILES: {solute_smiles}")
+    def predict_matrix(self, solute_smiles: List[str], solvent_smiles: List[str],
+                       temperatures: List[float], panel_id: Optional[str] = None) -> np.ndarray:
+        """
+        Predict LogS for every solute x solvent x temperature combination.
         
-        # Define temperature range for heatmap (250K to 450K at 10K intervals)
-        temp_range = list(range(250, 451, 10))  # [250, 260, ..., 450]
-        
-        # Get predictions for all solvents across temperature range
-        solvent_predictions = {}
-        for solvent_name, solvent_smiles in SOLVENT_REGISTRY.items():
-            predictions_at_temps = []
-            for temp in temp_range:
-                req = PredictionRequest(
-                    solute_smiles=solute_smiles,
-                    solvent_smiles=solvent_smiles,
-                    temperature_k=temp
-                )
-                pred = self.predict_batch([req])[0]
-                predictions_at_temps.append(pred.predicted_logs)
-            solvent_predictions[solvent_name] = predictions_at_temps
+        Each molecule is encoded once, each distinct solute-solvent pair is interacted
+        once (or read from the result store) and all temperatures are broadcast through
+        the MLP head. Cells of molecules that are invalid or fail featurization are NaN.
+        With `panel_id` (the panel the solvents come from), that panel is loaded on this
+        model first, so its solvents are served from their pinned encodings.
         
-        # 1. Generate Static Heatmap (Clinical Tiers scale, fixed -6 to +1)
-        solvent_names = list(SOLVENT_REGISTRY.keys())
-        static_heatmap_base64 = self.generate_heatmap(
-            solute_smiles=solute_smiles,
-            solute_name=solute_name,
-            solvent_names=solvent_names,
-            solvent_predictions=solvent_predictions,
-            temp_range=temp_range,
-            title_heading="Predicted solubility in different solvents across temperature",
-            cmap_type="static"
-        )
+        Returns:
+            (N solutes, M solvents, T temperatures) float32 array
+        """
+        if panel_id is not None:
+            try:
+                self.get_panel(panel_id)
+            except HTTPException:
+                pass  # deleted since the solvents were taken from it: encoded like any others
+        canonical = self._canonicalize_many(solute_smiles + solvent_smiles)
+        solutes = [canonical[smiles] for smiles in solute_smiles]
+        solvents = [canonical[smiles] for smiles in solvent_smiles]
+        matrix = np.full((len(solutes), len(solvents), len(temperatures)), np.nan, dtype=np.float32)
         
-        # 2. Generate Dynamic Heatmap (bwr colormap, fluid range)
-        dynamic_heatmap_base64 = self.generate_heatmap(
-            solute_smiles=solute_smiles,
-            solute_name=solute_name,
-            solvent_names=solvent_names,
-            solvent_predictions=solvent_predictions,
-            temp_range=temp_range,
-            title_heading="Dynamic Heatmap",
-            cmap_type="dynamic"
-        )
+        # Matrix cells of each distinct valid pair (duplicates in the inputs share a pair)
+        pair_cells: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for i, solute in enumerate(solutes):
+            if solute is None:
+                continue
+            for j, solvent in enumerate(solvents):
+                if solvent is not None:
+                    pair_cells.setdefault((solute, solvent), []).append((i, j))
         
-        # Get rankings at room temperature (298.15K)
-        default_temp = 298.15
-        requests = [
-            PredictionRequest(
-                solute_smiles=solute_smiles,
-                solvent_smiles=smiles,
-                temperature_k=default_temp
+        # Pairs with every temperature stored are filled directly
+        stored = {}
+        if self.result_store is not None:
+            stored = self.result_store.get_many(
+                pair + (temp,) for pair in pair_cells for temp in temperatures
             )
-            for smiles in SOLVENT_REGISTRY.values()
-        ]
+        missing = []
+        for pair, cells in pair_cells.items():
+            values = [stored.get(pair + (temp,)) for temp in temperatures]
+            if any(value is None for value in values):
+                missing.append(pair)
+            else:
+                for i, j in cells:
+                    matrix[i, j] = values
+        if not missing:
+            return matrix
+        
+        encoded = self._encode_molecules([smiles for pair in missing for smiles in pair])
+        missing = [pair for pair in missing if pair[0] in encoded and pair[1] in encoded]
+        temp_tensor = torch.tensor(temperatures, dtype=torch.float, device=self.device).unsqueeze(0)
         
-        predictions = self.predict_batch(requests)
+        # Bound the (pairs, 4H) pair-vector buffer on very large matrices
+        for start in range(0, len(missing), MATRIX_PAIRS_PER_CHUNK):
+            chunk = missing[start:start + MATRIX_PAIRS_PER_CHUNK]
+            with torch.no_grad():
+                pair_vec = self._pair_vectors(
+                    [encoded[solute] for solute, _ in chunk], [encoded[solvent] for _, solvent in chunk]
+                )                                                       # (P, 4H)
+                pred_norm = self.engine.head(pair_vec, temp_tensor)     # (P, T)
+                pred = (pred_norm * self.target_std + self.target_mean).cpu().numpy()
+            
+            for pair, values in zip(chunk, pred):
+                for i, j in pair_cells[pair]:
+                    matrix[i, j] = values
+            if self.result_store is not None:
+                self.result_store.put_many([
+                    pair + (temp, float(value))
+                    for pair, values in zip(chunk, pred) for temp, value in zip(temperatures, values)
+                ])
+        
+        return matrix
+    
+    def predict_grid(self, solute_smiles: str, solvent_smiles: List[str],
+                     temperatures: List[float]) -> np.ndarray:
+        """Predict LogS for one solute over a solvents x temperatures grid"""
+        grid = self.predict_matrix([solute_smiles], solvent_smiles, temperatures)[0]
+        if np.isnan(grid).any():
+            raise HTTPException(status_code=400, detail="No valid molecule pairs to process")
+        return grid
+    
+    def score_library(self, rows: List[Dict[str, Any]], solvent_smiles: List[str],
+                      temperatures: List[float], panel_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Score bulk upload records' solutes against every solvent and temperature
+        (see predict_matrix for `panel_id`).
+        Returns one record per (row, solvent, temperature), solute-major, as score_rows does.
+        """
+        solutes = [row["solute_smiles"] for row in rows if row["solute_smiles"]]
+        matrix = self.predict_matrix(solutes, solvent_smiles, temperatures, panel_id) if solutes else None
+        
+        records = []
+        i = 0
+        for row in rows:
+            # Rows without a solute still yield every combination, so a job's
+            # total of rows x solvents x temperatures records holds
+            for j, solvent in enumerate(solvent_smiles):
+                for k, temp in enumerate(temperatures):
+                    record = {"row": row["row"], "solute_smiles": row["solute_smiles"],
+                              "solvent_smiles": solvent, "temperature_k": temp}
+                    value = matrix[i, j, k] if row["solute_smiles"] else None
+                    if value is None:
+                        record.update(predicted_logs=None, warning=None, error="Missing solute SMILES")
+                    elif np.isnan(value):
+                        record.update(predicted_logs=None, warning=None, error="Failed to process molecule")
+                    else:
+                        record.update(predicted_logs=float(value), warning=self._get_temperature_warning(temp))
+                    records.append(record)
+            if row["solute_smiles"]:
+                i += 1
+        return records
+    
+    def compute_solvent_analysis(self, solute_smiles: str, panel_id: str = DEFAULT_PANEL) -> Dict[str, Any]:
+        """Predict the panel's solvent x temperature grid and room-temperature rankings (no rendering)"""
+        if not self._validate_smiles(solute_smiles):
+            raise HTTPException(status_code=400, detail=f"Invalid solute SMILES: {solute_smiles}")
+        panel = self.get_panel(panel_id)
         
-        # Create rankings
+        temp_range = HEATMAP_TEMPERATURES
+        default_temp = RANKING_TEMPERATURE
+        
+        # Evaluate the whole solvents x temperatures grid, ranking temperature
+        # included as the last column; panel solvents are already encoded
+        grid = self.predict_grid(
+            solute_smiles,
+            panel.smiles,
+            temp_range + [default_temp]
+        )
+        solvent_predictions = {
+            name: grid[i, :-1].tolist()
+            for i, name in enumerate(panel.names)
+        }
+        
+        # Create rankings at room temperature (298.15K)
         rankings_data = [
             {
                 "solvent_name": name,
-                "solvent_smiles": SOLVENT_REGISTRY[name],
-                "predicted_logs": pred.predicted_logs
+                "solvent_smiles": panel.smiles[i],
+                "predicted_logs": float(grid[i, -1])
             }
-            for name, pred in zip(SOLVENT_REGISTRY.keys(), predictions)
+            for i, name in enumerate(panel.names)
         ]
         
         # Sort by predicted_logs (descending)
@@ -441,25 +1080,73 @@ class SolubilityPredictor:
             for i, data in enumerate(rankings_data)
         ]
         
+        return {
+            "temperatures": temp_range,
+            "ranking_temperature_k": default_temp,
+            "solvent_predictions": solvent_predictions,
+            "rankings": rankings,
+        }
+    
+    def register_solvent_heatmaps(self, solute_smiles: str, solute_name: Optional[str],
+                                  analysis: Dict[str, Any], images: str = "both") -> Dict[str, str]:
+        """
+        Register heatmaps for a compute_solvent_analysis result without rendering them.
+        Returns the /heatmaps URL for each requested kind ("static", "dynamic").
+        """
+        kinds = {"none": (), "static": ("static",), "dynamic": ("dynamic",),
+                 "both": ("static", "dynamic")}[images]
+        solvent_predictions = analysis["solvent_predictions"]
+        # A heatmap with thousands of rows is unreadable; large panels return grid data only
+        if not kinds or len(solvent_predictions) > HEATMAP_MAX_SOLVENTS:
+            return {}
+        
+        solvent_names = list(solvent_predictions.keys())
+        
+        # Prepare data matrix (solvents x temperatures)
+        data_matrix = np.array([solvent_predictions[name] for name in solvent_names])
+        
+        # Use solute_name if provided, otherwise show truncated SMILES
+        solute_display = solute_name if solute_name else solute_smiles[:40] + '...'
+        
+        spec = HeatmapSpec(
+            solvent_names,
+            [int(t) for t in analysis["temperatures"]],
+            data_matrix,
+            solute_display
+        )
+        image_ids = self.heatmap_store.register(spec, kinds)
+        return {kind: f"/heatmaps/{image_id}" for kind, image_id in image_ids.items()}
+    
+    def build_analysis_response(self, solute_smiles: str, solute_name: Optional[str],
+                                analysis: Dict[str, Any],
+                                heatmap_urls: Dict[str, str]) -> AnalysisResponse:
+        """Assemble the /solvents response from predictions and heatmap URLs"""
         # Prepare raw heatmap data for ag-grid
         # Each row: {"solvent": "Name", "250": value, "260": value, ...}
         heatmap_data = []
-        for name, preds in solvent_predictions.items():
+        for name, preds in analysis["solvent_predictions"].items():
             row = {"solvent": name}
-            for temp, val in zip(temp_range, preds):
+            for temp, val in zip(analysis["temperatures"], preds):
                 row[str(temp)] = val
             heatmap_data.append(row)
         
         return AnalysisResponse(
             solute_smiles=solute_smiles,
             solute_name=solute_name,
-            ranking_temperature_k=default_temp,
-            rankings=rankings,
-            static_heatmap_base64=static_heatmap_base64,
-            dynamic_heatmap_base64=dynamic_heatmap_base64,
-            temperatures=temp_range,
+            ranking_temperature_k=analysis["ranking_temperature_k"],
+            rankings=analysis["rankings"],
+            static_heatmap_url=heatmap_urls.get("static"),
+            dynamic_heatmap_url=heatmap_urls.get("dynamic"),
+            temperatures=analysis["temperatures"],
             heatmap_data=heatmap_data
         )
+    
+    def analyze_solvents(self, solute_smiles: str, solute_name: Optional[str] = None,
+                         images: str = "both", panel_id: str = DEFAULT_PANEL) -> AnalysisResponse:
+        """Rank a solvent panel (default: the predefined solvents) for a given solute and register dual heatmaps"""
+        analysis = self.compute_solvent_analysis(solute_smiles, panel_id)
+        heatmap_urls = self.register_solvent_heatmaps(solute_smiles, solute_name, analysis, images)
+        return self.build_analysis_response(solute_smiles, solute_name, analysis, heatmap_urls)
 
 
 # ============================================================================
@@ -472,38 +1159,489 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Initialize predictor (singleton)
+# Initialize predictor (singleton); serve.py loads it before forking worker processes.
+# It is only published once loaded and warmed up, so endpoints answer 503 until then.
 predictor = None
+# Serves requests naming another checkpoint under SOL_MODELS_DIR (created with the predictor)
+model_registry: Optional[ModelRegistry] = None
+startup_phase = "loading"  # "loading" -> "warming" -> "ready" (or "failed")
+startup_error: Optional[str] = None
+
+# Blocking inference and rendering run here, never on the event loop
+inference_executor = BoundedExecutor("inference", INFERENCE_WORKERS, INFERENCE_QUEUE)
+render_executor = BoundedExecutor("render", RENDER_WORKERS, RENDER_QUEUE)
+
+
+def _load_named_model(name: str, checkpoint_path: str) -> SolubilityPredictor:
+    """Predictor of a non-default checkpoint: own caches and key spaces, the default model's pools and stores"""
+    start = time.time()
+    loaded = SolubilityPredictor(
+        checkpoint_path, artifact_dir=None, encoder_cache_bytes=MODEL_ENCODER_CACHE_MAX_BYTES,
+        shared_with=predictor, ensemble_checkpoints=[], preload_panels=False
+    )
+    print(f"[INFO] Loaded model {name} in {time.time() - start:.1f}s")
+    return loaded
+
+
+def _create_model_registry(default: SolubilityPredictor) -> ModelRegistry:
+    return ModelRegistry(
+        MODELS_DIR or None, CHECKPOINT_PATH.parent.name, default,
+        load=_load_named_model, sizeof=SolubilityPredictor.resident_bytes,
+        close=SolubilityPredictor.close, max_bytes=MODEL_MEMORY_MAX_BYTES
+    )
+
+
+async def _check_models(names) -> None:
+    """404 for model names without a checkpoint (the checkpoint directory is scanned off the event loop)"""
+    names = set(names) - {None, model_registry.default_name}
+    if not names:
+        return
+    try:
+        await run_in_threadpool(lambda: [model_registry.check(name) for name in names])
+    except UnknownModelError as e:
+        raise HTTPException(status_code=404, detail=f"Model {e.args[0]} not found (see /models)")
+
+
+def _call_model(name: Optional[str], method: str, *args):
+    """Run a predictor method on the named model (loaded if needed), held against eviction meanwhile"""
+    with model_registry.use(name) as model:
+        return getattr(model, method)(*args)
+
+
+def _predict_routed(requests: List[PredictionRequest], uncertainty: bool = False) -> List[PredictionResponse]:
+    """predict_batch per requested model, responses in request order"""
+    groups: Dict[Optional[str], List[int]] = {}
+    for i, req in enumerate(requests):
+        groups.setdefault(req.model, []).append(i)
+    responses: List[Optional[PredictionResponse]] = [None] * len(requests)
+    for name, indices in groups.items():
+        batch = [requests[i] for i in indices]
+        for i, response in zip(indices, _call_model(name, "predict_batch", batch, uncertainty)):
+            responses[i] = response
+    return responses
+
+
+def _score_job_rows(rows: List[Dict[str, Any]], model: Optional[str]) -> List[Dict[str, Any]]:
+    """Job chunk scoring on the job's model, run in the inference pool behind interactive requests"""
+    return inference_executor.run_background(_call_model, model, "score_rows", rows)
+
+
+def _score_job_library(rows: List[Dict[str, Any]], solvents: List[str], temperatures: List[float],
+                       panel_id: Optional[str], model: Optional[str]) -> List[Dict[str, Any]]:
+    return inference_executor.run_background(
+        _call_model, model, "score_library", rows, solvents, temperatures, panel_id
+    )
+
+
+# Coalesces concurrent /predict calls into shared forward passes
+predict_batcher = MicroBatcher(
+    _predict_routed,
+    max_batch_size=PREDICT_MAX_BATCH_SIZE,
+    max_wait_ms=PREDICT_MAX_WAIT_MS,
+    executor=inference_executor
+)
+
+# Concurrent /solvents calls for the same solute share one grid computation
+solvent_analysis_flight = SingleFlight()
+
+# Background scoring jobs (started once the model is loaded)
+job_store: Optional[JobStore] = None
+job_runner: Optional[JobRunner] = None
+startup_task: Optional[asyncio.Task] = None
+
+async def prepare_predictor():
+    """Load and warm up the model off the event loop, then publish it and start the job runner"""
+    global predictor, model_registry, startup_phase, startup_error, job_runner
+    if predictor is None:
+        try:
+            start = time.time()
+            loaded = await run_in_threadpool(SolubilityPredictor, str(CHECKPOINT_PATH))
+            startup_phase = "warming"
+            await run_in_threadpool(loaded.warm_up)
+        except Exception as e:
+            startup_phase, startup_error = "failed", str(e)
+            print(f"[ERROR] Model startup failed: {e}")
+            return
+        model_registry = _create_model_registry(loaded)
+        predictor = loaded
+        print(f"[INFO] Ready in {time.time() - start:.1f}s")
+    elif model_registry is None:
+        model_registry = _create_model_registry(predictor)
+    startup_phase = "ready"
+    if job_store is not None and RUN_JOBS:
+        job_runner = JobRunner(job_store, _score_job_rows, _score_job_library)
+        job_runner.start()
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Load model on startup"""
-    global predictor
-    predictor = SolubilityPredictor(str(CHECKPOINT_PATH))
+    """Start serving immediately; the model loads in the background (see /health)"""
+    global job_store, startup_task
+    predict_batcher.start()
+    try:
+        job_store = JobStore(str(JOBS_DIR))
+    except (OSError, sqlite3.Error) as e:
+        print(f"[WARN] Job API disabled ({JOBS_DIR}): {e}")
+    startup_task = asyncio.create_task(prepare_predictor())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background worker processes"""
+    if job_runner is not None:
+        job_runner.stop()
+    await predict_batcher.stop()
+    inference_executor.shutdown()
+    render_executor.shutdown()
+    if model_registry is not None:
+        model_registry.clear()
+    if predictor is not None:
+        predictor.close()
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
-        "status": "ready" if predictor is not None else "loading",
+        "status": startup_phase,
+        "error": startup_error,
         "model_loaded": predictor is not None,
-        "device": str(predictor.device) if predictor else "unknown"
+        "device": str(predictor.device) if predictor else "unknown",
+        "engine": predictor.engine.describe() if predictor else None,
+        "models": model_registry.stats() if model_registry else None,
+        "uncertainty": {
+            "mc_samples": MC_DROPOUT_SAMPLES,
+            "models": 1 + len(predictor.members)
+        } if predictor else None,
+        "encoder_cache": predictor.encoder_cache.stats() if predictor else None,
+        "heatmap_store": predictor.heatmap_store.stats() if predictor else None,
+        "result_store": predictor.result_store.stats() if predictor and predictor.result_store else None,
+        "embedding_store": predictor.embedding_store.stats() if predictor and predictor.embedding_store else None,
+        "executors": {
+            "inference": inference_executor.stats(),
+            "render": render_executor.stats()
+        },
+        "solvent_analysis_flight": solvent_analysis_flight.stats()
     }
 
 
+@app.get("/models")
+async def list_models():
+    """Servable model names (the default one first) and those currently loaded"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    names = await run_in_threadpool(model_registry.names)
+    return {"models": names, **model_registry.stats()}
+
+
 @app.post("/predict", response_model=List[PredictionResponse])
-async def predict(requests: List[PredictionRequest]):
+async def predict(
+    requests: List[PredictionRequest],
+    uncertainty: bool = Query(False, description="Add the mean and std of MC dropout / ensemble samples")
+):
     """
     Batch prediction endpoint
     
     Input: List of {solute_smiles, solvent_smiles, temperature_k}
-    Output: List of {predicted_logs, temperature_k, warning}
+    Output: List of {predicted_logs, temperature_k, warning, temperature_extrapolation_k},
+            plus predicted_logs_mean/predicted_logs_std with ?uncertainty=true
+    
+    Concurrent calls are coalesced into one batched forward by the micro-batcher.
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    await _check_models(req.model for req in requests)
+    
+    if uncertainty:
+        return await inference_executor.run(_predict_routed, requests, True)
+    return await predict_batcher.submit(requests)
+
+
+async def _run_with_backoff(executor: BoundedExecutor, fn, *args):
+    """Run on a bounded pool, waiting for capacity instead of failing (response already streaming)"""
+    while True:
+        try:
+            return await executor.run(fn, *args)
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+            await asyncio.sleep(float((e.headers or {}).get("Retry-After", 1)))
+
+
+@app.post("/predict/stream")
+async def predict_stream(
+    file: UploadFile = File(..., description="CSV or Parquet with solute/solvent SMILES and temperature columns"),
+    chunk_size: int = Query(BULK_CHUNK_ROWS, ge=1, le=100_000, description="Rows scored per chunk"),
+    model: Optional[str] = Query(None, description="Model name (see /models); the default model if omitted")
+):
+    """
+    Streaming bulk prediction
+    
+    Input: multipart upload with SMILES_Solute/solute_smiles, SMILES_Solvent/solvent_smiles
+           and optional Temperature_K/temperature_k (default 298.15) columns
+    Output: NDJSON, one line per row in input order:
+            {row, solute_smiles, solvent_smiles, temperature_k, predicted_logs, warning[, error]}
+    
+    The upload is read and scored a chunk at a time, so memory stays flat and the
+    first lines arrive while later chunks are still being computed. Rows that
+    cannot be scored carry an "error" instead of failing the stream.
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    await _check_models([model])
+    
+    chunks = iter_upload_chunks(file.file, detect_format(file.filename, file.content_type), chunk_size)
+    
+    async def next_chunk():
+        return await run_in_threadpool(next, chunks, None)
+    
+    # Fail fast (as a normal HTTP error) if the file cannot be parsed at all
+    try:
+        first = await next_chunk()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read upload: {e}")
+    
+    async def generate():
+        # Score chunk k+1 while chunk k is being written out
+        pending = asyncio.ensure_future(
+            _run_with_backoff(inference_executor, _call_model, model, "score_rows", first)
+        ) if first else None
+        try:
+            while pending is not None:
+                try:
+                    chunk = await next_chunk()
+                except Exception as e:
+                    # Malformed data past the first chunk: report it after the rows scored so far
+                    yield "".join(json.dumps(row) + "\n" for row in await pending)
+                    pending = None
+                    yield json.dumps({"error": f"Could not read upload: {e}"}) + "\n"
+                    break
+                following = asyncio.ensure_future(
+                    _run_with_backoff(inference_executor, _call_model, model, "score_rows", chunk)
+                ) if chunk else None
+                rows = await pending
+                pending = following
+                yield "".join(json.dumps(row) + "\n" for row in rows)
+        finally:
+            if pending is not None:
+                pending.cancel()
+            await file.close()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.post("/matrix", response_model=MatrixResponse)
+async def predict_matrix(request: MatrixRequest):
+    """
+    Cartesian screening: every solute against every solvent at every temperature
+    
+    Input: {solute_smiles: [...], solvent_smiles: [...] or panel_id: "registry" | <registered panel>,
+            temperatures_k: [...], encoding: base64|list}
+    Output: dense (N, M, T) float32 array plus its axes
+    
+    Molecules are encoded once and pairs interacted once; temperatures only cost a
+    head evaluation. Use /jobs for matrices beyond SOL_MATRIX_MAX_CELLS.
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    await _check_models([request.model])
+    
+    solvent_names = None
+    if request.panel_id is not None:
+        # Resolved on the requested model, whose pinned encodings then serve the solvents;
+        # may (re)load or re-encode the panel from disk
+        panel = await run_in_threadpool(_call_model, request.model, "get_panel", request.panel_id)
+        solvent_names = panel.names
+        solvents = panel.smiles
+    elif request.solvent_smiles:
+        solvents = request.solvent_smiles
+    else:
+        raise HTTPException(status_code=400, detail="Provide solvent_smiles or panel_id")
+    
+    shape = [len(request.solute_smiles), len(solvents), len(request.temperatures_k)]
+    if shape[0] * shape[1] * shape[2] > MATRIX_MAX_CELLS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{shape[0]}x{shape[1]}x{shape[2]} exceeds {MATRIX_MAX_CELLS} cells; submit it as a job (POST /jobs)"
+        )
+    
+    matrix = await inference_executor.run(
+        _call_model, request.model, "predict_matrix",
+        request.solute_smiles, solvents, request.temperatures_k, request.panel_id
+    )
+    
+    missing = np.isnan(matrix)
+    response = MatrixResponse(
+        shape=shape,
+        solute_smiles=request.solute_smiles,
+        solvent_smiles=solvents,
+        solvent_names=solvent_names,
+        temperatures_k=request.temperatures_k,
+        failed_solutes=np.flatnonzero(missing.all(axis=(1, 2))).tolist() if shape[1] else [],
+        failed_solvents=np.flatnonzero(missing.all(axis=(0, 2))).tolist(),
+        warnings=[
+            warning for warning in map(predictor._get_temperature_warning, request.temperatures_k) if warning
+        ]
+    )
+    if request.encoding == "base64":
+        response.data_base64 = base64.b64encode(matrix.astype('<f4').tobytes()).decode()
+    else:
+        response.data = np.where(missing, None, matrix.astype(object)).tolist()
+    return response
+
+
+def _get_job(job_id: str) -> Dict[str, Any]:
+    if job_store is None:
+        raise HTTPException(status_code=503, detail="Job API not available")
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    file: UploadFile = File(..., description="CSV or Parquet input"),
+    solvents: Optional[str] = Form(
+        None, description="JSON list of solvent SMILES; crosses each input solute with them"
+    ),
+    panel_id: Optional[str] = Form(None, description="Solvent panel used instead of solvents"),
+    temperatures: Optional[str] = Form(None, description="JSON list of temperatures (K) for library mode"),
+    chunk_size: int = Form(JOB_CHUNK_ROWS, ge=1, le=100_000),
+    model: Optional[str] = Form(None, description="Model name (see /models); the default model if omitted")
+):
+    """
+    Submit a background scoring job
+    
+    Input: multipart upload, either rows with solute/solvent/temperature columns (as for
+           /predict/stream) or, with `solvents` or `panel_id`, a library of solutes scored against
+           every solvent at every temperature (default 298.15 K)
+    Output: {job_id, status, ...}; poll GET /jobs/{job_id}, then download GET /jobs/{job_id}/results
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if job_store is None:
+        raise HTTPException(status_code=503, detail="Job API not available")
+    await _check_models([model])
+    
+    solvent_list = temperature_list = None
+    if panel_id is not None or solvents is not None:
+        try:
+            # A panel is resolved on the job's model, which scores it from its pinned encodings
+            solvent_list = (await run_in_threadpool(_call_model, model, "get_panel", panel_id)).smiles \
+                if panel_id is not None else json.loads(solvents)
+            temperature_list = [float(t) for t in json.loads(temperatures)] if temperatures else [RANKING_TEMPERATURE]
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid solvents/temperatures: {e}")
+        if not solvent_list or not all(isinstance(smiles, str) for smiles in solvent_list) or not temperature_list:
+            raise HTTPException(status_code=400, detail="solvents must be a non-empty list of SMILES")
+    
+    job_id = await run_in_threadpool(
+        job_store.create, file.file, detect_format(file.filename, file.content_type),
+        chunk_size, solvent_list, temperature_list, model, panel_id
+    )
+    if job_runner is not None:
+        job_runner.wake()
+    return job_progress(job_store.get(job_id))
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status with progress, throughput (rows/s) and ETA (s) of the current run"""
+    return job_progress(_get_job(job_id))
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, chunk: Optional[int] = Query(None, ge=0)):
+    """
+    Download job results as NDJSON (same records as /predict/stream)
+    
+    Without `chunk`, streams every completed chunk in order (partial while the job runs);
+    with `chunk`, returns that chunk only. X-Chunks-Done reports how many are available.
+    """
+    job = _get_job(job_id)
+    headers = {"X-Chunks-Done": str(job["chunks_done"]), "X-Job-Status": job["status"]}
+    if chunk is None:
+        return StreamingResponse(
+            job_store.iter_results(job_id, 0, job["chunks_done"]),
+            media_type="application/x-ndjson", headers=headers
+        )
+    if chunk >= job["chunks_done"]:
+        raise HTTPException(status_code=404, detail=f"Chunk {chunk} not completed yet")
+    return StreamingResponse(
+        job_store.iter_results(job_id, chunk, chunk + 1),
+        media_type="application/x-ndjson", headers=headers
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Cancel a job and delete its files"""
+    job = _get_job(job_id)
+    if job["status"] == "running":
+        # The runner deletes it after the chunk in progress
+        job_store.update(job_id, status="cancelled")
+    else:
+        await run_in_threadpool(job_store.delete, job_id)
+    return {"job_id": job_id, "status": "cancelled"}
+
+
+def _panel_summary(panel: SolventPanel, with_solvents: bool = False) -> PanelSummary:
+    return PanelSummary(**panel.summary(), solvents=panel.solvents() if with_solvents else None)
+
+
+@app.post("/panels", response_model=PanelSummary, status_code=201)
+async def register_panel(request: PanelRequest):
+    """
+    Register (or replace) a named solvent panel
+    
+    Every solvent is featurized and encoded once here and kept pinned, so /solvents,
+    /matrix and /jobs only encode the solute when ranking against the panel.
     """
     if predictor is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
+    if request.panel_id == DEFAULT_PANEL:
+        raise HTTPException(status_code=400, detail=f"Panel '{DEFAULT_PANEL}' is built in")
+    if len(request.solvents) > PANEL_MAX_SOLVENTS:
+        raise HTTPException(status_code=413, detail=f"Panels are limited to {PANEL_MAX_SOLVENTS} solvents")
     
-    return predictor.predict_batch(requests)
+    try:
+        panel = await inference_executor.run(
+            predictor.register_panel,
+            request.panel_id,
+            [(solvent.name, solvent.smiles) for solvent in request.solvents]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _panel_summary(panel)
+
+
+@app.get("/panels", response_model=List[PanelSummary])
+async def list_panels():
+    """Registered solvent panels"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    return [_panel_summary(panel) for panel in await run_in_threadpool(predictor.panels.list)]
+
+
+@app.get("/panels/{panel_id}", response_model=PanelSummary)
+async def get_panel(panel_id: str):
+    """A solvent panel with its solvents"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    return _panel_summary(await run_in_threadpool(predictor.get_panel, panel_id), with_solvents=True)
+
+
+@app.delete("/panels/{panel_id}")
+async def delete_panel(panel_id: str):
+    """Remove a solvent panel and its stored encodings"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if panel_id == DEFAULT_PANEL:
+        raise HTTPException(status_code=400, detail=f"Panel '{DEFAULT_PANEL}' is built in")
+    if not await run_in_threadpool(predictor.delete_panel, panel_id):
+        raise HTTPException(status_code=404, detail=f"Unknown solvent panel: {panel_id}")
+    return {"panel_id": panel_id, "deleted": True}
 
 
 @app.post("/solvents", response_model=AnalysisResponse)
@@ -511,17 +1649,64 @@ async def get_solvent_analysis(request: AnalysisRequest):
     """
     Solvent ranking and heatmap generation
     
-    Input: {solute_smiles, solute_name (optional)}
+    Input: {solute_smiles, solute_name (optional), images: none|static|dynamic|both,
+            panel_id (optional, default "registry")}
     Output: {
         ranking_temperature_k: temperature used for rankings (298.15K),
         rankings: [{solvent_name, predicted_logs, rank}, ...],
-        heatmap_base64: PNG image showing predictions across 250K-450K
+        static_heatmap_url / dynamic_heatmap_url: GET URLs of PNG images across 250K-450K
     }
+    
+    Images are only rendered when their URL is fetched. Identical analyses that
+    arrive while one is running await that computation instead of repeating it.
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    canonical_solute = await run_in_threadpool(predictor._canonicalize, request.solute_smiles)
+    if canonical_solute is None:
+        raise HTTPException(status_code=400, detail=f"Invalid solute SMILES: {request.solute_smiles}")
+    
+    await run_in_threadpool(predictor.get_panel, request.panel_id)
+    await _check_models([request.model])
+    
+    # Keyed by solute, panel and model: the name and image kinds just change the cheap registration below
+    analysis = await solvent_analysis_flight.run(
+        (canonical_solute, request.panel_id, request.model or model_registry.default_name),
+        lambda: inference_executor.run(
+            _call_model, request.model, "compute_solvent_analysis", request.solute_smiles, request.panel_id
+        )
+    )
+    # Registration writes the shared spec files when SOL_HEATMAP_SPEC_DIR is set
+    heatmap_urls = await run_in_threadpool(
+        predictor.register_solvent_heatmaps, request.solute_smiles, request.solute_name, analysis, request.images
+    )
+    return predictor.build_analysis_response(
+        request.solute_smiles, request.solute_name, analysis, heatmap_urls
+    )
+
+
+@app.get("/heatmaps/{image_id}")
+async def get_heatmap(image_id: str, request: Request):
+    """
+    Serve a heatmap PNG registered by /solvents, rendering it on first access
+    
+    Image ids are content hashes, so responses are immutable and cacheable.
     """
     if predictor is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
-    return predictor.analyze_solvents(request.solute_smiles, request.solute_name)
+    headers = {
+        "ETag": f'"{image_id}"',
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    png = await render_executor.run(predictor.heatmap_store.get_png, image_id)
+    if png is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired heatmap: {image_id}")
+    return Response(content=png, media_type="image/png", headers=headers)
 
 
 @app.post("/generate-structure", response_model=StructureResponse)
@@ -532,7 +1717,9 @@ async def generate_structure(request: StructureRequest):
     if predictor is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
-    image_b64, success, error = predictor.smiles_to_image(request.smiles, request.size)
+    image_b64, success, error = await render_executor.run(
+        predictor.smiles_to_image, request.smiles, request.size
+    )
     return StructureResponse(
         structure_base64=image_b64,
         success=success,
@@ -0,0 +1,109 @@
+"""
+Inference-only deployment artifact exported from a training checkpoint.
+
+export_model.py writes:
+
+    <dir>/model.pt      the model state_dict only (no optimizer or training state),
+                        contiguous tensors in torch's zip format, loadable with mmap
+    <dir>/model.json    model hyperparameters, fingerprint/size/mtime of the source
+                        checkpoint, export metadata
+
+Loading memory-maps the weights and assigns them to the module instead of
+unpickling and copying the full training checkpoint, and reuses the stored
+fingerprint instead of hashing the checkpoint on every start.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Type
+
+import torch
+from torch import nn
+
+ARTIFACT_VERSION = 1
+
+
+def _paths(artifact_dir: str):
+    return os.path.join(artifact_dir, "model.pt"), os.path.join(artifact_dir, "model.json")
+
+
+def export_artifact(checkpoint_path: str, artifact_dir: str, model_cls: Type[nn.Module],
+                    model_params: Dict[str, Any], model_hash: str) -> Dict[str, Any]:
+    """
+    Write the inference artifact of a training checkpoint.
+
+    Args:
+        checkpoint_path: Training checkpoint with a "model_state_dict" entry
+        artifact_dir: Output directory (created if needed)
+        model_cls: Model class, used to check the weights load strictly before writing
+        model_params: Constructor arguments of `model_cls`
+        model_hash: Fingerprint of the checkpoint (see result_store.checkpoint_fingerprint)
+
+    Returns:
+        The written metadata
+    """
+    checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+    state = {name: tensor.detach().contiguous() for name, tensor in checkpoint["model_state_dict"].items()}
+    model_cls(**model_params).load_state_dict(state)
+
+    stat = os.stat(checkpoint_path)
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'model_hash': model_hash,
+        'model_params': {k: list(v) if isinstance(v, tuple) else v for k, v in model_params.items()},
+        'source_checkpoint': os.path.basename(checkpoint_path),
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'parameters': sum(tensor.numel() for tensor in state.values()),
+        'torch_version': torch.__version__,
+        'exported_at': time.time(),
+    }
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    weights_path, meta_path = _paths(artifact_dir)
+    torch.save(state, weights_path + ".tmp")
+    os.replace(weights_path + ".tmp", weights_path)
+    # Metadata last: an artifact without it is ignored
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    return meta
+
+
+def read_artifact_meta(artifact_dir: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Metadata of an exported artifact, or None if there is none (or it is from another format version)."""
+    if not artifact_dir:
+        return None
+    weights_path, meta_path = _paths(artifact_dir)
+    if not os.path.exists(weights_path):
+        return None
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == ARTIFACT_VERSION else None
+
+
+def artifact_is_current(meta: Dict[str, Any], checkpoint_path: str) -> bool:
+    """
+    Whether an artifact was exported from the checkpoint at `checkpoint_path`.
+    An image shipping only the artifact (no checkpoint) uses it as is.
+    """
+    try:
+        stat = os.stat(checkpoint_path)
+    except FileNotFoundError:
+        return True
+    return stat.st_size == meta['source_size'] and stat.st_mtime_ns == meta['source_mtime_ns']
+
+
+def load_artifact(artifact_dir: str, model_cls: Type[nn.Module], meta: Dict[str, Any]) -> nn.Module:
+    """Build the model with its weights memory-mapped from the artifact (on CPU; move it afterwards)."""
+    weights_path, _ = _paths(artifact_dir)
+    state = torch.load(weights_path, map_location="cpu", mmap=True, weights_only=True)
+    params = {k: tuple(v) if isinstance(v, list) else v for k, v in meta['model_params'].items()}
+    model = model_cls(**params)
+    # assign=True keeps the mapped tensors instead of copying them into fresh parameters
+    model.load_state_dict(state, assign=True)
+    return model
@@ -0,0 +1,171 @@
+"""
+Checkpoints served side by side, loaded on first use.
+
+Every <root>/<name>/checkpoint_best.pt is a model that requests select by
+<name>. A model is loaded the first time it is asked for and stays resident
+while the estimated footprints of all resident models fit the memory budget;
+past it, the least recently used models that no request is holding are closed
+and dropped, and load again on their next use. The default model is pinned
+and never evicted.
+
+Models are opaque to the registry: the caller supplies how to load, weigh and
+close one, so each model keeps its own caches.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+CHECKPOINT_NAME = "checkpoint_best.pt"
+
+
+class UnknownModelError(KeyError):
+    """No checkpoint with the requested model name."""
+
+
+class _Resident:
+    def __init__(self, model: Any, nbytes: int):
+        self.model = model
+        self.nbytes = nbytes
+        self.users = 0
+
+
+class ModelRegistry:
+    """Thread-safe, memory-budgeted LRU of lazily loaded models."""
+
+    def __init__(self, root: Optional[str], default_name: str, default_model: Any,
+                 load: Callable[[str, str], Any], sizeof: Callable[[Any], int],
+                 close: Callable[[Any], None], max_bytes: int):
+        """
+        Args:
+            root: Directory whose subdirectories hold checkpoints (None: only the default model)
+            default_name: Name of the already loaded default model
+            default_model: The default model, used for requests without a model name
+            load: Builds a model from (name, checkpoint path)
+            sizeof: Estimated resident bytes of a model, re-measured whenever a request releases it
+            close: Releases an evicted model's resources
+            max_bytes: Memory budget for all resident models, the default one included
+        """
+        self.root = root
+        self.default_name = default_name
+        self.max_bytes = max_bytes
+        self._load = load
+        self._sizeof = sizeof
+        self._close = close
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._default = _Resident(default_model, sizeof(default_model))
+        self._resident: "OrderedDict[str, _Resident]" = OrderedDict()
+        self.loads = 0
+        self.evictions = 0
+
+    def checkpoints(self) -> Dict[str, str]:
+        """Model name -> checkpoint path of every checkpoint under the root"""
+        found = {}
+        if self.root and os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, name, CHECKPOINT_NAME)
+                if os.path.isfile(path):
+                    found[name] = path
+        return found
+
+    def names(self) -> List[str]:
+        return list(dict.fromkeys([self.default_name, *self.checkpoints()]))
+
+    def check(self, name: Optional[str]) -> None:
+        """Raise UnknownModelError unless `name` is servable (None: the default model)"""
+        if name is not None and name != self.default_name and name not in self.checkpoints():
+            raise UnknownModelError(name)
+
+    @contextmanager
+    def use(self, name: Optional[str]) -> Iterator[Any]:
+        """
+        The named model (None: the default), loaded if needed. It is not evicted
+        before the block exits.
+        """
+        entry = self._acquire(name)
+        try:
+            yield entry.model
+        finally:
+            # A model's footprint grows as it is used (e.g. panels loaded on first use)
+            nbytes = self._sizeof(entry.model)
+            with self._lock:
+                entry.nbytes = nbytes
+                entry.users -= 1
+                victims = self._pick_victims()
+            self._close_all(victims)
+
+    def _acquire(self, name: Optional[str]) -> _Resident:
+        if name is None or name == self.default_name:
+            with self._lock:
+                self._default.users += 1
+            return self._default
+        with self._lock:
+            entry = self._take(name)
+            if entry is not None:
+                return entry
+            loading = self._loading.setdefault(name, threading.Lock())
+        # One load per model; concurrent requests for it wait and then share it
+        with loading:
+            with self._lock:
+                entry = self._take(name)
+                if entry is not None:
+                    return entry
+            path = self.checkpoints().get(name)
+            if path is None:
+                raise UnknownModelError(name)
+            model = self._load(name, path)
+            entry = _Resident(model, self._sizeof(model))
+            entry.users = 1
+            with self._lock:
+                self._resident[name] = entry
+                self.loads += 1
+                victims = self._pick_victims()
+            self._close_all(victims)
+            return entry
+
+    def _take(self, name: str) -> Optional[_Resident]:
+        entry = self._resident.get(name)
+        if entry is not None:
+            self._resident.move_to_end(name)
+            entry.users += 1
+        return entry
+
+    def _resident_bytes(self) -> int:
+        return self._default.nbytes + sum(entry.nbytes for entry in self._resident.values())
+
+    def _pick_victims(self) -> List[Any]:
+        """Drop idle models, least recently used first, until the budget holds (lock held)"""
+        victims = []
+        for name in list(self._resident):
+            if self._resident_bytes() <= self.max_bytes:
+                break
+            if self._resident[name].users == 0:
+                victims.append(self._resident.pop(name).model)
+                self.evictions += 1
+                print(f"[INFO] Evicted model {name}")
+        return victims
+
+    def _close_all(self, models: List[Any]) -> None:
+        for model in models:
+            self._close(model)
+
+    def clear(self) -> None:
+        """Close every resident model but the default one"""
+        with self._lock:
+            models = [entry.model for entry in self._resident.values()]
+            self._resident.clear()
+        self._close_all(models)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'default': self.default_name,
+                'resident': [self.default_name, *self._resident],
+                'resident_bytes': self._resident_bytes(),
+                'max_bytes': self.max_bytes,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
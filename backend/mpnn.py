@@ -1,6 +1,7 @@
 import math
 import torch
 from torch import nn
+import torch.nn.functional as F
 from torch_geometric.nn import MessagePassing, Set2Set
 from torch_geometric.utils import to_dense_batch
 
@@ -22,10 +23,61 @@ class EdgeNetwork(nn.Module):
             nn.Linear(edge_mlp_hidden, hidden_dim * hidden_dim),
         )
 
+        # Inference-only lookup table of per-bond-type weights, see build_lookup
+        self.register_buffer("weight_table", None, persistent=False)
+
     def forward(self, edge_attr: torch.Tensor) -> torch.Tensor:
         W = self.mlp(edge_attr)  # (E, H*H)
         return W.view(-1, self.hidden_dim, self.hidden_dim)  # (E, H, H)
 
+    @torch.no_grad()
+    def build_lookup(self, bond_feature_table: torch.Tensor) -> None:
+        """
+        Precompute weights for every possible bond feature row (K, edge_dim) -> (K, H, H).
+        Must be rebuilt whenever the MLP weights change.
+        """
+        param = self.mlp[0].weight
+        self.weight_table = self.forward(bond_feature_table.to(device=param.device, dtype=param.dtype))
+
+    def clear_lookup(self) -> None:
+        self.weight_table = None
+
+    @staticmethod
+    def group_edges(edge_type: torch.Tensor) -> list:
+        """Split edge ids by bond type once, so every message-passing step can reuse them."""
+        order = torch.argsort(edge_type)
+        types, counts = torch.unique_consecutive(edge_type[order], return_counts=True)
+        return list(zip(types.tolist(), torch.split(order, counts.tolist())))
+
+    def typed_messages(self, h_j: torch.Tensor, edge_groups: list) -> torch.Tensor:
+        """Per-edge messages W[type] @ h_j as one (E_k, H) x (H, H) matmul per bond type."""
+        msg = h_j.new_empty(h_j.size(0), self.hidden_dim)
+        for bond_type, idx in edge_groups:
+            msg[idx] = h_j[idx] @ self.weight_table[bond_type].t()
+        return msg
+
+
+def segment_pair_index(solute_batch: torch.Tensor, solvent_batch: torch.Tensor, num_pairs: int):
+    """
+    Atom indices (ii, jj) of every (solute atom, solvent atom) entry of a ragged
+    interaction map, pair by pair: K = sum_b Ns[b] * Nv[b] entries.
+    Assumes the batch vectors are sorted, as produced by PyG collation.
+    """
+    device = solute_batch.device
+    counts_s = torch.bincount(solute_batch, minlength=num_pairs)   # (B,)
+    counts_v = torch.bincount(solvent_batch, minlength=num_pairs)  # (B,)
+    ptr_s = counts_s.cumsum(0) - counts_s
+    ptr_v = counts_v.cumsum(0) - counts_v
+
+    # Atom-pair index k -> (pair b, solute atom i, solvent atom j)
+    pair_sizes = counts_s * counts_v
+    pair = torch.repeat_interleave(torch.arange(num_pairs, device=device), pair_sizes)  # (K,)
+    local = torch.arange(pair.numel(), device=device) - (pair_sizes.cumsum(0) - pair_sizes)[pair]
+    nv = counts_v[pair]
+    ii = ptr_s[pair] + torch.div(local, nv, rounding_mode="floor")
+    jj = ptr_v[pair] + local % nv
+    return ii, jj
+
 
 # =========================
 # One GGNN update "cell"
@@ -36,8 +88,14 @@ class GGNNCell(MessagePassing):
         self.edge_network = EdgeNetwork(edge_dim, hidden_dim, edge_mlp_hidden=edge_mlp_hidden)
         self.gru = nn.GRUCell(hidden_dim, hidden_dim)
 
-    def forward(self, h: torch.Tensor, edge_index: torch.Tensor, edge_attr: torch.Tensor) -> torch.Tensor:
+    def forward(self, h: torch.Tensor, edge_index: torch.Tensor, edge_attr: torch.Tensor,
+                edge_groups: list = None) -> torch.Tensor:
         # h: (N, H)
+        if edge_groups is not None:
+            # Lookup-table path: gather source states, one matmul per bond type, sum at targets
+            msg = self.edge_network.typed_messages(h[edge_index[0]], edge_groups)  # (E, H)
+            aggr_out = torch.zeros_like(h).index_add_(0, edge_index[1], msg)      # (N, H)
+            return self.update(aggr_out, h)
         return self.propagate(edge_index, h=h, edge_attr=edge_attr)
 
     def message(self, h_j: torch.Tensor, edge_attr: torch.Tensor) -> torch.Tensor:
@@ -64,10 +122,16 @@ class GGNNEncoder(nn.Module):
         self.cell = GGNNCell(hidden_dim, edge_dim, edge_mlp_hidden=edge_mlp_hidden)
         self.mp_steps = mp_steps
 
-    def forward(self, x: torch.Tensor, edge_index: torch.Tensor, edge_attr: torch.Tensor) -> torch.Tensor:
+    def forward(self, x: torch.Tensor, edge_index: torch.Tensor, edge_attr: torch.Tensor,
+                edge_type: torch.Tensor = None) -> torch.Tensor:
+        # Use the precomputed edge weights in eval mode when the featurizer emitted bond type ids
+        edge_groups = None
+        if edge_type is not None and self.cell.edge_network.weight_table is not None and not self.training:
+            edge_groups = self.cell.edge_network.group_edges(edge_type)
+
         h = self.node_proj(x)
         for _ in range(self.mp_steps):
-            h = self.cell(h, edge_index, edge_attr)
+            h = self.cell(h, edge_index, edge_attr, edge_groups=edge_groups)
         return h
 
 
@@ -90,6 +154,8 @@ class SolubilityModel(nn.Module):
         super().__init__()
         self.hidden_dim = hidden_dim
         self.scale_interaction = scale_interaction
+        # "dense" (padded bmm, as trained) or "segment" (padding-free, same result)
+        self.interaction_kernel = "dense"
 
         # Shared encoder for solute+solvent (keeps params down, usually improves OOD-by-solute)
         self.encoder = GGNNEncoder(
@@ -112,21 +178,49 @@ class SolubilityModel(nn.Module):
         layers += [nn.Linear(prev, 1)]
         self.mlp = nn.Sequential(*layers)
 
-    def forward(self, solute, solvent, temperature: torch.Tensor) -> torch.Tensor:
-        # Encode graphs
-        h_s = self.encoder(solute.x, solute.edge_index, solute.edge_attr)    # (Ns_total, H)
-        h_v = self.encoder(solvent.x, solvent.edge_index, solvent.edge_attr) # (Nv_total, H)
-
-        # Build per-pair dense batches (prevents cross-sample leakage)
-        Hs, ms = to_dense_batch(h_s, solute.batch)   # (B, Ns_max, H), (B, Ns_max)
-        Hv, mv = to_dense_batch(h_v, solvent.batch)  # (B, Nv_max, H), (B, Nv_max)
+    def build_edge_lookup(self, bond_feature_table: torch.Tensor) -> None:
+        """Switch eval-mode message passing to precomputed per-bond-type edge weights."""
+        self.encoder.cell.edge_network.build_lookup(bond_feature_table)
 
-        B_s = int(solute.batch.max().item()) + 1 if solute.batch.numel() else 0
-        B_v = int(solvent.batch.max().item()) + 1 if solvent.batch.numel() else 0
+    def encode_pair(self, solute, solvent) -> torch.Tensor:
+        """Temperature-independent part of the model: encoder, interaction map and Set2Set."""
+        # Encode graphs
+        h_s = self.encoder(solute.x, solute.edge_index, solute.edge_attr,
+                           getattr(solute, "edge_type", None))    # (Ns_total, H)
+        h_v = self.encoder(solvent.x, solvent.edge_index, solvent.edge_attr,
+                           getattr(solvent, "edge_type", None))   # (Nv_total, H)
+        return self.interact(h_s, solute.batch, h_v, solvent.batch)
+
+    def interact(self, h_s: torch.Tensor, solute_batch: torch.Tensor,
+                 h_v: torch.Tensor, solvent_batch: torch.Tensor) -> torch.Tensor:
+        """
+        Interaction map and Set2Set readout over already-encoded atom states.
+
+        Split out of encode_pair so callers holding cached encoder outputs can skip
+        the GGNN encoder entirely.
+        """
+        B_s = int(solute_batch.max().item()) + 1 if solute_batch.numel() else 0
+        B_v = int(solvent_batch.max().item()) + 1 if solvent_batch.numel() else 0
         if B_s != B_v:
             raise ValueError(f"Batch size mismatch: solute B={B_s}, solvent B={B_v}. "
                              "Ensure solute and solvent batches are aligned per sample.")
 
+        if self.interaction_kernel == "segment":
+            mapped_s, mapped_v = self._interaction_segment(h_s, solute_batch, h_v, solvent_batch, B_s)
+        else:
+            mapped_s, mapped_v = self._interaction_dense(h_s, solute_batch, h_v, solvent_batch)
+
+        solute_vec = self.set2set_solute(mapped_s, solute_batch)   # (B, 2H)
+        solvent_vec = self.set2set_solvent(mapped_v, solvent_batch) # (B, 2H)
+
+        return torch.cat([solute_vec, solvent_vec], dim=-1)  # (B, 4H)
+
+    def _interaction_dense(self, h_s, solute_batch, h_v, solvent_batch):
+        """Interaction map over zero-padded (B, N_max, H) tensors."""
+        # Build per-pair dense batches (prevents cross-sample leakage)
+        Hs, ms = to_dense_batch(h_s, solute_batch)   # (B, Ns_max, H), (B, Ns_max)
+        Hv, mv = to_dense_batch(h_v, solvent_batch)  # (B, Nv_max, H), (B, Nv_max)
+
         # Interaction map per sample: I[b] = Hs[b] @ Hv[b]^T
         I = torch.bmm(Hs, Hv.transpose(1, 2))  # (B, Ns_max, Nv_max)
         if self.scale_interaction:
@@ -136,16 +230,86 @@ class SolubilityModel(nn.Module):
         mapped_v = torch.bmm(I.transpose(1, 2), Hs) # (B, Nv_max, H)
 
         # Flatten back to (N_total, H) in original order using masks
-        mapped_s = mapped_s[ms]  # (Ns_total, H)
-        mapped_v = mapped_v[mv]  # (Nv_total, H)
-
-        solute_vec = self.set2set_solute(mapped_s, solute.batch)   # (B, 2H)
-        solvent_vec = self.set2set_solvent(mapped_v, solvent.batch) # (B, 2H)
+        return mapped_s[ms], mapped_v[mv]  # (Ns_total, H), (Nv_total, H)
+
+    def _interaction_segment(self, h_s, solute_batch, h_v, solvent_batch, num_pairs: int):
+        """
+        Same interaction map computed over the ragged atom layout, without padding.
+
+        Enumerates only the real (solute atom, solvent atom) pairs of each sample,
+        K = sum_b Ns[b] * Nv[b] entries, instead of B * Ns_max * Nv_max.
+        Assumes the batch vectors are sorted, as produced by PyG collation.
+        """
+        ii, jj = segment_pair_index(solute_batch, solvent_batch, num_pairs)
+        hs_k, hv_k = h_s[ii], h_v[jj]  # (K, H)
+        I = (hs_k * hv_k).sum(-1, keepdim=True)  # (K, 1)
+        if self.scale_interaction:
+            I = I / math.sqrt(self.hidden_dim)
 
-        t = temperature.view(-1, 1).to(solute_vec.dtype)  # (B, 1)
-        final = torch.cat([solute_vec, solvent_vec, t], dim=-1)    # (B, 4H+1)
+        mapped_s = torch.zeros_like(h_s).index_add_(0, ii, I * hv_k)  # (Ns_total, H)
+        mapped_v = torch.zeros_like(h_v).index_add_(0, jj, I * hs_k)  # (Nv_total, H)
+        return mapped_s, mapped_v
+
+    def head(self, pair_vec: torch.Tensor, temperature: torch.Tensor) -> torch.Tensor:
+        """
+        MLP head over pair vectors for one or many temperatures per pair.
+
+        The first linear layer is split into its pair and temperature columns, so the
+        pair projection is computed once and every temperature is a broadcast add.
+
+        Args:
+            pair_vec: (B, 4H) output of encode_pair
+            temperature: (B,), (B, T) or (1, T) temperatures in Kelvin
+
+        Returns:
+            (B, T) normalized predictions (T=1 for one temperature per pair)
+        """
+        first = self.mlp[0]
+        w_pair, w_t = first.weight[:, :-1], first.weight[:, -1]  # (D, 4H), (D,)
+        z = F.linear(pair_vec, w_pair, first.bias)                 # (B, D)
+
+        t = temperature.to(z.dtype)
+        if t.dim() == 1:
+            t = t.view(-1, 1)
+        z = z.unsqueeze(1) + t.unsqueeze(-1) * w_t               # (B, T, D)
+
+        return self.mlp[1:](z).squeeze(-1)                        # (B, T)
+
+    def head_samples(self, pair_vec: torch.Tensor, temperature: torch.Tensor, samples: int,
+                     generator: torch.Generator = None) -> torch.Tensor:
+        """
+        Monte Carlo dropout over the MLP head: `samples` stochastic passes as one batch.
+
+        The pair projection of the first layer is computed once and broadcast to a
+        (K, B, T, D) tensor; every dropout layer then draws an independent mask per
+        sample, whatever the module's train/eval mode.
+
+        Args:
+            pair_vec: (B, 4H) output of encode_pair
+            temperature: (B, T) or (1, T) temperatures in Kelvin
+            samples: Number of passes K
+            generator: Optional RNG for reproducible masks
+
+        Returns:
+            (K, B, T) normalized predictions
+        """
+        first = self.mlp[0]
+        w_pair, w_t = first.weight[:, :-1], first.weight[:, -1]
+        z = F.linear(pair_vec, w_pair, first.bias)                 # (B, D)
+        z = z.unsqueeze(1) + temperature.to(z.dtype).unsqueeze(-1) * w_t  # (B, T, D)
+        z = z.unsqueeze(0).expand(samples, *z.shape)               # (K, B, T, D)
+
+        for layer in self.mlp[1:]:
+            if isinstance(layer, nn.Dropout):
+                keep = torch.empty_like(z).bernoulli_(1 - layer.p, generator=generator)
+                z = z * keep / (1 - layer.p)
+            else:
+                z = layer(z)
+        return z.squeeze(-1)                                       # (K, B, T)
 
-        return self.mlp(final)  # (B, 1)
+    def forward(self, solute, solvent, temperature: torch.Tensor) -> torch.Tensor:
+        pair_vec = self.encode_pair(solute, solvent)             # (B, 4H)
+        return self.head(pair_vec, temperature.view(-1, 1))     # (B, 1)
 
 
 # ======================
@@ -211,6 +375,34 @@ def get_model_params(add_partial_charges: bool = False, model_size: str = "defau
         return MODEL_PARAMS_WITH_CHARGES.copy()
     return MODEL_PARAMS.copy()
 
+
+def infer_model_params(state_dict: dict) -> dict:
+    """Get model parameters of a SolubilityModel state_dict.
+    
+    Dimensions are read from the weight shapes. mp_steps, s2s_steps, dropout and
+    scale_interaction leave no trace in the weights; they are taken from the
+    preset with the same hidden_dim (the default preset if none matches).
+    
+    Args:
+        state_dict: SolubilityModel state_dict (e.g. checkpoint["model_state_dict"])
+        
+    Returns:
+        Dictionary of model parameters
+    """
+    hidden_dim, node_dim = state_dict["encoder.node_proj.weight"].shape
+    edge_mlp_hidden, edge_dim = state_dict["encoder.cell.edge_network.mlp.0.weight"].shape
+    linear = sorted(int(name.split(".")[1]) for name in state_dict
+                    if name.startswith("mlp.") and name.endswith(".weight"))
+    preset = next((p for p in (MODEL_PARAMS, MODEL_PARAMS_LARGE) if p["hidden_dim"] == hidden_dim), MODEL_PARAMS)
+    return dict(
+        preset,
+        node_dim=int(node_dim),
+        edge_dim=int(edge_dim),
+        hidden_dim=int(hidden_dim),
+        edge_mlp_hidden=int(edge_mlp_hidden),
+        mlp_dims=tuple(int(state_dict[f"mlp.{i}.weight"].shape[0]) for i in linear[:-1]),
+    )
+
 TRAINING_PARAMS = dict(
     optimizer="AdamW",
     lr=2e-3,
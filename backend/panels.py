@@ -0,0 +1,295 @@
+"""
+Named solvent panels, registered once and kept pre-encoded.
+
+A panel is an ordered list of (display name, SMILES) solvents. At registration
+each solvent is canonicalized, featurized and encoded once; the encoder states
+are held in one contiguous (total atoms, H) buffer that every solvent's entry
+views into, pinned in memory outside the encoder cache, and saved next to the
+panel definition so restarts only reload them. Encodings are tied to the model
+checkpoint they were computed with and are recomputed if it changes.
+
+Several server processes can share the panel directory: a process notices
+panels registered, replaced or deleted by another one when it next looks
+the panel up. Files are written under a per-panel file lock and moved into
+place complete, encodings before the definition.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import torch
+
+from cache import EncodedMolecule
+
+PANEL_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SolventPanel:
+    """An ordered solvent list plus the pinned encoder states of its solvents."""
+
+    def __init__(self, panel_id: str, names: Sequence[str], smiles: Sequence[str],
+                 canonical: Sequence[str], h: torch.Tensor, counts: Sequence[int]):
+        """
+        Args:
+            panel_id: Panel name used in requests
+            names: Display names, one per solvent
+            smiles: SMILES as registered
+            canonical: RDKit canonical SMILES, aligned with `smiles`
+            h: Encoder states of the distinct canonical solvents, concatenated (total atoms, H)
+            counts: Atom count of each distinct canonical solvent, in order of first appearance
+        """
+        self.panel_id = panel_id
+        self.names = list(names)
+        self.smiles = list(smiles)
+        self.canonical = list(canonical)
+        self.h = h
+        distinct = list(dict.fromkeys(self.canonical))
+        self.encoded: Dict[str, EncodedMolecule] = {
+            smiles: EncodedMolecule(None, h_mol)
+            for smiles, h_mol in zip(distinct, torch.split(h, list(counts)))
+        }
+
+    def __len__(self) -> int:
+        return len(self.smiles)
+
+    @property
+    def nbytes(self) -> int:
+        return self.h.element_size() * self.h.nelement()
+
+    def summary(self) -> dict:
+        return {'panel_id': self.panel_id, 'size': len(self), 'encoded_bytes': self.nbytes}
+
+    def solvents(self) -> List[dict]:
+        return [{'name': name, 'smiles': smiles} for name, smiles in zip(self.names, self.smiles)]
+
+
+class PanelRegistry:
+    """Thread-safe set of solvent panels persisted under a directory."""
+
+    def __init__(self, root: Optional[str], model_hash: str,
+                 canonicalize: Callable[[List[str]], Dict[str, Optional[str]]],
+                 encode: Callable[[List[str]], Dict[str, EncodedMolecule]],
+                 device: torch.device):
+        """
+        Args:
+            root: Directory for panel definitions and encodings (None keeps panels in memory only)
+            model_hash: Checkpoint fingerprint the stored encodings must match
+            canonicalize: Maps SMILES to canonical SMILES (None if invalid)
+            encode: Maps canonical SMILES to encoder states (absent if featurization fails)
+            device: Device stored encodings are loaded onto
+        """
+        self.root = root
+        self.model_hash = model_hash
+        self.canonicalize = canonicalize
+        self.encode = encode
+        self.device = device
+        self._panels: Dict[str, SolventPanel] = {}
+        # Definition file mtime of each persisted panel when it was loaded
+        self._mtimes: Dict[str, int] = {}
+        # Bumped whenever the set of panels changes
+        self.version = 0
+        self._lock = threading.Lock()
+        if root is not None:
+            os.makedirs(root, exist_ok=True)
+
+    def _paths(self, panel_id: str) -> Tuple[str, str]:
+        return (os.path.join(self.root, f"{panel_id}.json"),
+                os.path.join(self.root, f"{panel_id}.{self.model_hash[:16]}.pt"))
+
+    @contextmanager
+    def _file_lock(self, panel_id: str) -> Iterator[None]:
+        """Exclusive lock on a panel's files, across the processes sharing the directory"""
+        with open(os.path.join(self.root, f"{panel_id}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _replace(path: str, write: Callable[[str], None]) -> None:
+        """Write through a process-unique temporary file, then move it into place"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _save_encodings(self, panel: SolventPanel, counts: List[int]) -> None:
+        # The SMILES tie the encodings to the definition they were computed for
+        state = {'smiles': panel.smiles, 'canonical': panel.canonical, 'h': panel.h.cpu(), 'counts': counts}
+        self._replace(self._paths(panel.panel_id)[1], lambda path: torch.save(state, path))
+
+    def register(self, panel_id: str, solvents: Sequence[Tuple[str, str]],
+                 persist: bool = True) -> SolventPanel:
+        """
+        Canonicalize and encode a panel's solvents, then make it available (replacing any
+        panel with the same id).
+
+        Args:
+            panel_id: Panel name
+            solvents: (display name, SMILES) pairs
+            persist: Save the definition and encodings under the registry directory
+
+        Raises:
+            ValueError: If the id is malformed or a solvent cannot be parsed or encoded
+        """
+        panel, counts = self._build(panel_id, solvents)
+        mtime = None
+        if persist and self.root is not None:
+            definition_path, _ = self._paths(panel_id)
+            definition = {'names': panel.names, 'smiles': panel.smiles}
+            with self._file_lock(panel_id):
+                # Encodings first: other processes pick a panel up by its definition file
+                self._save_encodings(panel, counts)
+                self._replace(definition_path, lambda path: self._write_json(path, definition))
+                mtime = os.stat(definition_path).st_mtime_ns
+
+        with self._lock:
+            self._panels[panel_id] = panel
+            if mtime is not None:
+                self._mtimes[panel_id] = mtime
+            self.version += 1
+        return panel
+
+    @staticmethod
+    def _write_json(path: str, value: dict) -> None:
+        with open(path, "w") as f:
+            json.dump(value, f)
+
+    def _build(self, panel_id: str, solvents: Sequence[Tuple[str, str]]) -> Tuple[SolventPanel, List[int]]:
+        """Canonicalize and encode a panel's solvents: the panel and its solvents' atom counts."""
+        if not PANEL_ID_PATTERN.match(panel_id):
+            raise ValueError(f"Invalid panel id: {panel_id!r} (letters, digits, '-' and '_' only)")
+        names = [name for name, _ in solvents]
+        smiles = [smi for _, smi in solvents]
+        canonical_map = self.canonicalize(smiles)
+        invalid = [smi for smi in smiles if canonical_map[smi] is None]
+        if invalid:
+            raise ValueError(f"Invalid solvent SMILES: {', '.join(invalid[:10])}")
+        canonical = [canonical_map[smi] for smi in smiles]
+
+        distinct = list(dict.fromkeys(canonical))
+        encoded = self.encode(distinct)
+        failed = [smi for smi in distinct if smi not in encoded]
+        if failed:
+            raise ValueError(f"Could not featurize solvents: {', '.join(failed[:10])}")
+
+        h = torch.cat([encoded[smi].h for smi in distinct], dim=0)
+        counts = [encoded[smi].num_atoms for smi in distinct]
+        return SolventPanel(panel_id, names, smiles, canonical, h, counts), counts
+
+    def _load(self, panel_id: str) -> Optional[SolventPanel]:
+        """
+        Load a persisted panel. Without encodings of its current definition for this
+        checkpoint, it is encoded once under the panel's file lock (other processes
+        wait and then load the result) and only the encodings are written.
+        """
+        definition_path, encoding_path = self._paths(panel_id)
+        try:
+            with self._file_lock(panel_id):
+                mtime = os.stat(definition_path).st_mtime_ns
+                with open(definition_path) as f:
+                    definition = json.load(f)
+                state = None
+                if os.path.exists(encoding_path):
+                    state = torch.load(encoding_path, map_location=self.device, weights_only=True)
+                # Encodings saved before they recorded their SMILES are taken as current
+                if state is not None and state.get('smiles', definition['smiles']) == definition['smiles']:
+                    panel = SolventPanel(panel_id, definition['names'], definition['smiles'],
+                                         state['canonical'], state['h'], state['counts'])
+                else:
+                    # Missing, or left over from a replaced definition
+                    panel, counts = self._build(panel_id, list(zip(definition['names'], definition['smiles'])))
+                    self._save_encodings(panel, counts)
+        except FileNotFoundError:
+            return None  # deleted meanwhile
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            print(f"[WARN] Could not load solvent panel {panel_id}: {e}")
+            return None
+        with self._lock:
+            self._panels[panel_id] = panel
+            self._mtimes[panel_id] = mtime
+            self.version += 1
+        return panel
+
+    def load_all(self) -> List[str]:
+        """Load every persisted panel. Returns the ids of the loaded panels."""
+        if self.root is None:
+            return []
+        loaded = []
+        for filename in sorted(os.listdir(self.root)):
+            if filename.endswith(".json") and self._load(filename[:-len(".json")]) is not None:
+                loaded.append(filename[:-len(".json")])
+        return loaded
+
+    def get(self, panel_id: str) -> Optional[SolventPanel]:
+        """Look a panel up, picking up changes another process made on disk."""
+        with self._lock:
+            panel = self._panels.get(panel_id)
+            persisted = panel_id in self._mtimes
+        if self.root is None or (panel is not None and not persisted):
+            return panel  # in-memory only (e.g. built in)
+        if not PANEL_ID_PATTERN.match(panel_id):
+            return None
+
+        try:
+            mtime = os.stat(self._paths(panel_id)[0]).st_mtime_ns
+        except FileNotFoundError:
+            if panel is not None:
+                # Deleted by another process
+                with self._lock:
+                    self._panels.pop(panel_id, None)
+                    self._mtimes.pop(panel_id, None)
+                    self.version += 1
+            return None
+        if panel is not None and self._mtimes.get(panel_id) == mtime:
+            return panel
+        return self._load(panel_id)
+
+    def list(self) -> List[SolventPanel]:
+        if self.root is not None:
+            on_disk = [filename[:-len(".json")] for filename in os.listdir(self.root) if filename.endswith(".json")]
+            with self._lock:
+                known = list(self._panels)
+            for panel_id in dict.fromkeys(known + on_disk):
+                self.get(panel_id)
+        with self._lock:
+            return list(self._panels.values())
+
+    def delete(self, panel_id: str) -> bool:
+        panel = self.get(panel_id)
+        with self._lock:
+            self._panels.pop(panel_id, None)
+            self._mtimes.pop(panel_id, None)
+            self.version += 1
+        if panel is None:
+            return False
+        if self.root is not None:
+            with self._file_lock(panel_id):
+                for filename in os.listdir(self.root):
+                    if filename.startswith(f"{panel_id}.") and filename != f"{panel_id}.lock":
+                        os.remove(os.path.join(self.root, filename))
+        return True
+
+    def nbytes(self) -> int:
+        """Memory held by the encoder states of the loaded panels"""
+        with self._lock:
+            return sum(panel.nbytes for panel in self._panels.values())
+
+    def pinned(self) -> Tuple[Dict[str, EncodedMolecule], Dict[str, str]]:
+        """
+        Encoder states of the solvents of all loaded panels, and their SMILES -> canonical
+        SMILES map. Panels on disk that were never looked up are not loaded for this.
+        """
+        encoded: Dict[str, EncodedMolecule] = {}
+        canonical: Dict[str, str] = {}
+        with self._lock:
+            panels = list(self._panels.values())
+        for panel in panels:
+            encoded.update(panel.encoded)
+            canonical.update(zip(panel.smiles, panel.canonical))
+        return encoded, canonical
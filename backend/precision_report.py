@@ -0,0 +1,146 @@
+"""
+Accuracy and speed of the reduced-precision modes (SOL_PRECISION) on this machine.
+
+Scores a reference set of solute/solvent/temperature triples with every
+precision mode of an engine and prints, next to fp32, the throughput gain and
+the max / mean absolute LogS deviation, so a mode can be enabled knowing what
+it costs in accuracy.
+
+Usage:
+    python backend/precision_report.py [--input triples.csv] [--engine eager] [--repeats 5]
+
+The default reference set is a fixed list of solutes x the solvent registry x
+four temperatures; --input takes a CSV/Parquet in the bulk scoring format
+(SMILES_Solute, SMILES_Solvent, Temperature_K).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# Utilities are local to the backend directory
+sys.path.insert(0, str(Path(__file__).parent))
+
+import torch
+from torch_geometric.data import Batch
+
+from bulk_io import detect_format, iter_upload_chunks
+from engines import ENGINES, PRECISIONS, create_engine, run_stages
+from main import (CHECKPOINT_PATH, COMPILE_BACKEND, ENGINES_DIR, SOLVENT_REGISTRY,
+                  SolubilityPredictor)
+
+# Drugs, agrochemicals and small organics spanning the training LogS range
+REFERENCE_SOLUTES = [
+    "CC(=O)Oc1ccccc1C(=O)O",            # aspirin
+    "Cn1cnc2c1c(=O)n(C)c(=O)n2C",       # caffeine
+    "CC(C)Cc1ccc(cc1)C(C)C(=O)O",       # ibuprofen
+    "CC(=O)Nc1ccc(O)cc1",               # paracetamol
+    "OC(=O)c1ccccc1O",                  # salicylic acid
+    "c1ccc2ccccc2c1",                   # naphthalene
+    "c1ccc2cc3ccccc3cc2c1",             # anthracene
+    "OC(=O)c1ccccc1",                   # benzoic acid
+    "NC(=O)c1cccnc1",                   # nicotinamide
+    "O=C1NC(=O)c2ccccc12",              # phthalimide
+    "Clc1ccc(cc1)C(c1ccc(Cl)cc1)C(Cl)(Cl)Cl",  # DDT
+    "CCOC(=O)c1ccc(N)cc1",              # benzocaine
+    "OCC(O)C(O)C(O)C(O)CO",             # sorbitol
+    "NC(N)=O",                          # urea
+    "CC(C)(C)c1ccc(O)cc1",              # 4-tert-butylphenol
+    "O=C(O)CCCCC(=O)O",                 # adipic acid
+]
+REFERENCE_TEMPERATURES = [273.15, 298.15, 323.15, 348.15]
+
+Triple = Tuple[str, str, float]
+
+
+def default_triples() -> List[Triple]:
+    return [(solute, solvent, temperature)
+            for solute in REFERENCE_SOLUTES
+            for solvent in SOLVENT_REGISTRY.values()
+            for temperature in REFERENCE_TEMPERATURES]
+
+
+def read_triples(path: str) -> List[Triple]:
+    triples = []
+    with open(path, "rb") as f:
+        for rows in iter_upload_chunks(f, detect_format(path, None), 4096):
+            triples.extend((row["solute_smiles"], row["solvent_smiles"], row["temperature_k"])
+                           for row in rows if "error" not in row)
+    return triples
+
+
+def build_workloads(predictor: SolubilityPredictor, triples: List[Triple], batch_size: int) -> List[tuple]:
+    """Aligned (solute batch, solvent batch, (B, 1) temperatures) chunks of the featurizable triples."""
+    smiles = list(dict.fromkeys(s for solute, solvent, _ in triples for s in (solute, solvent)))
+    graphs = dict(zip(smiles, predictor._featurize_many(smiles)))
+    valid = [t for t in triples if graphs[t[0]] is not None and graphs[t[1]] is not None]
+    workloads = []
+    for start in range(0, len(valid), batch_size):
+        chunk = valid[start:start + batch_size]
+        workloads.append((
+            Batch.from_data_list([graphs[solute] for solute, _, _ in chunk]).to(predictor.device),
+            Batch.from_data_list([graphs[solvent] for _, solvent, _ in chunk]).to(predictor.device),
+            torch.tensor([[t] for _, _, t in chunk], dtype=torch.float, device=predictor.device),
+        ))
+    return workloads
+
+
+def score(engine, workloads: List[tuple], repeats: int) -> Tuple[torch.Tensor, float]:
+    """Normalized predictions of all workloads, and the best time of `repeats` full passes."""
+    outputs = [run_stages(engine, *workload) for workload in workloads]  # also warms up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for workload in workloads:
+            run_stages(engine, *workload)
+        best = min(best, time.perf_counter() - start)
+    return torch.cat([output.flatten().float().cpu() for output in outputs]), best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Accuracy and throughput of reduced-precision inference")
+    parser.add_argument("--input", help="CSV/Parquet of reference triples (default: built-in set)")
+    parser.add_argument("--engine", choices=ENGINES, default="eager", help="Engine to run every precision with")
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--batch-size", type=int, default=256, help="Triples per forward pass")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes per mode (best is reported)")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's)")
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    predictor = SolubilityPredictor(str(CHECKPOINT_PATH), engine="eager", precision="fp32")
+    try:
+        triples = read_triples(args.input) if args.input else default_triples()
+        workloads = build_workloads(predictor, triples, args.batch_size)
+        scored = sum(solutes.num_graphs for solutes, _, _ in workloads)
+        print(f"[INFO] {scored} of {len(triples)} triples featurized; engine {args.engine}, "
+              f"{torch.get_num_threads()} thread(s)")
+
+        reference, reference_time = score(
+            create_engine("eager", predictor.model, predictor.device), workloads, args.repeats
+        )
+        print(f"{'mode':<14} {'triples/s':>10} {'speedup':>8} {'max |dLogS|':>12} {'mean |dLogS|':>13}")
+        print(f"{'eager/fp32':<14} {scored / reference_time:>10.0f} {1.0:>7.2f}x {0.0:>12.2e} {0.0:>13.2e}")
+        for precision in args.precisions:
+            if args.engine == "eager" and precision == "fp32":
+                continue
+            label = f"{args.engine}/{precision}"
+            try:
+                engine = create_engine(args.engine, predictor.model, predictor.device,
+                                       str(ENGINES_DIR / predictor.model_hash[:16]), COMPILE_BACKEND, precision)
+                outputs, elapsed = score(engine, workloads, args.repeats)
+            except Exception as e:
+                print(f"{label:<14} unavailable: {e}")
+                continue
+            deviation = (outputs - reference).abs() * predictor.target_std
+            print(f"{label:<14} {scored / elapsed:>10.0f} {reference_time / elapsed:>7.2f}x "
+                  f"{float(deviation.max()):>12.2e} {float(deviation.mean()):>13.2e}")
+    finally:
+        predictor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Persistent on-disk store of prediction results.
+
+Predictions are keyed by (model checkpoint hash, canonical solute SMILES,
+canonical solvent SMILES, temperature) in a local SQLite database, so results
+survive container and Slurm job restarts. The most recently used rows are loaded
+into memory on startup (warm start), and the least recently used rows are
+deleted once the database grows past its size budget. Further checkpoints served
+by the same process read and write through a view of the store (for_model), so
+they share its connection, warm front and budget.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (canonical solute, canonical solvent, temperature in K)
+ResultKey = Tuple[str, str, float]
+
+# SQL variables per lookup statement (3 per key), well below SQLite's limit
+_KEYS_PER_QUERY = 300
+
+
+def _temperature_key(temperature_k: float) -> int:
+    """Temperatures are stored in integer millikelvin so float noise cannot split keys."""
+    return int(round(temperature_k * 1000))
+
+
+def checkpoint_fingerprint(path: str) -> str:
+    """SHA-256 of a checkpoint file, used to scope stored results to one set of weights."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultStore:
+    """SQLite-backed prediction cache with size-based LRU eviction and a warm in-memory front."""
+
+    def __init__(self, path: str, model_hash: str, max_bytes: int, warm_rows: int = 100_000):
+        """
+        Initialize store.
+
+        Args:
+            path: SQLite database file (created if missing, on a mounted volume in Docker)
+            model_hash: Checkpoint fingerprint; results of other checkpoints are never returned
+            max_bytes: Database size budget before least recently used rows are evicted
+            warm_rows: Rows kept in the in-memory front, preloaded on open
+        """
+        self.path = path
+        self.model_hash = model_hash
+        self.max_bytes = max_bytes
+        self.warm_rows = warm_rows
+        self._lock = threading.Lock()
+        # (model, solute, solvent, temperature_mk) -> LogS, for every model using the store
+        self._memory: "OrderedDict[Tuple[str, str, str, int], float]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evicted_rows = 0
+        self._warm_start()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open (or re-open after fork) this process's connection."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " model TEXT NOT NULL, solute TEXT NOT NULL, solvent TEXT NOT NULL,"
+                " temperature_mk INTEGER NOT NULL, logs REAL NOT NULL, last_used INTEGER NOT NULL,"
+                " PRIMARY KEY (model, solute, solvent, temperature_mk)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used)")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def for_model(self, model_hash: str) -> "ModelResults":
+        """This store scoped to another checkpoint's results."""
+        return ModelResults(self, model_hash)
+
+    def _remember(self, key: Tuple[str, str, str, int], logs: float) -> None:
+        self._memory[key] = logs
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.warm_rows:
+            self._memory.popitem(last=False)
+
+    def _warm_start(self) -> None:
+        """Load the most recently used rows of this model into memory."""
+        if self.warm_rows <= 0:
+            return
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT solute, solvent, temperature_mk, logs FROM predictions"
+                " WHERE model = ? ORDER BY last_used DESC LIMIT ?",
+                (self.model_hash, self.warm_rows)
+            ).fetchall()
+            # Insert oldest first so the most recent rows end up most recently used
+            for solute, solvent, temperature_mk, logs in reversed(rows):
+                self._remember((self.model_hash, solute, solvent, temperature_mk), logs)
+
+    def get_many(self, keys: Iterable[ResultKey], model_hash: Optional[str] = None) -> Dict[ResultKey, float]:
+        """
+        Look up stored predictions of `model_hash` (default: the store's checkpoint);
+        keys that are not stored are absent from the result.
+        """
+        model_hash = model_hash or self.model_hash
+        found: Dict[ResultKey, float] = {}
+        disk_lookups: Dict[Tuple[str, str, int], ResultKey] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                stored_key = (key[0], key[1], _temperature_key(key[2]))
+                memory_key = (model_hash,) + stored_key
+                if memory_key in self._memory:
+                    self._memory.move_to_end(memory_key)
+                    found[key] = self._memory[memory_key]
+                else:
+                    disk_lookups[stored_key] = key
+
+            if disk_lookups:
+                conn = self._connection()
+                pending = list(disk_lookups)
+                for start in range(0, len(pending), _KEYS_PER_QUERY):
+                    chunk = pending[start:start + _KEYS_PER_QUERY]
+                    values = ",".join(["(?, ?, ?)"] * len(chunk))
+                    params = [model_hash] + [part for key in chunk for part in key]
+                    rows = conn.execute(
+                        "SELECT solute, solvent, temperature_mk, logs FROM predictions"
+                        f" WHERE model = ? AND (solute, solvent, temperature_mk) IN (VALUES {values})",
+                        params
+                    ).fetchall()
+                    for solute, solvent, temperature_mk, logs in rows:
+                        stored_key = (solute, solvent, temperature_mk)
+                        found[disk_lookups[stored_key]] = logs
+                        self._remember((model_hash,) + stored_key, logs)
+
+                hit_keys = [key for key in disk_lookups if disk_lookups[key] in found]
+                if hit_keys:
+                    now = int(time.time())
+                    conn.executemany(
+                        "UPDATE predictions SET last_used = ?"
+                        " WHERE model = ? AND solute = ? AND solvent = ? AND temperature_mk = ?",
+                        [(now, model_hash) + key for key in hit_keys]
+                    )
+                    conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(disk_lookups) - sum(1 for key in disk_lookups.values() if key in found)
+        return found
+
+    def put_many(self, rows: List[Tuple[str, str, float, float]], model_hash: Optional[str] = None) -> None:
+        """Write through (solute, solvent, temperature_k, logs) predictions of `model_hash` (see get_many)."""
+        if not rows:
+            return
+        model_hash = model_hash or self.model_hash
+        now = int(time.time())
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions"
+                " (model, solute, solvent, temperature_mk, logs, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (model_hash, solute, solvent, _temperature_key(temp), float(logs), now)
+                    for solute, solvent, temp, logs in rows
+                ]
+            )
+            conn.commit()
+            for solute, solvent, temp, logs in rows:
+                self._remember((model_hash, solute, solvent, _temperature_key(temp)), float(logs))
+            self._evict_if_needed(conn)
+
+    def _used_bytes(self, conn: sqlite3.Connection) -> int:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _evict_if_needed(self, conn: sqlite3.Connection) -> None:
+        """Delete least recently used rows (all models) until the database fits its budget."""
+        while self._used_bytes(conn) > self.max_bytes:
+            total = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            if total == 0:
+                break
+            # Drop the oldest 10% per round; freed pages are reused by later inserts
+            batch = max(1, total // 10)
+            conn.execute(
+                "DELETE FROM predictions WHERE (model, solute, solvent, temperature_mk) IN ("
+                " SELECT model, solute, solvent, temperature_mk FROM predictions"
+                " ORDER BY last_used LIMIT ?)",
+                (batch,)
+            )
+            conn.commit()
+            self.evicted_rows += batch
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'memory_rows': len(self._memory),
+                'used_bytes': self._used_bytes(self._connection()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evicted_rows': self.evicted_rows,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class ModelResults:
+    """One checkpoint's results in a ResultStore opened for another (see ResultStore.for_model)."""
+
+    def __init__(self, store: ResultStore, model_hash: str):
+        self.store = store
+        self.model_hash = model_hash
+
+    def get_many(self, keys: Iterable[ResultKey]) -> Dict[ResultKey, float]:
+        return self.store.get_many(keys, self.model_hash)
+
+    def put_many(self, rows: List[Tuple[str, str, float, float]]) -> None:
+        self.store.put_many(rows, self.model_hash)
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+    def close(self) -> None:
+        """The store stays open for its owner."""
@@ -0,0 +1,40 @@
+"""
+Size-aware batch planning for inference.
+Groups similarly sized items into sub-batches whose summed costs stay within budgets.
+"""
+
+from typing import List, Sequence, Tuple
+
+
+def plan_batches(sizes: Sequence[Tuple[int, ...]], limits: Tuple[int, ...]) -> List[List[int]]:
+    """
+    Partition items into size-sorted sub-batches.
+
+    Items are ordered by their first cost (e.g. atom count) so that each sub-batch
+    holds molecules of similar size, then packed greedily until adding the next item
+    would exceed any limit. An item that alone exceeds a limit gets its own sub-batch.
+
+    Args:
+        sizes: Per-item cost tuples, e.g. (num_atoms, num_edges)
+        limits: Maximum summed cost per sub-batch for each cost dimension
+
+    Returns:
+        List of sub-batches, each a list of indices into `sizes`
+    """
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    batches: List[List[int]] = []
+    current: List[int] = []
+    totals = [0] * len(limits)
+
+    for i in order:
+        fits = all(total + cost <= limit for total, cost, limit in zip(totals, sizes[i], limits))
+        if current and not fits:
+            batches.append(current)
+            current = []
+            totals = [0] * len(limits)
+        current.append(i)
+        totals = [total + cost for total, cost in zip(totals, sizes[i])]
+
+    if current:
+        batches.append(current)
+    return batches
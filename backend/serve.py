@@ -0,0 +1,150 @@
+"""
+Multi-process server: load the model once, then fork uvicorn workers that share it.
+
+The parent process loads the model, solvent panel encodings, the embedding
+store mapping and the registry heatmap templates, runs the warm-up and then
+forks the workers. Workers inherit all of it copy-on-write instead of
+each loading their own copy, and each gets its share of the CPUs for torch
+intra-op threads so they don't oversubscribe the machine.
+
+Usage:
+    python backend/serve.py [--host 0.0.0.0] [--port 8000] [--workers N]
+
+Environment:
+    SOL_WORKERS        Worker processes (default: one per available CPU)
+    SOL_TORCH_THREADS  Intra-op threads per worker (default: CPUs // workers, at least 1)
+
+With several workers, the featurization process pool is off by default (the
+workers already use every CPU), heatmap specs are shared through
+SOL_DATA_DIR/heatmaps so any worker can serve any image id, and only worker 0
+processes background jobs.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+# Utilities are local to the backend directory
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the API from several worker processes sharing one model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SOL_WORKERS", "0")) or available_cpus())
+    return parser.parse_args()
+
+
+def run_worker(index: int, sock: socket.socket, threads: int) -> None:
+    """Body of a forked worker process; never returns."""
+    import torch
+    import uvicorn
+    import main
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    torch.set_num_threads(threads)
+    main.predictor.engine.after_fork()
+    main.RUN_JOBS = main.RUN_JOBS and index == 0
+    config = uvicorn.Config(main.app, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+    os._exit(0)
+
+
+def main() -> None:
+    args = parse_args()
+    workers = max(args.workers, 1)
+    threads = int(os.environ.get("SOL_TORCH_THREADS", "0")) or max(available_cpus() // workers, 1)
+    if workers > 1:
+        os.environ.setdefault("SOL_FEATURIZE_WORKERS", "0")
+        data_dir = os.environ.get("SOL_DATA_DIR", str(Path(__file__).parent / "data"))
+        os.environ.setdefault("SOL_HEATMAP_SPEC_DIR", os.path.join(data_dir, "heatmaps"))
+
+    # Configuration is read at import, so the environment above must be set first
+    import torch
+    import main as app_module
+    from main import CHECKPOINT_PATH, SolubilityPredictor
+
+    # A single thread in the parent: forking after OpenMP spun up its pool can hang children
+    torch.set_num_threads(1)
+    start = time.time()
+    predictor = SolubilityPredictor(str(CHECKPOINT_PATH))
+    predictor.warm_up()
+    app_module.predictor = predictor
+    # Workers open their own SQLite connections; don't hand them the parent's
+    if predictor.result_store is not None:
+        predictor.result_store.close()
+    # Keep the refcount/GC writes of later collections off the inherited pages
+    gc.collect()
+    gc.freeze()
+    print(f"[INFO] Model loaded in {time.time() - start:.1f}s; "
+          f"starting {workers} worker(s) x {threads} torch thread(s)")
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children: Dict[int, int] = {}  # pid -> worker index
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(index, sock, threads)
+            finally:
+                os._exit(1)
+        children[pid] = index
+
+    def forward(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if not stopping:
+            print(f"[WARN] Worker {index} (pid {pid}) exited with status {status}; restarting")
+            time.sleep(1.0)
+            spawn(index)
+
+    predictor.close()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Shared fixtures. Backend modules are imported by their flat names, as the
+server and the scripts in backend/ do.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Ragged solute/solvent pairs: single heavy atoms, rings, charges, several fragments
+PAIRS = [
+    ("CC(=O)Oc1ccccc1C(=O)O", "O"),
+    ("Cn1cnc2c1c(=O)n(C)c(=O)n2C", "CCO"),
+    ("c1ccc2cc3ccccc3cc2c1", "Cc1ccccc1"),
+    ("C[N+](C)(C)CC(=O)[O-]", "CS(C)=O"),
+    ("OCC(O)C(O)C(O)C(O)CO", "CC#N"),
+    ("Clc1ccc(cc1)C(c1ccc(Cl)cc1)C(Cl)(Cl)Cl", "CCCCCC"),
+    ("[Na+].CC(=O)[O-]", "CN(C)C=O"),
+]
+TEMPERATURES = [250.0, 298.15, 350.0, 425.0]
+
+
+@pytest.fixture(scope="session")
+def model():
+    """Randomly initialized (seeded) SolubilityModel prepared for inference like the predictor's"""
+    import torch
+    from featurization import get_bond_type_table
+    from mpnn import SolubilityModel, get_model_params
+
+    torch.manual_seed(0)
+    model = SolubilityModel(**get_model_params(add_partial_charges=False))
+    model.eval()
+    model.build_edge_lookup(get_bond_type_table())
+    return model
+
+
+@pytest.fixture(scope="session")
+def pair_batches():
+    """Aligned solute and solvent graph batches of PAIRS"""
+    from torch_geometric.data import Batch
+    from featurization import MolecularGraphFeaturizer
+
+    featurizer = MolecularGraphFeaturizer(use_edge_features=True)
+    solutes = [featurizer.smiles_to_graph(solute) for solute, _ in PAIRS]
+    solvents = [featurizer.smiles_to_graph(solvent) for _, solvent in PAIRS]
+    return Batch.from_data_list(solutes), Batch.from_data_list(solvents)
@@ -0,0 +1,51 @@
+"""Every inference engine and precision mode against the eager SolubilityModel forward pass."""
+
+import copy
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torch_geometric")
+pytest.importorskip("rdkit")
+
+from conftest import TEMPERATURES
+from engines import create_engine, run_stages
+
+# Max |difference| of normalized predictions: fp32 engines only reorder float operations,
+# reduced precisions are held to the predictor's default SOL_PRECISION_TOLERANCE (in LogS)
+FP32_TOLERANCE = 1e-4
+REDUCED_TOLERANCE = 0.05 / 1.2159083883491026
+
+MODES = [
+    ("eager", "fp32", FP32_TOLERANCE),
+    ("compile", "fp32", FP32_TOLERANCE),
+    ("onnx", "fp32", FP32_TOLERANCE),
+    ("eager", "int8", REDUCED_TOLERANCE),
+    ("eager", "bf16", REDUCED_TOLERANCE),
+]
+
+
+@pytest.fixture(scope="module")
+def expected(model, pair_batches):
+    """(B, T) predictions of the model's own forward pass, one temperature at a time"""
+    solutes, solvents = pair_batches
+    with torch.no_grad():
+        return torch.cat([
+            model(solutes, solvents, torch.full((solutes.num_graphs,), t)) for t in TEMPERATURES
+        ], dim=1)
+
+
+@pytest.mark.parametrize("name, precision, tolerance", MODES, ids=[f"{n}-{p}" for n, p, _ in MODES])
+def test_engine_matches_eager_model(name, precision, tolerance, model, pair_batches, expected, tmp_path):
+    if name == "onnx":
+        pytest.importorskip("onnxruntime")
+    # The predictor serves the padding-free kernel; the reference forward keeps the trained dense one
+    served = copy.deepcopy(model)
+    served.interaction_kernel = "segment"
+    engine = create_engine(name, served, torch.device("cpu"), export_dir=str(tmp_path), precision=precision)
+
+    solutes, solvents = pair_batches
+    actual = run_stages(engine, solutes, solvents, torch.tensor([TEMPERATURES])).float()
+
+    assert actual.shape == expected.shape
+    assert float((actual - expected).abs().max()) <= tolerance
@@ -0,0 +1,51 @@
+"""The vectorized featurizer against the per-atom reference path."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torch_geometric")
+pytest.importorskip("rdkit")
+
+from featurization import MolecularGraphFeaturizer
+
+SMILES = [
+    # single atoms and small molecules
+    "O", "C", "[Cl-]", "CC#N", "C=C", "BrC(Br)Br", "OP(=O)(O)O", "CS(C)=O", "[2H]C([2H])([2H])O",
+    # charges and zwitterions
+    "C[N+](C)(C)CC(=O)[O-]", "[O-][N+](=O)c1ccccc1", "CC(=O)[O-]", "[NH3+]CC(=O)[O-]",
+    # aromatic and fused rings, heteroaromatics
+    "c1ccccc1", "c1ccncc1", "c1ccoc1", "c1ccsc1", "c1ccc2[nH]ccc2c1", "c1ccc2cc3ccccc3cc2c1",
+    "Cn1cnc2c1c(=O)n(C)c(=O)n2C", "C1CC1", "C1CCC2CCCCC2C1",
+    # stereo centres and double bonds
+    "N[C@@H](C)C(=O)O", "C[C@H](O)[C@@H](F)Cl", "C/C=C/C", "C/C=C\\C", "F/C=C/F",
+    # several fragments
+    "CCO.O", "[Na+].CC(=O)[O-]", "[NH4+].[Cl-]", "c1ccccc1.Cc1ccccc1",
+    # drug-like
+    "CC(=O)Oc1ccccc1C(=O)O", "CC(C)Cc1ccc(cc1)C(C)C(=O)O", "Clc1ccc(cc1)C(c1ccc(Cl)cc1)C(Cl)(Cl)Cl",
+    "OCC(O)C(O)C(O)C(O)CO", "CN1CCC[C@H]1c1cccnc1",
+]
+
+
+def assert_same_graph(graph, reference):
+    if reference is None:
+        assert graph is None
+        return
+    assert graph is not None
+    for key in ("x", "edge_index", "edge_attr", "edge_type"):
+        value, expected = getattr(graph, key), getattr(reference, key)
+        if expected is None:
+            # Bondless molecules carry no edge features
+            assert value is None, key
+            continue
+        assert value is not None, key
+        assert value.dtype == expected.dtype, key
+        assert torch.equal(value, expected), key
+
+
+@pytest.mark.parametrize("add_partial_charges", [False, True], ids=["plain", "charges"])
+@pytest.mark.parametrize("smiles", SMILES)
+def test_vectorized_is_bit_identical(smiles, add_partial_charges):
+    vectorized = MolecularGraphFeaturizer(use_edge_features=True, add_partial_charges=add_partial_charges)
+    reference = MolecularGraphFeaturizer(use_edge_features=True, add_partial_charges=add_partial_charges,
+                                         vectorized=False)
+    assert_same_graph(vectorized.smiles_to_graph(smiles), reference.smiles_to_graph(smiles))
@@ -0,0 +1,63 @@
+"""The padding-free interaction kernel against the padded (as trained) one."""
+
+import copy
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torch_geometric")
+pytest.importorskip("rdkit")
+
+
+@pytest.fixture(scope="module")
+def encoded(model, pair_batches):
+    """Encoder states and batch vectors of the ragged fixture pairs"""
+    solutes, solvents = pair_batches
+    with torch.no_grad():
+        h_s = model.encoder(solutes.x, solutes.edge_index, solutes.edge_attr, solutes.edge_type)
+        h_v = model.encoder(solvents.x, solvents.edge_index, solvents.edge_attr, solvents.edge_type)
+    return h_s, solutes.batch, h_v, solvents.batch
+
+
+@pytest.mark.parametrize("dtype, tolerance", [(torch.float64, 1e-12), (torch.float32, 1e-5)],
+                         ids=["float64", "float32"])
+def test_segment_matches_dense(model, encoded, dtype, tolerance):
+    h_s, solute_batch, h_v, solvent_batch = encoded
+    h_s, h_v = h_s.to(dtype), h_v.to(dtype)
+    num_pairs = int(solute_batch.max()) + 1
+
+    dense_s, dense_v = model._interaction_dense(h_s, solute_batch, h_v, solvent_batch)
+    segment_s, segment_v = model._interaction_segment(h_s, solute_batch, h_v, solvent_batch, num_pairs)
+
+    # Same values up to float summation order
+    assert segment_s.shape == dense_s.shape and segment_v.shape == dense_v.shape
+    assert torch.allclose(segment_s, dense_s, rtol=0, atol=tolerance * float(dense_s.abs().max()))
+    assert torch.allclose(segment_v, dense_v, rtol=0, atol=tolerance * float(dense_v.abs().max()))
+
+
+def test_interact_kernels_agree(model, encoded):
+    h_s, solute_batch, h_v, solvent_batch = encoded
+    segment = copy.deepcopy(model).double()
+    segment.interaction_kernel = "segment"
+    dense = copy.deepcopy(model).double()
+    dense.interaction_kernel = "dense"
+
+    with torch.no_grad():
+        expected = dense.interact(h_s.double(), solute_batch, h_v.double(), solvent_batch)
+        actual = segment.interact(h_s.double(), solute_batch, h_v.double(), solvent_batch)
+
+    assert torch.allclose(actual, expected, rtol=1e-10, atol=1e-12)
+
+
+def test_segment_single_atom_molecules(model):
+    # Two single-atom pairs (water, a halide ion) next to a 2 x 4 atom pair
+    h_s = torch.randn(4, model.hidden_dim, dtype=torch.float64)
+    h_v = torch.randn(6, model.hidden_dim, dtype=torch.float64)
+    solute_batch = torch.tensor([0, 1, 2, 2])
+    solvent_batch = torch.tensor([0, 1, 2, 2, 2, 2])
+
+    dense_s, dense_v = model._interaction_dense(h_s, solute_batch, h_v, solvent_batch)
+    segment_s, segment_v = model._interaction_segment(h_s, solute_batch, h_v, solvent_batch, 3)
+
+    assert torch.allclose(segment_s, dense_s, rtol=0, atol=1e-12)
+    assert torch.allclose(segment_v, dense_v, rtol=0, atol=1e-12)
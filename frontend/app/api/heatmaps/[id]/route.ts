@@ -0,0 +1,57 @@
+import { NextRequest, NextResponse } from "next/server";
+
+const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000";
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> },
+) {
+  try {
+    const { id } = await params;
+
+    // Forward conditional requests so the backend can answer 304
+    const headers: HeadersInit = {};
+    const ifNoneMatch = request.headers.get("if-none-match");
+    if (ifNoneMatch) {
+      headers["If-None-Match"] = ifNoneMatch;
+    }
+
+    const response = await fetch(
+      `${BACKEND_URL}/heatmaps/${encodeURIComponent(id)}`,
+      { headers },
+    );
+
+    const passthroughHeaders = new Headers();
+    for (const name of ["etag", "cache-control", "content-type"]) {
+      const value = response.headers.get(name);
+      if (value) passthroughHeaders.set(name, value);
+    }
+
+    if (response.status === 304) {
+      return new NextResponse(null, {
+        status: 304,
+        headers: passthroughHeaders,
+      });
+    }
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: `Backend error: ${response.statusText}` },
+        { status: response.status },
+      );
+    }
+
+    return new NextResponse(response.body, {
+      status: 200,
+      headers: passthroughHeaders,
+    });
+  } catch (error) {
+    console.error("Heatmap API error:", error);
+    return NextResponse.json(
+      {
+        error: error instanceof Error ? error.message : "Internal server error",
+      },
+      { status: 500 },
+    );
+  }
+}
@@ -5,7 +5,7 @@ const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000";
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json();
-    const { solute_smiles, solute_name } = body;
+    const { solute_smiles, solute_name, images } = body;
 
     if (!solute_smiles) {
       return NextResponse.json(
@@ -28,6 +28,7 @@ export async function POST(request: NextRequest) {
       body: JSON.stringify({
         solute_smiles,
         solute_name: solute_name || null,
+        images: images || "both",
       }),
     });
 
@@ -47,6 +48,13 @@ export async function POST(request: NextRequest) {
       "solvents",
     );
 
+    // Heatmaps are served lazily by the backend; route them through our proxy
+    for (const key of ["static_heatmap_url", "dynamic_heatmap_url"]) {
+      if (data[key]) {
+        data[key] = `/api${data[key]}`;
+      }
+    }
+
     return NextResponse.json(data);
   } catch (error) {
     console.error("Solvents API error:", error);
@@ -47,8 +47,8 @@ interface SolventScreeningResult {
     solvent: string;
     [key: string]: any;
   }>;
-  static_heatmap_base64: string;
-  dynamic_heatmap_base64: string;
+  static_heatmap_url?: string | null;
+  dynamic_heatmap_url?: string | null;
 }
 
 interface SolventScreeningProps {
@@ -203,8 +203,9 @@ export default function SolventScreening({
     if (!results) return;
 
     const imageUrl = isEnhancedContrast
-      ? `data:image/png;base64,${results.dynamic_heatmap_base64}`
-      : `data:image/png;base64,${results.static_heatmap_base64}`;
+      ? results.dynamic_heatmap_url
+      : results.static_heatmap_url;
+    if (!imageUrl) return;
 
     setSelectedImage({
       url: imageUrl,
@@ -390,11 +391,11 @@ export default function SolventScreening({
               <div className="flex flex-col items-center justify-start gap-4">
                 <div className="relative w-full">
                   <img
-                    src={`data:image/png;base64,${
-                      isEnhancedContrast
-                        ? results.dynamic_heatmap_base64
-                        : results.static_heatmap_base64
-                    }`}
+                    src={
+                      (isEnhancedContrast
+                        ? results.dynamic_heatmap_url
+                        : results.static_heatmap_url) ?? undefined
+                    }
                     alt={
                       isEnhancedContrast
                         ? "Dynamic Heatmap (Enhanced Contrast)"
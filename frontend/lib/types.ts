@@ -28,8 +28,8 @@ export interface AnalysisResponse {
   solute_name?: string;
   ranking_temperature_k: number;
   rankings: SolventRanking[];
-  static_heatmap_base64: string;
-  dynamic_heatmap_base64: string;
+  static_heatmap_url?: string | null;
+  dynamic_heatmap_url?: string | null;
 }
 
 // Frontend display types (extended for rich metadata)